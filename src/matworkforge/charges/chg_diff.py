@@ -6,23 +6,27 @@ Author: Dorothea Fennell
 Changelog:
     6-3-26: File created, comments added. Struggling with making this run recursively, due to the necessity for unrelaxed structures.
     6-8-26: Finished plotting function.
+    10-18-26: CHGCARs streamed into memory-mapped difference & cube written in blocks with chgcar_reader, instead of loading every CHGCAR with pymatgen.
 """
 #import modules
 import os
 import sys
 import numpy as np
-from pymatgen.io.vasp.outputs import Chgcar, VolumetricData
+from ..utils.chgcar_reader import read_header, read_total_into, write_cube
 from ase.io import read
 from ase.data.colors import jmol_colors
 from ase.data import covalent_radii
 import pyvista as pv
 
 def calc_chgdiff(base_dir,pris_file, vac_files):
-    '''Gets CHGCAR for pristine and vacancy structures and returns CHGDIFF'''
-    #get pristine CHGCAR
+    '''
+    Gets CHGCAR for pristine and vacancy structures and returns CHGDIFF.
+    Total densities are streamed into a memory-mapped difference grid, so only about one grid is held in memory.
+    '''
+    #get pristine CHGCAR header
     if os.path.exists(pris_file):
         try:
-            pris_chg = Chgcar.from_file(f'{pris_file}')
+            struc, dims, pris_offset = read_header(pris_file)
         except:
             print('Cannot read pristine CHGCAR. Exiting...')
             sys.exit()
@@ -30,13 +34,14 @@ def calc_chgdiff(base_dir,pris_file, vac_files):
         print('Cannot find pristine CHGCAR. Please check given path and try again. Exiting...')
         sys.exit()
     
-    #Get vacancy CHGCAR(s)
+    #Get vacancy CHGCAR(s) headers
     vacs = []
     for vac in vac_files:
-        if os.path.exists(vac.strip()):
+        vac = vac.strip()
+        if os.path.exists(vac):
             try:
-                vac_chg = Chgcar.from_file(f'{vac}')
-                vacs.append(vac_chg)
+                _, vac_dims, vac_offset = read_header(vac)
+                vacs.append((vac,vac_dims,vac_offset))
             except:
                 print('Cannot read vacancy CHGCAR. Skipping...')
                 continue
@@ -49,19 +54,33 @@ def calc_chgdiff(base_dir,pris_file, vac_files):
         print('Vacancy CHGCAR(s) not found or cannot be read. Exiting...')
         sys.exit()
     
-    #Subtract data
-    diff_data = pris_chg.data['total']
-    for v in vacs:
-        try:
-            diff_data -= v.data['total']
-        except:
+    #check grids
+    for vac, vac_dims, vac_offset in vacs:
+        if vac_dims != dims:
             print('Real space grids are of different sizes. Please use an unrelaxed calculation for the vacancy structure.')
             sys.exit()
     
-    #write data to cube file
-    struc = pris_chg.poscar
-    vol_data = VolumetricData(structure=struc.structure, data={'total':diff_data})
-    vol_data.to_cube(f'{base_dir}/CHGDIFF.cube')    
+    #Subtract data chunk by chunk in memory-mapped grid
+    diff_path = os.path.join(base_dir,'.CHGDIFF.grid')
+    diff_data = np.memmap(diff_path,dtype=float,mode='w+',shape=(int(np.prod(dims)),))
+    try:
+        try:
+            read_total_into(pris_file,diff_data,pris_offset)
+        except ValueError:
+            print('Cannot read pristine CHGCAR. Exiting...')
+            sys.exit()
+        for vac, vac_dims, vac_offset in vacs:
+            try:
+                read_total_into(vac,diff_data,vac_offset,subtract=True)
+            except ValueError:
+                print(f'Cannot read vacancy CHGCAR {vac}. Exiting...')
+                sys.exit()
+        
+        #write data to cube file
+        write_cube(f'{base_dir}/CHGDIFF.cube',struc,diff_data,dims)
+    finally:
+        del diff_data
+        os.remove(diff_path)
     print('CHGDIFF.cube file created.')
     return 
 
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized band centers & band widths (first & second moments of the DOS) for many sites at once.
+Gives the same values as CompleteDos.get_band_center & get_band_width, but the projected DOS is summed once per site
+instead of once per call.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import numpy as np
+from pymatgen.electronic_structure.core import Spin
+
+#energy windows relative to fermi level
+WINDOWS = {'full':None,'occ':(float('-inf'),0),'unocc':(0,float('inf'))}
+
+#define functions
+def site_band_dos(dos,sites,bands):
+    '''
+    Gets spin-summed projected DOS of orbital type bands[i] on sites[i] from CompleteDos.
+    Returns energies relative to fermi level and (n_sites, nedos) array of densities.
+    '''
+    rho = np.zeros((len(sites),len(dos.energies)))
+    for n, (site, band) in enumerate(zip(sites,bands)):
+        #sum orbitals of each spin, then spins, same as get_site_spd_dos & get_densities
+        spins = {}
+        for orb, pdos in dos.pdos[site].items():
+            if getattr(orb,'orbital_type',orb) != band:
+                continue
+            for spin, d in pdos.items():
+                spins[spin] = spins[spin] + d if spin in spins else d
+        if Spin.down in spins:
+            rho[n] = spins[Spin.up] + spins[Spin.down]
+        elif Spin.up in spins:
+            rho[n] = spins[Spin.up]
+    energies = dos.energies - dos.efermi
+    return energies, rho
+
+def moments(energies,rho,erange=None):
+    '''
+    Gets band center (first moment) and band width (square root of second moment about the band center) of each row
+    of rho in energy range erange. Returns arrays of centers & widths.
+    '''
+    if erange != None:
+        mask = (energies >= erange[0]) & (energies <= erange[1])
+        energies = energies[mask]
+        rho = rho[:,mask]
+    norm = np.trapezoid(rho,x=energies,axis=-1)
+    center = np.trapezoid(energies*rho,x=energies,axis=-1)/norm
+    p = energies[None,:] - center[:,None]
+    width = np.sqrt(np.trapezoid(p**2*rho,x=energies,axis=-1)/norm)
+    return center, width
+
+def band_moments(dos,sites,bands):
+    '''
+    Gets band centers & widths of sites for all energy windows in one pass.
+    Returns dict of window: (centers, widths), with windows full, occ (E <= 0) and unocc (E >= 0).
+    '''
+    energies, rho = site_band_dos(dos,sites,bands)
+    return {w: moments(energies,rho,erange) for w, erange in WINDOWS.items()}
@@ -15,17 +15,32 @@ Changelog:
             Added func to calculate electron and avg pdos intensity weighted descriptors. 
     3-6-26: Added section to calculate Vo, Vm, Vo-m, & Eoxm. 
     6-22-26: Added line to ignore warnings using warnings module.
+    10-18-26: Updated get_dirs & mod dir lookup to use calculation index.
+    10-18-26: vasprun.xml files are loaded through vasprun_cache instead of being parsed every time.
+    10-18-26: Each modification extracted by get_mod_desc on a process pool. Results cached in manifest of PDOS directory.
+    10-18-26: Band centers & widths computed for all sites at once with dos_moments.
+    10-18-26: Descriptors upserted to the campaign store, csv only written on request. Selected atoms found with isin mask.
+    10-18-26: descriptors csv written by default again, pyarrow is a required dependency.
+    10-18-26: Modifications whose band gap can't be read are skipped with a message.
 """
 #import modules
-from pymatgen.io.vasp import Vasprun, Outcar
+from pymatgen.io.vasp import Outcar
 from pymatgen.electronic_structure.core import OrbitalType, Spin
 import os
-import warnings
 from ase.io import read
 from ase.formula import Formula
 import numpy as np
 import pandas as pd
 from scipy.integrate import simpson 
+from ..utils.calc_index import get_index
+from ..utils.vasprun_cache import load_vasprun
+from .dos_moments import band_moments
+from ..utils.manifest import Manifest
+from ..utils.parallel import pool_map
+from ..utils.campaign_store import CampaignStore
+from functools import partial
+#input files of descriptors, relative to PDOS directory
+desc_inputs = ('../CONTCAR','../OUTCAR','../vasprun.xml','vasprun.xml','integrated-pdos.csv')
 #define functions
 def read_file(r_dir, file):
     '''Reads given file in directory and returns list of lines'''
@@ -58,18 +73,12 @@ def get_dirs(base_dir, ask = True):
     elif ask == False:
         base = 'PDOS'
         
-    for root, dirs, files in os.walk(base_dir):
-        if root.endswith(base) and 'integrated-pdos.csv' in files:
+    index = get_index(base_dir)
+    for root in index.find(suffix=base):
+        if index.has_file(root,'integrated-pdos.csv'):
             pdos_dirs.append(root)
-        elif root.endswith(base) and "integrated-pdos.csv" not in files:
+        else:
             print("PDOS calculations haven't been integrated yet.")
-    def sort_dirs(data):
-        path_list = data.split('/')
-        for p in path_list:
-            if p.startswith('Modification_'):
-                num = p.split('_')[1]
-                return int(num)
-    pdos_dirs.sort(key=sort_dirs)
     return pdos_dirs,base
 
 def get_atoms(file):
@@ -101,14 +110,14 @@ def get_atoms(file):
     return atoms, o_idx, m_idxs, lix
 
 def band_gap(vasprun):
-    '''Gets the band gap for the vasprun.xml file.'''
-    # Get band structure and band gap
-    band_struc = vasprun.get_band_structure()
-    band_gap = band_struc.get_band_gap()
-    fermi = band_struc.efermi
-    cbm = band_struc.get_cbm()['energy']
-    vbm = band_struc.get_vbm()['energy']
-    return band_gap['energy'],fermi,cbm,vbm
+    '''
+    Gets the band gap for the vasprun.xml file. Band gap is saved from the band structure when vasprun.xml is parsed.
+    Returns None if the band structure couldn't be read.
+    '''
+    band_gap = vasprun.band_gap
+    if band_gap == None:
+        return None
+    return band_gap['energy'],band_gap['efermi'],band_gap['cbm'],band_gap['vbm']
 
 def get_form_en(vasprun):
     '''Computes energy of formation.'''
@@ -141,43 +150,32 @@ def get_band_center(vasprun,m_idxs,o_idx,cbm):
     all_sites = struc.sites
     #get dos
     dos = vasprun.complete_dos
-    #get sites & band centers 
+    #get sites & orbitals: p band for Al, Ga & O, d band for other metals
+    idxs = [i for i in range(len(all_sites)) if i in m_idxs or i == o_idx]
+    sites = [all_sites[i] for i in idxs]
+    bands = [OrbitalType(1) if (i == o_idx or all_sites[i].label in ('Al','Ga')) else OrbitalType(2) for i in idxs]
+    #get band centers & widths of all sites at once
+    mom = band_moments(dos,sites,bands)
     band_centers = {}
     val_full = 0
     val_occ = 0
     val_unocc = 0
     bw_full = 0
     bw_occ = 0
-    for i, site in enumerate(all_sites):
+    for n, i in enumerate(idxs):
+        bc = mom['full'][0][n]
+        bc_occ = mom['occ'][0][n]
+        bc_unocc = mom['unocc'][0][n]
+        band_width = mom['full'][1][n]
+        occ_bw = mom['occ'][1][n]
         if i in m_idxs:
-            if site.label in ('Al','Ga'):
-                site_list=[site]
-                bc = dos.get_band_center(band=OrbitalType(1),sites=site_list)
-                bc_occ = dos.get_band_center(band=OrbitalType(1),sites=site_list,erange=(float('-inf'),0))
-                bc_unocc = dos.get_band_center(band=OrbitalType(1),sites=site_list,erange=(0,float('inf')))
-                band_width = dos.get_band_width(band=OrbitalType(1),sites=site_list)
-                occ_bw = dos.get_band_width(band=OrbitalType(1),sites=site_list, erange=(float('-inf'),0))
-                band_centers.update({f'{i}_bc_full':bc,f'{i}_bc_occ':bc_occ,f'{i}_bc_unocc':bc_unocc,f'{i}_band_width':band_width, f'{i}_occ_bw':occ_bw})
-            else:
-                site_list=[site]
-                bc = dos.get_band_center(sites=site_list)
-                bc_occ = dos.get_band_center(sites=site_list,erange=(float('-inf'),0))
-                bc_unocc = dos.get_band_center(sites=site_list,erange=(0,float('inf')))
-                band_width = dos.get_band_width(sites=site_list)
-                occ_bw = dos.get_band_width(sites=site_list, erange=(float('-inf'),0))
-                band_centers.update({f'{i}_bc_full':bc,f'{i}_bc_occ':bc_occ,f'{i}_bc_unocc':bc_unocc,f'{i}_band_width':band_width,f'{i}_occ_bw':occ_bw})
+            band_centers.update({f'{i}_bc_full':bc,f'{i}_bc_occ':bc_occ,f'{i}_bc_unocc':bc_unocc,f'{i}_band_width':band_width,f'{i}_occ_bw':occ_bw})
             val_full += bc
             val_occ += bc_occ
             val_unocc += bc_unocc
             bw_full += band_width
             bw_occ += occ_bw
         if i == o_idx:
-            site_list=[site]
-            bc = dos.get_band_center(band=OrbitalType(1),sites=site_list)
-            bc_occ = dos.get_band_center(band=OrbitalType(1),sites=site_list,erange=(float('-inf'),0))
-            bc_unocc = dos.get_band_center(band=OrbitalType(1),sites=site_list,erange=(0,float('inf')))
-            band_width = dos.get_band_width(band=OrbitalType(1),sites=site_list)
-            occ_bw = dos.get_band_width(band=OrbitalType(1),sites=site_list, erange=(float('-inf'),0))
             bc_cbm_diff = cbm - bc
             band_centers.update({'O(p)_bc_full':bc,'O(p)_bc_occ':bc_occ,'O(p)_bc_unocc':bc_unocc, 'O(p)_cbm_diff':bc_cbm_diff,'O(p)_band_width':band_width, 'O(p)_occ_bw':occ_bw})
     
@@ -321,7 +319,7 @@ def get_pdos_data(pdos_dir,m_idxs):
         df.insert(1,'Element',elements)
         df.insert(2,'Atom index',idxs)
     
-    sel_df = df.query('`Atom index` in @m_idxs')      
+    sel_df = df[df['Atom index'].isin(m_idxs)]
     sel_sum = sel_df.sum(numeric_only=True)
     sums = df.sum(numeric_only=True) 
     elements = sel_df['Element']
@@ -567,8 +565,82 @@ def get_vs(opt_dir,m_idxs,o_idx,elec_data,bl_ser):
     v_ser = pd.Series(v_data)
     return v_ser
 
-def extract_desc(base_dir,ask=True):
-    '''Extract descriptors.'''
+def get_mod_desc(pdos_dir,mod):
+    '''Extracts all descriptors for one modification and returns pandas series, or None if the band gap can't be read.'''
+    opt_dir = os.path.dirname(pdos_dir)
+    #get atoms and indices from CONTCAR
+    atoms, o_idx, m_idxs, lix = get_atoms(os.path.join(opt_dir,'CONTCAR'))
+    #get integrated pdos data 
+    pdos_data, elec_data = get_pdos_data(pdos_dir, m_idxs)
+    #get electronegativty data
+    eln = get_eln(atoms,m_idxs)
+    #get bond lengths
+    bl_ser = bond_lengths(atoms, o_idx, m_idxs)
+    #get Vm, Vo, Vm-o, & Eoxm
+    v_ser = get_vs(opt_dir,m_idxs,o_idx,elec_data,bl_ser)
+    #get vasprun for form energy, band gap, band center and t2g/eg dos
+    #use optimization for form_en & band gap, pdos for band center & t2g/eg
+    #vasprun.xml is only parsed the first time, after that it's loaded from vasprun.npz
+    opt_vpr = load_vasprun(os.path.join(opt_dir,'vasprun.xml'))
+    pdos_vpr = load_vasprun(os.path.join(pdos_dir,'vasprun.xml'))
+    #get band gap & fermi energy
+    bg = band_gap(pdos_vpr)
+    if bg == None:
+        print(f'Band gap could not be read from {pdos_dir}/vasprun.xml ({pdos_vpr.band_gap_error}). Skipping {mod}...')
+        return None
+    bg_e,fermi,cbm,vbm = bg
+    #get formation energy
+    form_en = get_form_en(opt_vpr)
+    #check cbm
+    if cbm == None:
+        dos = pdos_vpr.complete_dos
+        fermi = dos.efermi
+        cbm,vbm = dos.get_cbm_vbm()
+    #get band centers
+    bc_ser, avg_bc = get_band_center(pdos_vpr, m_idxs,o_idx,cbm)
+    #get t2g/eg dos
+    t2g_eg = t2g_eg_dos(pdos_vpr, m_idxs)
+    #get ionization e and polarizability
+    ion_pol_ser = get_ion_e_pol(opt_vpr, m_idxs)
+    #get evac from binary oxides
+    bin_evac_ser = get_binary_evac(opt_vpr, m_idxs)
+    #get std reduction potential
+    std_pot_ser = get_std_pot(opt_vpr, m_idxs)
+    #get avg intensities
+    pdos_weights_ser = pdos_weights(pdos_vpr, m_idxs)
+    #get weighted descriptors
+    wtd_ser = get_wtd_desc(m_idxs, pdos_weights_ser, elec_data, bc_ser)
+    #create pandas series with modification and single value returns
+    e_ser = pd.Series(data={'Modification':mod,'E_form':form_en,'E_fermi':fermi,'E_bg':bg_e,'VBM':vbm,'CBM':cbm,'Lix':lix})
+    #concatenate all series
+    mod_ser = pd.concat([e_ser,pdos_data,bl_ser,v_ser,eln,bc_ser,t2g_eg,ion_pol_ser,bin_evac_ser,avg_bc,std_pot_ser,pdos_weights_ser,wtd_ser])
+    return mod_ser
+
+def cached_mod_desc(task,force=False):
+    '''
+    Gets descriptors for (pdos_dir, mod) task. Descriptors are saved to the manifest of the PDOS directory and only
+    extracted again if one of the input files changed, or if force is True. Returns None if the modification was skipped.
+    '''
+    pdos_dir, mod = task
+    manifest = Manifest(pdos_dir)
+    if force != True and manifest.is_current('extract',desc_inputs):
+        keys, values = manifest.get('extract')
+        mod_ser = pd.Series(values,index=keys,dtype=object)
+    else:
+        mod_ser = get_mod_desc(pdos_dir,mod)
+        if mod_ser is None:
+            return None
+        #numpy types aren't JSON serializable
+        values = [v.item() if isinstance(v,np.generic) else v for v in mod_ser.values]
+        manifest.update('extract',desc_inputs,[list(mod_ser.index),values])
+    mod_ser['Modification'] = mod
+    return mod_ser
+
+def extract_desc(base_dir,ask=True,jobs=1,force=False,csv=True):
+    '''
+    Extract descriptors. Modifications are extracted on jobs worker processes, unchanged ones are loaded from the manifest unless force is True.
+    Descriptors are upserted to the campaign store by modification. {prefix}-descriptors.csv is also written unless csv is False.
+    '''
     #get directories
     pdos_dirs,base = get_dirs(base_dir,ask)
     
@@ -592,61 +664,23 @@ def extract_desc(base_dir,ask=True):
     else:
         #if no ModsCo.txt file, pulls mod dir names
         mods = []
-        for root, dirs, files in os.walk(base_dir):
+        for root in get_index(base_dir).find():
             if os.path.basename(root).startswith('Modification_'):
                 mods.append(os.path.basename(root))
         mods.sort(key=sort_mods)
     
-    mod_data_list = []
+    #get modifications in each pdos dir
+    tasks = []
     for pdos_dir in pdos_dirs:
         for i, mod in enumerate(mods,1):
             if f'Modification_{i}/' in pdos_dir:
-                opt_dir = os.path.dirname(pdos_dir)
-                #get atoms and indices from CONTCAR
-                atoms, o_idx, m_idxs, lix = get_atoms(os.path.join(opt_dir,'CONTCAR'))
-                #get integrated pdos data 
-                pdos_data, elec_data = get_pdos_data(pdos_dir, m_idxs)
-                #get electronegativty data
-                eln = get_eln(atoms,m_idxs)
-                #get bond lengths
-                bl_ser = bond_lengths(atoms, o_idx, m_idxs)
-                #get Vm, Vo, Vm-o, & Eoxm
-                v_ser = get_vs(opt_dir,m_idxs,o_idx,elec_data,bl_ser)
-                #get vasprun for form energy, band gap, band center and t2g/eg dos
-                #use optimization for form_en & band gap, pdos for band center & t2g/eg
-                with warnings.catch_warnings():
-                    warnings.simplefilter('ignore')
-                    opt_vpr = Vasprun(os.path.join(opt_dir,'vasprun.xml'))
-                    pdos_vpr = Vasprun(os.path.join(pdos_dir,'vasprun.xml'))
-                #get formation energy
-                form_en = get_form_en(opt_vpr)
-                #get band gap & fermi energy
-                bg_e,fermi,cbm,vbm = band_gap(pdos_vpr)
-                #check cbm
-                if cbm == None:
-                    dos = pdos_vpr.complete_dos
-                    fermi = dos.efermi
-                    cbm,vbm = dos.get_cbm_vbm()
-                #get band centers
-                bc_ser, avg_bc = get_band_center(pdos_vpr, m_idxs,o_idx,cbm)
-                #get t2g/eg dos
-                t2g_eg = t2g_eg_dos(pdos_vpr, m_idxs)
-                #get ionization e and polarizability
-                ion_pol_ser = get_ion_e_pol(opt_vpr, m_idxs)
-                #get evac from binary oxides
-                bin_evac_ser = get_binary_evac(opt_vpr, m_idxs)
-                #get std reduction potential
-                std_pot_ser = get_std_pot(opt_vpr, m_idxs)
-                #get avg intensities
-                pdos_weights_ser = pdos_weights(pdos_vpr, m_idxs)
-                #get weighted descriptors
-                wtd_ser = get_wtd_desc(m_idxs, pdos_weights_ser, elec_data, bc_ser)
-                #create pandas series with modification and single value returns
-                e_ser = pd.Series(data={'Modification':mod,'E_form':form_en,'E_fermi':fermi,'E_bg':bg_e,'VBM':vbm,'CBM':cbm,'Lix':lix})
-                #concatenate all series
-                mod_ser = pd.concat([e_ser,pdos_data,bl_ser,v_ser,eln,bc_ser,t2g_eg,ion_pol_ser,bin_evac_ser,avg_bc,std_pot_ser,pdos_weights_ser,wtd_ser])
-                #append series to list
-                mod_data_list.append(mod_ser)
+                tasks.append((pdos_dir,mod))
+    #extract descriptors for each modification on worker processes
+    mod_data_list = pool_map(partial(cached_mod_desc,force=force),tasks,jobs,'Extracting descriptors')
+    mod_data_list = [m for m in mod_data_list if m is not None]
+    if not mod_data_list:
+        print('No descriptors extracted. Exiting...')
+        return
     
     #create data frame from mod_data_list
     mod_data = pd.DataFrame(data=mod_data_list)
@@ -661,7 +695,11 @@ def extract_desc(base_dir,ask=True):
         prefix = 'pris'
     else:
         prefix = 'all'
+    #add to campaign store
+    CampaignStore(base_dir).upsert(f'{prefix}-descriptors',mod_data.reset_index(),['Modification'])
+    print(f'Descriptors extracted and added to {prefix}-descriptors in campaign store.')
     #print data to csv
-    mod_data.to_csv(os.path.join(base_dir,f'{prefix}-descriptors.csv'))
-    print('Descriptors extracted and descriptors.csv created.')
+    if csv == True:
+        mod_data.to_csv(os.path.join(base_dir,f'{prefix}-descriptors.csv'))
+        print('Descriptors extracted and descriptors.csv created.')
     
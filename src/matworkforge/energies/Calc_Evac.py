@@ -12,18 +12,21 @@ Changelog:
     7-9-25: Modified to sort by pair removed then by modification directory number, with sorting dir number by int rather than string to avoid 10 coming before 2. 
     2-26-26: Modified to add option to ignore symmetry. 
     3-2-26: Moved ignore_sym check so it can pull the right mods file. 
+    10-18-26: Updated to get directories from calculation index.
+    10-18-26: get_e reads final energy from end of OUTCAR instead of loading whole file.
+    10-18-26: E_vac also upserted to the campaign store.
 """
 #import modules
 import os
 import sys
 from ase.io import read
+from ..utils.calc_index import get_index
+from ..utils.outcar_reader import final_energy
+from ..utils.campaign_store import CampaignStore, rows_to_frame
 #define functions
-def get_dirs(mod_dir):
+def get_dirs(mod_dir,index):
     '''Runs through all directories in base directory and returns list of vacancy directories.'''
-    vac_dirs=[]
-    for root, dirs, files in os.walk(mod_dir):
-        if root.endswith('Removed') and 'OUTCAR' in files:
-            vac_dirs.append(root)
+    vac_dirs=index.find(suffix='Removed',has='OUTCAR',within=mod_dir)
     vac_dirs.sort()
     return vac_dirs
 
@@ -60,14 +63,9 @@ def get_pair_numbers(vac_dir):
 
 def get_e(e_dir):
     '''Gets final energy from OUTCAR file.'''
-    if 'OUTCAR' in os.listdir(e_dir):
-        lines = read_file(e_dir,'OUTCAR')
-        toten = []
-        for l in lines:
-            if "TOTEN" in l:
-                toten.append(l)
-        e = toten[-1].split()
-        e = float(e[4])
+    outcar = os.path.join(e_dir,'OUTCAR')
+    if os.path.exists(outcar):
+        e = final_energy(outcar)
         return e
     
 def get_ep(base_dir,mod_dir):
@@ -85,7 +83,7 @@ def get_ep(base_dir,mod_dir):
         print('Exiting...')
         sys.exit()
         
-def get_all_e(mod_dir,mods,base_dir):
+def get_all_e(mod_dir,mods,base_dir,index):
     '''Gets total energy of pristine and vacancy surfaces.Returns list of vacancy energies.'''
     #get total energy of pristine surface
     p = os.path.join(mod_dir,'VASP_inputs/')
@@ -95,7 +93,7 @@ def get_all_e(mod_dir,mods,base_dir):
         e_p = get_ep(base_dir,mod_dir)
         
     #gets all vacancy dirs
-    vac_dirs = get_dirs(mod_dir)
+    vac_dirs = get_dirs(mod_dir,index)
     #stops the program in no vacancy directories are found
     if not vac_dirs:
         print('No vacancy directories found. Exiting...')
@@ -162,8 +160,9 @@ def sort_data(data):
 
 def process_e_vac(base_dir):
     '''Gets e_vac recursively for all dirs and returns it in one csv '''
+    index = get_index(base_dir)
     mod_dirs = []
-    for root, dirs, files in os.walk(base_dir):
+    for root in index.find():
         if os.path.basename(root).startswith('Modification_'):
             mod_dirs.append(root)
 
@@ -202,7 +201,7 @@ def process_e_vac(base_dir):
     #Calculate E_vac in each modification directory in 
     e_vac_tot = []
     for mod_dir in mod_dirs:
-        ev = get_all_e(mod_dir,mods,base_dir)
+        ev = get_all_e(mod_dir,mods,base_dir,index)
         for e in ev:
             e_vac_tot.append(e)
     
@@ -213,7 +212,10 @@ def process_e_vac(base_dir):
     #sort data
     e_vac_tot.sort(key=sort_data)
     #write file
+    header = 'Modification,Atom Pair,Total E,E_vac (pristine),E_vac (from prev vacancy)'
     with open(f'{base_dir}/E_vac.csv','w',encoding=None) as f:
-        f.write('Modification,Atom Pair,Total E,E_vac (pristine),E_vac (from prev vacancy)')
+        f.write(header)
         f.writelines(e_vac_tot)
         f.close
+    #add to campaign store
+    CampaignStore(base_dir).upsert('E_vac',rows_to_frame(header,e_vac_tot),['Modification','Atom Pair'])
@@ -5,19 +5,22 @@ Calculate Adsorbtion energy.
 Author: Dorothea Fennell
 Changelog: 
     3-3-26: Created, comments added. 
+    10-18-26: Updated to get directories from calculation index.
+    10-18-26: get_e reads final energy from end of OUTCAR instead of loading whole file.
+    10-18-26: E_ads also upserted to the campaign store.
 """
 #import modules
 import os
 import sys
 from ase.io import read
+from ..utils.calc_index import get_index
+from ..utils.outcar_reader import final_energy
+from ..utils.campaign_store import CampaignStore, rows_to_frame
 
 #define functions
-def get_dirs(mod_dir):
+def get_dirs(mod_dir,index):
     '''Runs through all directories in base directory and returns list of vacancy directories.'''
-    ads_dirs=[]
-    for root, dirs, files in os.walk(mod_dir):
-        if root.endswith('Added') and 'OUTCAR' in os.listdir(root):
-            ads_dirs.append(root)
+    ads_dirs=index.find(suffix='Added',has='OUTCAR',within=mod_dir)
     ads_dirs.sort()
     return ads_dirs
 
@@ -54,14 +57,9 @@ def get_pair_numbers(ads_dir):
 
 def get_e(e_dir):
     '''Gets final energy from OUTCAR file.'''
-    if 'OUTCAR' in os.listdir(e_dir):
-        lines = read_file(e_dir,'OUTCAR')
-        toten = []
-        for l in lines:
-            if "TOTEN" in l:
-                toten.append(l)
-        e = toten[-1].split()
-        e = float(e[4])
+    outcar = os.path.join(e_dir,'OUTCAR')
+    if os.path.exists(outcar):
+        e = final_energy(outcar)
         return e
     
 def get_ep(base_dir,mod_dir):
@@ -108,7 +106,7 @@ def sort_data(data):
     num = int(dir_num)
     return (atom_pair,num)
 
-def get_all_e(mod_dir,mods,base_dir,ignore_sym=False):
+def get_all_e(mod_dir,mods,base_dir,index,ignore_sym=False):
     '''Gets total energy of pristine and vacancy surfaces.Returns list of vacancy energies.'''
     #get total energy of pristine surface
     p = os.path.join(mod_dir,'VASP_inputs/')
@@ -118,7 +116,7 @@ def get_all_e(mod_dir,mods,base_dir,ignore_sym=False):
         e_p = get_ep(base_dir,mod_dir)
     
     #get adsorption directories
-    ads_dirs = get_dirs(mod_dir)
+    ads_dirs = get_dirs(mod_dir,index)
     #stops the program in no adsorption directories are found
     if not ads_dirs:
         print('No adsorption directories found. Exiting...')
@@ -156,8 +154,9 @@ def get_all_e(mod_dir,mods,base_dir,ignore_sym=False):
 
 def process_e_ads(base_dir):
     '''Gets e_ads recursively for all dirs and returns it in one csv '''
+    index = get_index(base_dir)
     mod_dirs = []
-    for root, dirs, files in os.walk(base_dir):
+    for root in index.find():
         if os.path.basename(root).startswith('Modification_'):
             mod_dirs.append(root)
 
@@ -196,7 +195,7 @@ def process_e_ads(base_dir):
     #calculate E_ads for each directory
     e_ads_tot = []
     for mod_dir in mod_dirs:
-        ea = get_all_e(mod_dir, mods, base_dir)
+        ea = get_all_e(mod_dir, mods, base_dir, index)
         for e in ea:
             e_ads_tot.append(e)
     
@@ -208,9 +207,12 @@ def process_e_ads(base_dir):
     #sort data
     e_ads_tot.sort(key=sort_data)
     #write file
+    header = 'Modification,Atom Pair,Total E,E_ads (pristine),E_vac (from prev vacancy/adsorption)'
     with open(f'{base_dir}/E_ads.csv','w',encoding=None) as f:
-        f.write('Modification,Atom Pair,Total E,E_ads (pristine),E_vac (from prev vacancy/adsorption)')
+        f.write(header)
         f.writelines(e_ads_tot)
         f.close
+    #add to campaign store
+    CampaignStore(base_dir).upsert('E_ads',rows_to_frame(header,e_ads_tot),['Modification','Atom Pair'])
 
         
\ No newline at end of file
@@ -5,10 +5,16 @@ Changelog:
     5-14-25: Created, comments added.
     7-9-25: Modified to sort by modification directory number, with sorting dir number by int rather than string to avoid 10 coming before 2. 
     3-2-26: Modified to check ISYM
+    10-18-26: Updated to get modification directories from calculation index.
+    10-18-26: get_e reads final energy from end of OUTCAR instead of loading whole file.
+    10-18-26: E_pristine also upserted to the campaign store.
 """
 #import modules
 import os
 import sys
+from ..utils.calc_index import get_index
+from ..utils.outcar_reader import final_energy
+from ..utils.campaign_store import CampaignStore, rows_to_frame
 #define functions
 def read_file(r_dir, file):
     '''Reads given file in directory and returns list of lines'''
@@ -19,14 +25,9 @@ def read_file(r_dir, file):
 
 def get_e(e_dir):
     '''Gets final energy from OUTCAR file.'''
-    if 'OUTCAR' in os.listdir(e_dir):
-        lines = read_file(e_dir,'OUTCAR')
-        toten = []
-        for l in lines:
-            if "TOTEN" in l:
-                toten.append(l)
-        e = toten[-1].split()
-        e = float(e[4])
+    outcar = os.path.join(e_dir,'OUTCAR')
+    if os.path.exists(outcar):
+        e = final_energy(outcar)
         return e
     
 def sort_by_dir(data):
@@ -43,8 +44,9 @@ def get_all_e(base_dir):
         print('E_pristine.csv already exists.')
         return
     
+    index = get_index(base_dir)
     mod_dirs = []
-    for root, dirs, files in os.walk(base_dir):
+    for root in index.find():
         if os.path.basename(root).startswith('Modification_'):
             mod_dirs.append(root)
     if not mod_dirs:
@@ -97,8 +99,11 @@ def get_all_e(base_dir):
     #sort e_list
     e_list.sort(key=sort_by_dir)
     #write file
+    header = 'Mod dir,Mod,Total E'
     with open(f'{base_dir}/E_pristine.csv','w',encoding=None) as f:
-        f.write('Mod dir,Mod,Total E')
+        f.write(header)
         f.writelines(e_list)
         f.close
+    #add to campaign store
+    CampaignStore(base_dir).upsert('E_pristine',rows_to_frame(header,e_list),['Mod dir'])
 
@@ -5,13 +5,14 @@ Sets up band structure calculations
 Author: Dorothea Fennell
 Changelog: 
     2-6-26: Created, comments added.
+    10-18-26: Input files staged with utils.staging. WAVECAR is linked if the band structure INCAR has LWAVE = .FALSE., otherwise it's reflinked or copied. INCAR is copied too, since gen_inputs updates it.
 """
 #import modules
 from pymatgen.io.vasp import Kpoints, Incar 
 from pymatgen.core.structure import Structure
 from pymatgen.symmetry.bandstructure import HighSymmKpath
 import os
-import shutil
+from ..utils.staging import Stager
 
 #define functions
 def gen_inputs(band_dir, band_params, k):
@@ -43,32 +44,37 @@ def get_incar_params():
             bands_incar_params[key.strip()] = value.strip()
     return bands_incar_params
 
-def copy_vasp_files(source_dir, dest_dir):
+def copy_vasp_files(source_dir, dest_dir, stager=None):
     """Copies essential VASP input files from source to destination."""
-    os.makedirs(dest_dir, exist_ok=True)  # Ensure the target directory exists
-    #list of files to copy
-    FILES_TO_COPY = ["KPOINTS", "POTCAR", "CONTCAR","WAVECAR"]
-    for file in FILES_TO_COPY:
-        src_file = os.path.join(source_dir, file)
-        dest_file = os.path.join(dest_dir, file)
-        if os.path.exists(src_file):
-            shutil.copy2(src_file, dest_file)
-            print(f"Copied {file} to {dest_dir}")
-        else:
-            print(f"Warning: {file} not found in {source_dir}, skipping.")
+    if stager == None:
+        stager = Stager()
+    #files to copy, POTCAR is linked as it's only replaced, never edited
+    FILES_TO_COPY = {"INCAR":'copy', "KPOINTS":'copy', "POTCAR":'link', "CONTCAR":'copy'}
+    stager.stage_files(source_dir, dest_dir, FILES_TO_COPY)
 
-def create_bands(input_dir,base_dir,band_params,k):
+def stage_wavecar(source_dir, dest_dir, stager=None):
+    """
+    Links WAVECAR into band structure directory if VASP won't write to it (LWAVE = .FALSE.), otherwise it's only
+    reflinked (or copied), since VASP overwrites WAVECAR in place.
+    """
+    if stager == None:
+        stager = Stager()
+    incar = Incar.from_file(f'{dest_dir}/INCAR')
+    mode = 'cow' if incar.get('LWAVE', True) else 'link'
+    stager.stage_files(source_dir, dest_dir, {"WAVECAR":mode})
+
+def create_bands(input_dir,base_dir,band_params,k,stager=None):
     '''Creates directory for band structure calculations and copies files.'''
     #make dirs
     output_dir = os.path.join(input_dir,'Band_struc')
     os.makedirs(output_dir, exist_ok=True)
     
     # Copy required VASP files
-    copy_vasp_files(input_dir, output_dir)
+    copy_vasp_files(input_dir, output_dir, stager)
     
     #Rename CONTCAR to POSCAR
-    if os.path.exists(f'{input_dir}/PDOS/CONTCAR'):
-        os.rename(f'{input_dir}/PDOS/CONTCAR',f'{input_dir}/PDOS/POSCAR')
+    if os.path.exists(f'{output_dir}/CONTCAR'):
+        os.rename(f'{output_dir}/CONTCAR',f'{output_dir}/POSCAR')
     
     #Check for ISYM
     with open(f'{input_dir}/INCAR','r') as f:
@@ -81,6 +87,9 @@ def create_bands(input_dir,base_dir,band_params,k):
     
     #Generate input files
     gen_inputs(output_dir, band_params, k)
+    
+    #WAVECAR staged after INCAR is written so LWAVE can be checked
+    stage_wavecar(input_dir, output_dir, stager)
 
 def create_all_bands(base_dir, k):
     '''Processes all VASP_inputs dirs recursively.'''
@@ -96,5 +105,8 @@ def create_all_bands(base_dir, k):
         return
     
     # Apply the same modifications to all VASP_inputs directories
+    band_params = get_incar_params()
+    stager = Stager()
     for input_dir in input_dirs:
-        create_bands(input_dir, base_dir, k)
+        create_bands(input_dir, base_dir, band_params, k, stager)
+    stager.report()
@@ -5,9 +5,11 @@ Calculate band gap, e_fermi, CBM & VBM
 Author: Dorothea Fennell
 Changelog: 
     2-9-26: Created, comments added
+    10-18-26: vasprun.xml is loaded through vasprun_cache.
+    10-18-26: Directories whose band gap can't be read are skipped with a message.
 """
 #import modules
-from pymatgen.io.vasp import Vasprun
+from ..utils.vasprun_cache import load_vasprun
 import pandas as pd
 import os
 
@@ -20,14 +22,12 @@ def read_file(r_dir, file):
     return lines
 
 def get_BG(vasprun, mod):
-    '''Calculates band gap, E_fermi, CBM & VBM'''
-    # Get band structure and band gap
-    band_struc = vasprun.get_band_structure()
-    band_gap = band_struc.get_band_gap()
-    fermi = band_struc.efermi
-    cbm = band_struc.get_cbm()['energy']
-    vbm = band_struc.get_vbm()['energy']
-    bg_ser = pd.Series({'Modification':mod,'Band gap':band_gap['energy'],'E_fermi':fermi,'VBM':vbm,'CBM':cbm})
+    '''Calculates band gap, E_fermi, CBM & VBM. Returns None if the band structure couldn't be read.'''
+    # Get band gap saved from band structure
+    band_gap = vasprun.band_gap
+    if band_gap == None:
+        return None
+    bg_ser = pd.Series({'Modification':mod,'Band gap':band_gap['energy'],'E_fermi':band_gap['efermi'],'VBM':band_gap['vbm'],'CBM':band_gap['cbm']})
     return bg_ser
 
 def get_band_data(base_dir):
@@ -56,13 +56,19 @@ def get_band_data(base_dir):
     bg_data = []
     
     for band_dir in band_dirs:
-        vpr = Vasprun(f'{band_dir}/vasprun.xml')
+        vpr = load_vasprun(f'{band_dir}/vasprun.xml')
         for i,mod in enumerate(mods,1):
             if f'Modification_{i}/' in band_dir:
                 mod.strip('-')
                 bg = get_BG(vpr, mod)
+                if bg is None:
+                    print(f'Band gap could not be read from {band_dir}/vasprun.xml ({vpr.band_gap_error}). Skipping...')
+                    continue
                 bg_data.append(bg)
     
+    if not bg_data:
+        print('No band gap data found. Exiting...')
+        return
     #create df 
     bg_df = pd.DataFrame(bg_data)
     bg_df.set_index('Modification',inplace=True)
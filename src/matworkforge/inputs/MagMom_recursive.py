@@ -1,6 +1,8 @@
 import os
 import shutil
+import numpy as np
 # Define element-specific magnetic moments
+DEFAULT_MOMENT = 0.6
 
 def read_poscar(filename):
     with open(filename, 'r') as f:
@@ -39,9 +41,9 @@ def read_spin_pairs(filename, ignore_sym = False):
                     spin_pairs[idx] = spin
     return spin_pairs
 
-def assign_magnetic_moments(atom_to_element, spin_pairs, ignore_sym = False):
+def read_magmom_dict():
     """
-    Assign magnetic moments to atoms based on spin pairs and element type.
+    Read element magnetic moments from MagMom_dict.txt in the user directory.
     """
     userdir = os.path.expanduser('~/wf-user-files')
     with open(os.path.join(userdir,'MagMom_dict.txt'),'r') as mm:
@@ -52,57 +54,81 @@ def assign_magnetic_moments(atom_to_element, spin_pairs, ignore_sym = False):
         x_split = x.split(':')
         y = x_split[1].strip('\n')
         magnetic_moments.update({f'{x_split[0]}':float(f'{y}')})
-        
-    magmom = [magnetic_moments.get(element, 0.6) for element in atom_to_element]  # Default all moments
+    return magnetic_moments
+
+def spin_arrays(spin_pairs, ignore_sym = False):
+    """
+    Convert spin pairs to arrays of atom indices and spin signs (+1 up, -1 down).
+    Only the last up/down spin of each atom is kept, same as assigning the pairs in order.
+    """
     if ignore_sym == False:
-        for (atom1, atom2), spin in spin_pairs.items():
-            moment1 = magnetic_moments.get(atom_to_element[atom1], 0.6)  # Atom1 moment
-            moment2 = magnetic_moments.get(atom_to_element[atom2], 0.6)  # Atom2 moment
-    
-            if spin == "up":
-                magmom[atom1] = moment1
-                magmom[atom2] = moment2
-            elif spin == "down":
-                magmom[atom1] = -moment1
-                magmom[atom2] = -moment2
-    elif ignore_sym == True:
-        for idx, spin in spin_pairs.items():
-            moment = magnetic_moments.get(atom_to_element[idx],0.6)
-            if spin == 'up':
-                magmom[idx] = moment
-            elif spin == 'down':
-                magmom[idx] = -moment
+        idx = [atom for pair in spin_pairs for atom in pair]
+        spins = [spin for spin in spin_pairs.values() for _ in range(2)]
+    else:
+        idx = list(spin_pairs.keys())
+        spins = list(spin_pairs.values())
+    idx = np.array(idx, dtype=int)
+    spins = np.array(spins, dtype=str)
+    keep = (spins == 'up') | (spins == 'down')
+    idx, signs = idx[keep], np.where(spins[keep] == 'down', -1.0, 1.0)
+    # last occurrence of each atom
+    _, last = np.unique(idx[::-1], return_index=True)
+    last = len(idx) - 1 - last
+    return idx[last], signs[last]
+
+def assign_magnetic_moments(atom_to_element, spin_pairs, ignore_sym = False, magnetic_moments = None, spins = None):
+    """
+    Assign magnetic moments to atoms based on spin pairs and element type.
+    magnetic_moments & spins (from read_magmom_dict & spin_arrays) can be given so they're only loaded once for many POSCARs.
+    """
+    if magnetic_moments == None:
+        magnetic_moments = read_magmom_dict()
+    if spins == None:
+        spins = spin_arrays(spin_pairs, ignore_sym)
+    idx, signs = spins
     
+    # Default all moments
+    magmom = np.array([magnetic_moments.get(element, DEFAULT_MOMENT) for element in atom_to_element], dtype=float)
+    magmom[idx] *= signs
     return magmom
 
 def generate_magmom_line(elements, num_atoms, magmom):
     """
     Create the `MAGMOM` line preserving the element order in POSCAR.
     """
-    magmom_line = []
-    index = 0
-
-    for elem, count in zip(elements, num_atoms):
-        element_moments = magmom[index:index + count]
-
-        # Group consecutive identical moments
-        group_start = 0
-        while group_start < len(element_moments):
-            group_moment = element_moments[group_start]
-            group_count = 0
-
-            for i in range(group_start, len(element_moments)):
-                if element_moments[i] == group_moment:
-                    group_count += 1
-                else:
-                    break
-
-            magmom_line.append(f"{group_count}*{group_moment:.1f}")
-            group_start += group_count
-
-        index += count
-
-    return " ".join(magmom_line)
+    magmom = np.asarray(magmom, dtype=float)
+    if len(magmom) == 0:
+        return ""
+    # Group consecutive identical moments, starting a new group at each element
+    new_group = np.ones(len(magmom), dtype=bool)
+    new_group[1:] = magmom[1:] != magmom[:-1]
+    bounds = np.cumsum(num_atoms)[:-1]
+    new_group[bounds[bounds < len(magmom)]] = True
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, len(magmom)))
+    return " ".join(f"{count}*{moment:.1f}" for count, moment in zip(counts, magmom[starts]))
+
+def set_incar_magmom(incar_path, magmom_line, ignore_sym = False):
+    """
+    Replace the MAGMOM line of INCAR in place with magmom_line ("MAGMOM = ..."), or add it at the end if the INCAR
+    has none. ISYM = -1 is added if ignoring symmetry.
+    """
+    with open(incar_path, "r") as f:
+        lines = f.readlines()
+    magmom_line = f"{magmom_line.strip()}\n"
+    if ignore_sym == True and not [line for line in lines if 'ISYM' in line]:
+        lines.append('ISYM = -1\n')
+    magmom_idx = [i for i, line in enumerate(lines) if line.strip().startswith("MAGMOM")]
+    if magmom_idx:
+        lines[magmom_idx[0]] = magmom_line
+        # drop duplicate MAGMOM lines so VASP only sees the new one
+        lines = [line for i, line in enumerate(lines) if i not in magmom_idx[1:]]
+    else:
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        lines.append(magmom_line)
+    with open(incar_path, "w") as f:
+        f.writelines(lines)
 
 def find_files_recursive(pattern, mod):
     """
@@ -119,7 +145,12 @@ def find_files_recursive(pattern, mod):
                     matched_files.append(os.path.join(root, file))
     return matched_files
 
-def process_poscar_files(mod = None, ignore_sym=False):
+def process_poscar_files(mod = None, ignore_sym=False, write_incar=False):
+    """
+    Generate MAGMOM lines for all POSCAR_*.vasp files in one pass. Spin pairs & moments are only read once and POSCARs
+    with the same elements & counts share one MAGMOM line.
+    Lines are saved to *_MAGMOM.txt files, or written straight into the INCAR next to the POSCAR if write_incar is True.
+    """
     # Find all POSCAR files with the pattern POSCAR_modified_*.vasp
     poscar_files = find_files_recursive("POSCAR_",mod)
     poscar_files = [file for file in poscar_files if file.endswith(".vasp")]
@@ -144,18 +175,31 @@ def process_poscar_files(mod = None, ignore_sym=False):
         print("SpinPairs.txt not found in the directory.")
         return
 
+    # Read SpinPairs and moments once for all POSCARs
+    spin_pairs = read_spin_pairs(spin_file, ignore_sym)
+    spins = spin_arrays(spin_pairs, ignore_sym)
+    magnetic_moments = read_magmom_dict()
+    magmom_lines = {}
+
     for poscar_file in poscar_files:
         #print(f"Processing {poscar_file}...")
 
-        # Read POSCAR and SpinPairs
+        # Read POSCAR
         elements, num_atoms, atom_to_element = read_poscar(poscar_file)
-        spin_pairs = read_spin_pairs(spin_file, ignore_sym)
-
-        # Assign magnetic moments
-        magmom = assign_magnetic_moments(atom_to_element, spin_pairs, ignore_sym)
 
-        # Generate MAGMOM line
-        magmom_line = generate_magmom_line(elements, num_atoms, magmom)
+        # Assign magnetic moments & generate MAGMOM line, once per composition
+        key = (tuple(elements), tuple(num_atoms))
+        if key not in magmom_lines:
+            magmom = assign_magnetic_moments(atom_to_element, spin_pairs, ignore_sym, magnetic_moments, spins)
+            magmom_lines[key] = generate_magmom_line(elements, num_atoms, magmom)
+        magmom_line = magmom_lines[key]
+
+        # Write MAGMOM line into INCAR
+        incar_path = os.path.join(os.path.dirname(poscar_file), "INCAR")
+        if write_incar == True and os.path.exists(incar_path):
+            set_incar_magmom(incar_path, f"MAGMOM = {magmom_line}", ignore_sym)
+            print(f"Updated MAGMOM in: {incar_path}")
+            continue
 
         # Write output MAGMOM line to file
         output_file = f"{poscar_file.replace('.vasp', '_MAGMOM.txt')}"
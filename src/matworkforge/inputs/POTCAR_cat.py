@@ -1,4 +1,10 @@
 import os
+import shutil
+import hashlib
+from functools import lru_cache
+
+# content-addressed POTCARs, linked into each directory
+POTCAR_STORE = ".potcar-store"
 
 def find_vasp_files(vac = False, add = False):
     """
@@ -29,17 +35,53 @@ def read_element_names(filepath):
     elements = lines[5].strip().split()  # 5th line (0-based index 4)
     return elements
 
+@lru_cache(maxsize=None)
+def read_element_potcar(potcar_base_path, element):
+    """
+    Read the POTCAR of one element. Each element is only read from POT_PATH once per run.
+    """
+    potcar_path = os.path.join(potcar_base_path, element, "POTCAR")
+    if not os.path.exists(potcar_path):
+        raise FileNotFoundError(f"POTCAR file for {element} not found at {potcar_path}.")
+    with open(potcar_path, 'rb') as element_potcar:
+        return element_potcar.read()
+
+@lru_cache(maxsize=None)
+def assemble_potcar(elements, potcar_base_path, store_dir=POTCAR_STORE):
+    """
+    Concatenate the POTCARs of the ordered tuple of elements and save it to the store, named by its hash.
+    Returns the path of the stored POTCAR. Each element tuple is only assembled once per run.
+    """
+    data = b"".join(read_element_potcar(potcar_base_path, element) for element in elements)
+    os.makedirs(store_dir, exist_ok=True)
+    stored_path = os.path.join(store_dir, hashlib.sha256(data).hexdigest())
+    if not os.path.exists(stored_path):
+        tmp = f"{stored_path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, stored_path)
+    return stored_path
+
+def link_file(src, dst):
+    """
+    Hardlink src to dst, replacing dst if it exists. Copies the file if it can't be linked (e.g. different filesystem).
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
 def concatenate_potcar(elements, potcar_base_path, output_filepath):
     """
     Concatenate POTCAR files for the given elements into a single POTCAR file.
+    Identical POTCARs are hardlinks to one file in the POTCAR store, so edit them by replacing the file rather than in place.
     """
-    with open(output_filepath, 'w') as master_potcar:
-        for element in elements:
-            potcar_path = os.path.join(potcar_base_path, element, "POTCAR")
-            if not os.path.exists(potcar_path):
-                raise FileNotFoundError(f"POTCAR file for {element} not found at {potcar_path}.")
-            with open(potcar_path, 'r') as element_potcar:
-                master_potcar.write(element_potcar.read())
+    stored_path = assemble_potcar(tuple(elements), potcar_base_path)
+    link_file(stored_path, output_filepath)
     print(f"Created POTCAR file: {output_filepath}")
 
 def process_directories(potcar_base_path,vac, add):
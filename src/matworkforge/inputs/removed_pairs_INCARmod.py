@@ -1,5 +1,5 @@
 import os
-from .MagMom_recursive import process_poscar_files
+from .MagMom_recursive import process_poscar_files, set_incar_magmom
 
 def read_file(r_dir, file):
     '''Reads given file in directory and returns list of lines'''
@@ -17,9 +17,6 @@ def find_magmom_file(modification_dir):
 
 def modify_incar(incar_path, root, ignore_sym):
     """Edits the MAGMOM line in INCAR based on the modification type."""
-    with open(incar_path, "r") as f:
-        lines = f.readlines()
-
     magmom_file = find_magmom_file(root)  # Find the _MAGMOM.txt in the current Modification_# directory
     if not magmom_file:
         print(f"No _MAGMOM.txt file found in {root}")
@@ -27,30 +24,26 @@ def modify_incar(incar_path, root, ignore_sym):
     
     with open(magmom_file, "r") as magmom:
         magmom_line = magmom.read().strip()
-    
-    #check for ISYM
-    if ignore_sym == True:
-        isym = [line for line in lines if 'ISYM' in line]
-        if not isym:
-            lines.append('ISYM = -1\n')
-    
-    modified_lines = []
-    for line in lines:
-        if line.strip().startswith("MAGMOM"):
-            modified_lines.append(magmom_line)
-        else:
-            modified_lines.append(line)
-
-    with open(incar_path, "w") as f:
-        f.writelines(modified_lines)
 
+    set_incar_magmom(incar_path, magmom_line, ignore_sym)
     print(f"Updated INCAR in {os.path.dirname(incar_path)}")
 
-def process_pairs_mod_dirs(base_directory,element_name,mod,ignore_sym=False):
-    """Finds all *_Pairs directories and edits their INCAR files."""
+def process_pairs_mod_dirs(base_directory,element_name,mod,ignore_sym=False,write_incar=False):
+    """
+    Finds all *_Pairs directories and edits their INCAR files. If write_incar is True, MAGMOM lines are written
+    straight into the INCARs instead of going through _MAGMOM.txt files.
+    """
+    mod_dirs = []
     for root, dirs, files in os.walk(base_directory):
         if "INCAR" in files:
             if os.path.basename(root).startswith(f'{element_name}_') and root.endswith(f'_{mod}'):
-                process_poscar_files(mod,ignore_sym)
-                modify_incar(os.path.join(root, "INCAR"),root,ignore_sym)
+                mod_dirs.append(root)
+    if not mod_dirs:
+        return
+    #generate MAGMOM lines for all directories in one pass
+    process_poscar_files(mod,ignore_sym,write_incar)
+    if write_incar == True:
+        return
+    for root in mod_dirs:
+        modify_incar(os.path.join(root, "INCAR"),root,ignore_sym)
     
\ No newline at end of file
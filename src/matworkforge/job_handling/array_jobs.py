@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SLURM job arrays for submitting many calculations at once. Directories are written to a manifest (one per line) &
+one array job is submitted, where task i runs vasp.sh's commands in line i of the manifest. Each task writes its
+output to slurm-<array jid>_<task>.out in its calculation directory, so status & check find it like any other job.
+Array job IDs are saved with their manifests in .wf-arrays/jobs.json, so pending tasks can be mapped back to directories.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Job header moved to job_header so packed jobs can use it. Packed jobs are recorded with their manifests too.
+    10-18-26: Directories split into several arrays of at most max_size tasks, so MaxArraySize isn't exceeded.
+"""
+#import modules
+import os
+import re
+import json
+import time
+
+#directory for manifests, array & packed job scripts & job record, in base directory
+ARRAY_DIR = '.wf-arrays'
+#sbatch options that are set for the array job instead of taken from vasp.sh
+ARRAY_OPTS = ('--output','-o','--error','-e','--array','-a')
+#most tasks per array job, below SLURM's default MaxArraySize of 1001
+MAX_ARRAY_SIZE = 1000
+
+#define functions
+def write_manifest(base_dir,dirs):
+    '''Writes manifest of directories (one absolute path per line). Returns path of manifest.'''
+    array_dir = os.path.join(os.path.abspath(base_dir),ARRAY_DIR)
+    os.makedirs(array_dir,exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    manifest = os.path.join(array_dir,f'manifest-{stamp}.txt')
+    n = 1
+    while os.path.exists(manifest):
+        n += 1
+        manifest = os.path.join(array_dir,f'manifest-{stamp}-{n}.txt')
+    with open(manifest,'w') as f:
+        for d in dirs:
+            f.write(os.path.abspath(d) + '\n')
+    return manifest
+
+def read_manifest(manifest):
+    '''Reads list of directories from manifest.'''
+    with open(manifest,'r') as f:
+        return [l.rstrip('\n') for l in f if l.strip()]
+
+def split_script(script):
+    '''Splits job script into header (shebang & #SBATCH lines) and commands.'''
+    lines = script.splitlines(keepends=True)
+    n = 0
+    while n < len(lines) and (lines[n].startswith('#') or not lines[n].strip()):
+        n += 1
+    header = [l for l in lines[:n] if l.strip()]
+    return header, lines[n:]
+
+def job_header(vasp_sh,output):
+    '''
+    Reads vasp.sh and returns header for a job submitted from the base directory & the commands of vasp.sh.
+    The #SBATCH options of vasp.sh are kept, except output & array options, and the job output is set to output.
+    '''
+    with open(vasp_sh,'r') as f:
+        header, commands = split_script(f.read())
+    if not header or not header[0].startswith('#!'):
+        header.insert(0,'#!/bin/bash\n')
+    keep = [header[0]]
+    for l in header[1:]:
+        opts = l.split()
+        if len(opts) > 1 and opts[0] == '#SBATCH' and opts[1].split('=')[0] in ARRAY_OPTS:
+            continue
+        keep.append(l)
+    keep.append(f'#SBATCH --output={output}\n')
+    return keep, commands
+
+def array_script(vasp_sh,manifest):
+    '''
+    Writes array job script next to manifest from vasp.sh. Each task changes to its line of the manifest and runs the
+    commands of vasp.sh. Returns path of script.
+    '''
+    array_dir = os.path.dirname(manifest)
+    keep, commands = job_header(vasp_sh,f'{array_dir}/slurm-%A_%a.out')
+    task = [
+        '\n',
+        '#array task: run in line SLURM_ARRAY_TASK_ID of manifest\n',
+        f'calc_dir=$(sed -n "$((SLURM_ARRAY_TASK_ID+1))p" "{manifest}")\n',
+        'cd "$calc_dir" || exit 1\n',
+        'exec > "slurm-${SLURM_ARRAY_JOB_ID}_${SLURM_ARRAY_TASK_ID}.out" 2>&1\n',
+        '\n',
+        ]
+    script = os.path.join(array_dir,os.path.basename(manifest).replace('manifest-','array-').replace('.txt','.sh'))
+    with open(script,'w') as f:
+        f.write(''.join(keep + task + commands))
+    return script
+
+def record_array(base_dir,jid,manifest):
+    '''Saves array job ID & its manifest in job record.'''
+    record = os.path.join(base_dir,ARRAY_DIR,'jobs.json')
+    jobs = read_record(base_dir)
+    jobs[str(jid)] = os.path.basename(manifest)
+    tmp = f'{record}.{os.getpid()}.tmp'
+    with open(tmp,'w') as f:
+        json.dump(jobs,f,indent=1)
+    os.replace(tmp,record)
+
+def read_record(base_dir):
+    '''Reads job record. Returns dict of array job ID: manifest file name.'''
+    record = os.path.join(base_dir,ARRAY_DIR,'jobs.json')
+    if not os.path.exists(record):
+        return {}
+    with open(record,'r') as f:
+        return json.load(f)
+
+def get_arrays(base_dir):
+    '''Gets directories of all recorded array jobs. Returns dict of array job ID: list of directories.'''
+    arrays = {}
+    for jid, manifest in read_record(base_dir).items():
+        path = os.path.join(base_dir,ARRAY_DIR,manifest)
+        if os.path.exists(path):
+            arrays[jid] = read_manifest(path)
+    return arrays
+
+def parse_tasks(spec):
+    '''Parses array task IDs from task part of sacct job ID, e.g. "7" or "[0-3,8%4]". Returns list of task IDs.'''
+    spec = spec.strip('[]').split('%')[0]
+    tasks = []
+    for part in spec.split(','):
+        if re.fullmatch(r'\d+-\d+',part):
+            start, end = part.split('-')
+            tasks.extend(range(int(start),int(end)+1))
+        elif part.isdigit():
+            tasks.append(int(part))
+    return tasks
+
+def task_dirs(arrays,job_id):
+    '''Maps sacct job ID of array task(s) (e.g. "123_7" or "123_[0-9%4]") or of packed job to list of directories.'''
+    if '_' not in job_id:
+        #packed jobs run all directories of their manifest
+        return arrays.get(job_id,[])
+    jid, spec = job_id.split('_',1)
+    dirs = arrays.get(jid,[])
+    return [dirs[t] for t in parse_tasks(spec) if t < len(dirs)]
+
+def submit_array(base_dir,dirs,submitter,max_running=20,vasp_sh='vasp.sh',max_size=MAX_ARRAY_SIZE):
+    '''
+    Submits dirs as array jobs of at most max_size tasks, each running at most max_running tasks at once.
+    Directory i is task i % max_size of array i // max_size. Returns list of array job IDs.
+    '''
+    jids = []
+    for i in range(0,len(dirs),max_size):
+        chunk = dirs[i:i+max_size]
+        manifest = write_manifest(base_dir,chunk)
+        script = array_script(os.path.join(base_dir,vasp_sh),manifest)
+        array = f'0-{len(chunk)-1}'
+        if max_running != None and max_running > 0:
+            array += f'%{max_running}'
+        jid = submitter.submit(base_dir,script,args=[f'--array={array}'],parsable=True)
+        record_array(base_dir,jid,manifest)
+        jids.append(jid)
+    return jids
@@ -7,37 +7,69 @@ Changelog:
     2-27-26: Updated to include checking CONTCAR file for correct structure.
     3-17-26: Added additional ZBRENT error message that Custodian wasn't catching.
     3-27-26: Rewrote completely to use new custom error handler.
+    10-18-26: Updated find_files to use calculation index. SLURM states for all directories are looked up in one batch.
+              Added jobs option to check & correct on a process pool. Submissions are serialized in the main process.
 """
 #import modules
 import os
+import io
+import sys
+from functools import partial
+from contextlib import redirect_stdout
 from rich import print
 from .err_handler import ErrorHandler
+from .slurm import SlurmLookup, latest_slurm_file
+from ..utils.calc_index import get_index
+from ..utils.parallel import pool_map
 
 #define functions
 def find_files(base_dir):
     """
     Recursively find output files """
-    matched_files = []
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file =='OUTCAR':
-                matched_files.append(os.path.join(root, file))
+    calc_dirs = get_index(base_dir).find(has='OUTCAR')
+    matched_files = [os.path.join(d,'OUTCAR') for d in calc_dirs]
     return matched_files
+
+def get_slurm_states(base_dir):
+    '''Looks up SLURM states for all calculations with output files.'''
+    index = get_index(base_dir)
+    slurm = SlurmLookup()
+    slurm_files = [latest_slurm_file(d,index.files(d)) for d in index.find(has='OUTCAR')]
+    #check only handles directories with slurm files, so pending jobs aren't needed
+    slurm.load([f for f in slurm_files if f != None])
+    return slurm
    
-def err_fix(base_dir,no_submit=False):
-    """ Fixes errors if possible or prints error if not."""
-    #gets error files
-    output_files = find_files(base_dir)
-    err_files = []
-    #set up error handler
-    handler = ErrorHandler()
-    for file in output_files:
-        dirname = os.path.dirname(file)
+def check_dir(slurm,dirname):
+    '''
+    Checks and corrects one calculation. Runs in worker processes, so output is captured and returned
+    with the errors found: (dirname, errors, output).
+    '''
+    handler = ErrorHandler(slurm)
+    out = io.StringIO()
+    with redirect_stdout(out):
         err_chk = handler.check(dirname)
         if err_chk == True:
             handler.correct(dirname)
-            err_files.append(file)
+    errors = handler.errors if err_chk == True else set()
+    return dirname, errors, out.getvalue()
+
+def err_fix(base_dir,no_submit=False,jobs=1):
+    """ Fixes errors if possible or prints error if not. Checks are run on jobs worker processes."""
+    #gets error files
+    output_files = find_files(base_dir)
+    err_files = []
+    #check & correct in parallel, results come back in directory order
+    slurm = get_slurm_states(base_dir)
+    dirs = [os.path.dirname(file) for file in output_files]
+    results = pool_map(partial(check_dir,slurm),dirs,jobs)
+    #submit one at a time from this process
+    handler = ErrorHandler(slurm)
+    for dirname, errors, output in results:
+        sys.stdout.write(output)
+        if errors:
+            err_files.append(os.path.join(dirname,'OUTCAR'))
             if no_submit == False:
+                handler.errors = errors
                 handler.submit(dirname)
             
     if not err_files:
@@ -8,14 +8,20 @@ Changelog:
     3-27-26: Wrote correct method, updated errors to check for, updated run 
     3-30-26: Removed eddrmm error, updated to actually write new INCAR file. 
     6-22-26: Updated SLURM check to get output from sacct command (same as StatusCheck)
+    10-18-26: SLURM states come from shared SlurmLookup so err_fix can look them up in bulk.
+              vasp_msgs moved to vasp_msgs.py, OUTCAR checked for all messages in one streaming pass.
+              Submissions go through rate-limited Submitter.
 """
 #import modules
 import os
 import shutil
-import subprocess as sp
 from typing import ClassVar
 from pymatgen.io.vasp.inputs import Incar
 from .check_contcar import check_contcar
+from .slurm import SlurmLookup
+from .submitter import Submitter
+from .vasp_msgs import VASP_MSGS
+from ..utils.outcar_reader import scan_errors
 #def functions
 def copy_contcar(dirname):
     """Copies CONTCAR to POSCAR to continue calculation."""
@@ -30,41 +36,24 @@ class ErrorHandler:
     '''
     Custom VASP error handler based on Custodian's version. This version is significantly stripped down, as Custodian tends to overcorrect. The error handler also checks the SLURM output files. 
     '''
-    vasp_msgs: ClassVar = {
-        "tet": ["Tetrahedron method fails","tetrahedron method fails","Routine TETIRR needs special values","Tetrahedron method fails (number of k-points < 4)",],
-        "ksymm": ["Fatal error detecting k-mesh","Fatal error: unable to match k-point",],
-        "inv_rot_mat": ["rotation matrix was not found (increase SYMPREC)"],
-        "brions": ["BRIONS problems: POTIM should be increased"],
-        "pricel": ["internal error in subroutine PRICEL"],
-        "zbrent": ["ZBRENT: fatal internal in", "ZBRENT: fatal error in bracketing","ZBRENT: fatal error: bracketing interval incorrect"],
-        "pssyevx": ["ERROR in subspace rotation PSSYEVX"],
-        "pdsyevx": ["ERROR in subspace rotation PDSYEVX"],
-        "edddav": ["Error EDDDAV: Call to ZHEGV failed"],
-        "zheev": ["ERROR EDDIAG: Call to routine ZHEEV failed!"],
-        "eddiag": ["ERROR in EDDIAG: call to ZHEEV/ZHEEVX/DSYEV/DSYEVX failed"],
-        "rhosyg": ["RHOSYG"],
-        "posmap": ["POSMAP"],
-        "point_group": ["group operation missing"],
-        "pricelv": ["PRICELV: current lattice and primitive lattice are incommensurate"],
-        "symprec_noise": ["determination of the symmetry of your systems shows a strong"],
-        "bravais": ["Inconsistent Bravais lattice"],
-        "hnform": ["HNFORM: k-point generating"],
-        "set_core_wf": ["internal error in SET_CORE_WF"],
-        "read_error": ["Error reading item", "Error code was IERR= 5"],
-        "ibzkpt": ["not all point group operations"],
-        "fexcf": ["supplied exchange-correlation table"],
-        "spin_polarized_harris": ["Spin polarized Harris functional dynamics is a good joke"],
-        }
+    vasp_msgs: ClassVar = VASP_MSGS
     
     slurm_msgs: ClassVar = {
         "timeout": "DUE TO TIME LIMIT",
         "cancelled": "CANCELLED",
         }
     
-    def __init__(self):
+    def __init__(self,slurm=None,submitter=None):
         '''
-        Initialize error handler.
+        Initialize error handler. slurm is a SlurmLookup that may already hold job states.
+        submitter is the Submitter used for resubmitting calculations.
         '''
+        if slurm == None:
+            slurm = SlurmLookup()
+        if submitter == None:
+            submitter = Submitter()
+        self.slurm = slurm
+        self.submitter = submitter
         self.output_file = 'OUTCAR'
         self.vasp_errors = dict(ErrorHandler.vasp_msgs)
         self.slurm_errors = dict(ErrorHandler.slurm_msgs)
@@ -72,27 +61,7 @@ class ErrorHandler:
         self.errors: set[str] = set()
     
     def __get_slurm_status(self,dirname,latest_file):
-        if latest_file != None:
-            filename = os.path.basename(latest_file)
-            jid = filename.split('-')[1].split('.')[0]
-            try:
-                codes = sp.check_output(['sacct','-n','-j',f'{jid}','-o','State'],stderr=sp.DEVNULL,text=True)
-            except:
-                pass
-        
-            if codes:
-                job_state = codes.split('\n')[0].strip()
-                state = job_state.title()
-        else:
-            pend_chk = sp.check_output(['sacct','-n','-s','pending','-o','State,WorkDir%500'],stderr=sp.DEVNULL,text=True)
-            if pend_chk:
-                jobs = pend_chk.split('\n')
-                for j in jobs:
-                    j = j.strip()
-                    if dirname in j:
-                        state = 'Pending'
-            else:
-                state = 'Not run'
+        state = self.slurm.state(dirname,latest_file)
         return state
     
     def check(self,dirname = "./"):
@@ -115,15 +84,8 @@ class ErrorHandler:
         if self.state.lower() == 'timeout' or self.state.lower() == 'cancelled':
             self.errors.add(self.state.lower())
         
-        #check vasp output file
-        with open(os.path.join(dirname,self.output_file),'rt') as file:
-            text = file.read()
-            
-            #check for vasp errors
-            for err in self.vasp_errors:
-                for msg in self.vasp_errors[err]:
-                    if text.find(msg) != -1:
-                        self.errors.add(err)
+        #check vasp output file for vasp errors
+        self.errors |= scan_errors(os.path.join(dirname,self.output_file),self.vasp_errors)
                     
         #checks for slurm exiting with exit code 1 (vasp error not caught above)
         if not self.errors:
@@ -276,7 +238,4 @@ class ErrorHandler:
         
         if not self.errors & {'spin_polarized_harris','read_error','set_core_wf','error_code'}:
             print(f'Submitting calculation in {dirname}...')
-            wd = os.getcwd()
-            os.chdir(dirname)
-            sp.run(['sbatch','vasp.sh'], check=True)
-            os.chdir(wd)
+            self.submitter.submit(dirname)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fake SLURM commands for running the job handling commands offline.
+Jobs are read from the JSON file set in WF_FAKE_SLURM_DB: {"jobs": [{"JobID": "123", "State": "COMPLETED", "WorkDir": "/path"}, ...]}
+Usage: WF_SACCT="python -m matworkforge.job_handling.fake_slurm sacct" wf status
+       WF_SBATCH="python -m matworkforge.job_handling.fake_slurm sbatch" wf check
+sbatch is run from the calculation directory, so WF_FAKE_SLURM_DB should be an absolute path when using it.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Added fake sbatch, which adds submitted jobs (& array tasks) to the database as pending.
+              Dependencies are saved with the job.
+"""
+#import modules
+import os
+import sys
+import json
+import argparse
+
+#define functions
+def read_db():
+    '''Reads fake job database.'''
+    db_file = os.getenv('WF_FAKE_SLURM_DB','fake-slurm.json')
+    if not os.path.exists(db_file):
+        return {'jobs':[]}
+    with open(db_file,'r') as f:
+        return json.load(f)
+
+def write_db(db):
+    '''Writes fake job database.'''
+    db_file = os.getenv('WF_FAKE_SLURM_DB','fake-slurm.json')
+    with open(db_file,'w') as f:
+        json.dump(db,f,indent=1)
+
+def sacct(args):
+    '''Prints jobs in sacct format. Supports -n, -P, -X, -o, -j and -s.'''
+    parser = argparse.ArgumentParser(prog='sacct')
+    parser.add_argument('-n','--noheader',action='store_true')
+    parser.add_argument('-P','--parsable2',action='store_true')
+    parser.add_argument('-X','--allocations',action='store_true')
+    parser.add_argument('-o','--format',default='JobID,State')
+    parser.add_argument('-j','--jobs',default=None)
+    parser.add_argument('-s','--state',default=None)
+    opts = parser.parse_args(args)
+    fields = [f.split('%')[0] for f in opts.format.split(',')]
+    jobs = read_db()['jobs']
+    if opts.jobs != None:
+        jids = set(opts.jobs.split(','))
+        #array job IDs match all of their tasks
+        jobs = [j for j in jobs if j['JobID'] in jids or j['JobID'].split('_')[0] in jids]
+    if opts.state != None:
+        states = {s.upper() for s in opts.state.split(',')}
+        if 'PD' in states:
+            states.add('PENDING')
+        jobs = [j for j in jobs if j['State'].split()[0].upper() in states]
+    lines = []
+    if opts.noheader == False:
+        lines.append(fields)
+    for j in jobs:
+        lines.append([str(j.get(f,'')) for f in fields])
+    for l in lines:
+        if opts.parsable2:
+            print('|'.join(l))
+        else:
+            print(' '.join(f'{x:>10}' for x in l))
+
+def sbatch(args):
+    '''Adds job to database as pending & prints job ID. Supports --parsable and --array (e.g. 0-9%4).'''
+    parser = argparse.ArgumentParser(prog='sbatch')
+    parser.add_argument('--parsable',action='store_true')
+    parser.add_argument('-a','--array',default=None)
+    parser.add_argument('-d','--dependency',default=None)
+    parser.add_argument('script')
+    opts, _ = parser.parse_known_args(args)
+    if not os.path.exists(opts.script):
+        print(f'sbatch: error: Unable to open file {opts.script}',file=sys.stderr)
+        sys.exit(1)
+    db = read_db()
+    jid = 1 + max([int(j['JobID'].split('_')[0]) for j in db['jobs']],default=1000)
+    workdir = os.getcwd()
+    extra = {} if opts.dependency == None else {'Dependency':opts.dependency}
+    if opts.array != None:
+        tasks = []
+        for part in opts.array.split('%')[0].split(','):
+            start, _, end = part.partition('-')
+            tasks.extend(range(int(start),int(end or start)+1))
+        for t in tasks:
+            db['jobs'].append({'JobID':f'{jid}_{t}','State':'PENDING','WorkDir':workdir,**extra})
+    else:
+        db['jobs'].append({'JobID':str(jid),'State':'PENDING','WorkDir':workdir,**extra})
+    write_db(db)
+    if opts.parsable:
+        print(jid)
+    else:
+        print(f'Submitted batch job {jid}')
+
+def main(argv=None):
+    '''Runs fake command given as first argument.'''
+    argv = sys.argv[1:] if argv == None else argv
+    cmds = {'sacct':sacct,'sbatch':sbatch}
+    if not argv or argv[0] not in cmds:
+        print(f'Usage: fake_slurm {{{",".join(cmds)}}} [args]',file=sys.stderr)
+        return 1
+    cmds[argv[0]](argv[1:])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
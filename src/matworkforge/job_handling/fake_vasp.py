@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fake VASP for running packed jobs offline. Waits, then writes a short OUTCAR (iterations, energy, Fermi energy &
+timing marker, enough for status & energies) and copies POSCAR to CONTCAR.
+A calculation fails if its directory has a FAKE_VASP_ERROR file: its text (e.g. "ZBRENT: fatal error") is written
+to OUTCAR & fake VASP exits with code 1.
+Usage: WF_VASP_CMD="python -m matworkforge.job_handling.fake_vasp -n {cores}" wf submit --pack 4
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import os
+import sys
+import time
+import shutil
+import argparse
+
+#define functions
+def fake_outcar(ranks,energy):
+    '''Gets text of fake OUTCAR.'''
+    return (f' running on {ranks:4d} total cores\n'
+            '--------------------------------------- Iteration      1(   1)  ---------------------------------------\n'
+            f'  free  energy   TOTEN  =      {energy:.8f} eV\n'
+            ' E-fermi :   0.0000     XC(G=0):  0.0000     alpha+bet :  0.0000\n'
+            ' Fermi energy:        0.0000000000\n'
+            ' reached required accuracy - stopping structural energy minimisation\n'
+            ' General timing and accounting informations for this job:\n')
+
+def main(argv=None):
+    '''Runs fake calculation in current directory.'''
+    parser = argparse.ArgumentParser(prog='fake_vasp')
+    parser.add_argument('-n','--ranks',type=int,default=1)
+    parser.add_argument('-t','--time',type=float,default=float(os.getenv('WF_FAKE_VASP_TIME',1)))
+    opts = parser.parse_args(argv)
+    print(f'fake VASP running on {opts.ranks} ranks in {os.getcwd()}',flush=True)
+    time.sleep(opts.time)
+    if os.path.exists('FAKE_VASP_ERROR'):
+        with open('FAKE_VASP_ERROR','r') as f:
+            error = f.read()
+        with open('OUTCAR','w') as f:
+            f.write(f' running on {opts.ranks:4d} total cores\n{error}\n')
+        return 1
+    with open('OUTCAR','w') as f:
+        f.write(fake_outcar(opts.ranks,-100.0))
+    if os.path.exists('POSCAR'):
+        shutil.copy('POSCAR','CONTCAR')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
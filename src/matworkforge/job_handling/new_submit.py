@@ -6,40 +6,69 @@ Author: Dorothea Fennell
 Changelog:
     6-24-26: File created, comments added
     6-25-26: Command finished.
+    10-18-26: Updated to use calculation index instead of walking tree for each calc type.
+    10-18-26: Added array option to submit all calculations as one SLURM job array.
+    10-18-26: Added pack option to run several calculations in each allocation.
+    10-18-26: Added chain option to submit PDOS & band structure stages that run after their relaxation.
+    10-18-26: Arrays split into jobs of at most max_array_size tasks.
+    10-18-26: Single jobs also submitted through Submitter.
 """
 #import 
 import os
 import shutil
-import subprocess as sp
 from rich import print
 from .preflight import check_inputs
+from ..utils.calc_index import get_index
+from .submitter import Submitter
+from .array_jobs import submit_array, MAX_ARRAY_SIZE
+from .packer import submit_pack
+from .pipeline import parse_stages, submit_chain
 #define funcs
-def get_dirs(base_dir,calc_type):
+def get_dirs(base_dir,calc_type,index=None):
     '''Gets list of directories.'''
-    calc_dirs = []
-    for root,dirs,files in os.walk(base_dir):
-        if root.endswith(calc_type):
-            calc_dirs.append(root)
+    if index == None:
+        index = get_index(base_dir)
+    calc_dirs = index.find(suffix=calc_type)
     return calc_dirs
 
-def submit_calcs(calc_type,force=False,skip_preflight=False):
-    '''Submits calculations.'''
+def submit_calcs(calc_type,force=False,skip_preflight=False,array=False,max_running=20,pack=0,cores=None,chain=None,k=20,max_array_size=MAX_ARRAY_SIZE):
+    '''
+    Submits calculations. If array is True, submits job arrays of at most max_array_size calculations, each running
+    at most max_running calculations at once.
+    If pack > 0, submits jobs that each run pack calculations on cores cores each.
+    chain is comma-separated list of stages (pdos, bands) submitted to run after each relaxation finishes.
+    '''
+    #get follow-up stages
+    stages = []
+    if chain != None:
+        if calc_type == 'PDOS':
+            print('[yellow3]Pipeline stages can only follow relaxations, ignoring chain.[/]')
+        else:
+            try:
+                stages = parse_stages(chain)
+            except ValueError as e:
+                print(f'[red1]Error:[/] {e}')
+                return
+    if array == True and max_array_size < 1:
+        print('[red1]Error:[/] max_array_size must be at least 1.')
+        return
     #get dirs
     base_dir = os.getcwd()
+    index = get_index(base_dir)
     if calc_type == 'all':
         all_dirs = []
         calcs = ['VASP_inputs','_Removed','_Added']
         for calc in calcs:
-            calc_dirs = get_dirs(base_dir,calc)
+            calc_dirs = get_dirs(base_dir,calc,index)
             all_dirs.extend(calc_dirs)
     else:
-        all_dirs = get_dirs(base_dir,calc_type)
+        all_dirs = get_dirs(base_dir,calc_type,index)
     #check if calculation has been run
     not_run = all_dirs.copy()
     if force != True:
         for d in all_dirs:
             name = d.replace(f'{base_dir}','.')
-            if 'OUTCAR' in os.listdir(d):
+            if index.has_file(d,'OUTCAR'):
                 print(f'Skipping {name}, calculation has already been run.')
                 not_run.remove(d)
     
@@ -68,17 +97,42 @@ def submit_calcs(calc_type,force=False,skip_preflight=False):
     fullpath = os.path.join(filedir, 'vasp.sh')
     shutil.copy(fullpath, base_dir)
     
+    #vasp.sh in each directory is also used to resubmit single array tasks
     for d in chk_passed:
         sh_path = os.path.join(base_dir,'vasp.sh')
         if os.path.exists(f'{d}/vasp.sh'):
             pass
         else:
             shutil.copy(sh_path,d)
-        
-        print(f'Submitting calculation in {d}...')
-        os.chdir(d)
-        sp.run(['sbatch','vasp.sh'], check=True)
-        os.chdir(base_dir)
+    
+    #job ID each directory's follow-up stages wait for
+    parents = {}
+    submitter = Submitter()
+    if array == True:
+        print(f'Submitting {len(chk_passed)} calculations as job array...')
+        jids = submit_array(base_dir,chk_passed,submitter,max_running,max_size=max_array_size)
+        for n, jid in enumerate(jids):
+            start = n*max_array_size
+            print(f'Submitted array job {jid} (tasks 0-{len(chk_passed[start:start+max_array_size])-1}).')
+        parents = {d:f'{jids[i//max_array_size]}_{i%max_array_size}' for i, d in enumerate(chk_passed)}
+    elif pack > 0:
+        print(f'Submitting {len(chk_passed)} calculations in packed jobs of {pack}...')
+        jids = submit_pack(base_dir,chk_passed,submitter,pack,cores)
+        print(f'Submitted {len(jids)} packed jobs: {", ".join(jids)}.')
+        parents = {d:jids[i//pack] for i, d in enumerate(chk_passed)}
+    elif stages:
+        for d in chk_passed:
+            print(f'Submitting calculation in {d}...')
+            parents[d] = submitter.submit(d,parsable=True)
+            print(f'Submitted batch job {parents[d]}')
+    else:
+        for d in chk_passed:
+            print(f'Submitting calculation in {d}...')
+            submitter.submit(d)
+    
+    if stages:
+        n = submit_chain(base_dir,parents,stages,submitter,k)
+        print(f'Submitted {n} follow-up jobs ({", ".join(stages)}).')
     
     print('All jobs submitted.')
     
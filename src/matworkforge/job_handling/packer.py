@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Node packing for small calculations. Ready directories are grouped N at a time into one allocation, where a worker
+scheduler runs them on subsets of the allocated cores & starts the next directory as soon as one finishes.
+Each directory gets slurm-<jid>.out (VASP stderr) & .wf-pack (its state in the packed job), so status & check see the
+state of each calculation instead of the state of the whole allocation. The worker exits 0 even if some calculations
+failed, so one failure doesn't block the chained stages of the other directories in the job.
+The VASP launch command can be replaced by setting WF_VASP_CMD, e.g. to the fake VASP in fake_vasp.py:
+    WF_VASP_CMD="python -m matworkforge.job_handling.fake_vasp -n {cores}" python -m matworkforge.job_handling.packer <manifest>
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Worker exits 0 when calculations fail, their state is in .wf-pack.
+"""
+#import modules
+import os
+import re
+import sys
+import json
+import shlex
+import argparse
+import subprocess as sp
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from .array_jobs import write_manifest, read_manifest, record_array, job_header
+
+#state file of directory in packed job
+PACK_FILE = '.wf-pack'
+#launch command for one calculation, {cores} & {vasp} are filled in by the worker
+VASP_CMD = 'srun --exact -N 1 -n {cores} {vasp}'
+LAUNCHER = re.compile(r'^\s*(srun|mpirun|mpiexec)\b')
+VASP_EXE = re.compile(r'\bvasp_(std|gam|ncl)\b')
+
+#define functions
+def write_pack_state(calc_dir,jid,state,exit_code=None):
+    '''Writes state of directory in packed job.'''
+    path = os.path.join(calc_dir,PACK_FILE)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp,'w') as f:
+        json.dump({'JobID':str(jid),'State':state,'ExitCode':exit_code},f)
+    os.replace(tmp,path)
+
+def read_pack_state(calc_dir):
+    '''Reads state of directory in packed job. Returns None if directory wasn't run in a packed job.'''
+    try:
+        with open(os.path.join(calc_dir,PACK_FILE),'r') as f:
+            return json.load(f)
+    except (OSError,ValueError):
+        return None
+
+def pack_script(vasp_sh,manifest,cores=None):
+    '''
+    Writes packed job script next to manifest from vasp.sh. The #SBATCH options & environment setup of vasp.sh are
+    kept, and the line launching VASP is replaced by the packing worker. Returns path of script.
+    '''
+    array_dir = os.path.dirname(manifest)
+    keep, commands = job_header(vasp_sh,f'{array_dir}/slurm-%j.out')
+    vasp = 'vasp_std'
+    setup = []
+    for l in commands:
+        if LAUNCHER.match(l):
+            exe = VASP_EXE.search(l)
+            if exe != None:
+                vasp = exe.group()
+            continue
+        if l.strip() == 'exit':
+            continue
+        setup.append(l)
+    while setup and not setup[-1].strip():
+        setup.pop()
+    worker = [sys.executable,'-m',__name__,manifest,'--vasp',vasp]
+    if cores != None:
+        worker += ['--cores',str(cores)]
+    script = os.path.join(array_dir,os.path.basename(manifest).replace('manifest-','pack-').replace('.txt','.sh'))
+    with open(script,'w') as f:
+        f.write(''.join(keep + ['\n'] + setup + ['\n',shlex.join(worker) + '\n']))
+    return script
+
+def submit_pack(base_dir,dirs,submitter,pack_size,cores=None,vasp_sh='vasp.sh'):
+    '''Submits dirs as packed jobs of pack_size directories, using cores per calculation. Returns list of job IDs.'''
+    jids = []
+    for i in range(0,len(dirs),pack_size):
+        manifest = write_manifest(base_dir,dirs[i:i+pack_size])
+        script = pack_script(os.path.join(base_dir,vasp_sh),manifest,cores)
+        jid = submitter.submit(base_dir,script,parsable=True)
+        record_array(base_dir,jid,manifest)
+        jids.append(jid)
+    return jids
+
+def run_calc(calc_dir,jid,cmd):
+    '''Runs one calculation in calc_dir, writing its state before & after. Returns exit code.'''
+    write_pack_state(calc_dir,jid,'RUNNING')
+    with open(os.path.join(calc_dir,'vasp.out'),'w') as out, open(os.path.join(calc_dir,f'slurm-{jid}.out'),'a') as err:
+        try:
+            rc = sp.run(cmd,cwd=calc_dir,stdout=out,stderr=err).returncode
+        except OSError as e:
+            err.write(f'{e}\n')
+            rc = 127
+        if rc != 0:
+            err.write(f'Exited with exit code {rc}\n')
+    write_pack_state(calc_dir,jid,'COMPLETED' if rc == 0 else 'FAILED',rc)
+    return rc
+
+def run_pack(manifest,cores=None,vasp='vasp_std'):
+    '''
+    Runs all directories in manifest inside the current allocation, total cores // cores at a time.
+    If cores isn't given, all directories run at once on an equal share of the cores. Returns number of failed calculations.
+    '''
+    dirs = read_manifest(manifest)
+    jid = os.getenv('SLURM_JOB_ID','local')
+    total = int(os.getenv('SLURM_NTASKS',os.cpu_count()))
+    if cores == None:
+        cores = max(1,total//len(dirs))
+    slots = max(1,min(len(dirs),total//cores))
+    cmd = shlex.split(os.getenv('WF_VASP_CMD',VASP_CMD).format(cores=cores,vasp=vasp))
+    #mark all directories, so status shows them as pending until they start
+    for d in dirs:
+        open(os.path.join(d,f'slurm-{jid}.out'),'w').close()
+        write_pack_state(d,jid,'PENDING')
+    print(f'Running {len(dirs)} calculations, {slots} at a time on {cores} cores each.',flush=True)
+    with ThreadPoolExecutor(max_workers=slots) as pool:
+        codes = list(pool.map(partial(run_calc,jid=jid,cmd=cmd),dirs))
+    failed = [d for d, rc in zip(dirs,codes) if rc != 0]
+    for d in failed:
+        print(f'Calculation in {d} failed.')
+    print(f'{len(dirs)-len(failed)} of {len(dirs)} calculations completed.')
+    return len(failed)
+
+def main(argv=None):
+    '''Runs packing worker. Exits 0 unless the worker itself fails, failed calculations are recorded in .wf-pack.'''
+    parser = argparse.ArgumentParser(prog='packer')
+    parser.add_argument('manifest')
+    parser.add_argument('--cores',type=int,default=None)
+    parser.add_argument('--vasp',default='vasp_std')
+    opts = parser.parse_args(argv)
+    run_pack(opts.manifest,opts.cores,opts.vasp)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
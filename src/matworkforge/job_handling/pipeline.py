@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dependency-chained pipelines (relaxation -> PDOS, band structure). Follow-up stages are submitted with
+--dependency=afterok on their relaxation job & --kill-on-invalid-dep=yes, so stages of failed relaxations are removed
+from the queue. Each stage job first runs this module as a post-job hook, which checks the relaxation's state in its
+packed job (packed jobs finish successfully even if some of their calculations failed) & the CONTCAR, and sets up the
+stage's inputs, then runs the commands of vasp.sh, so no manual steps are needed in between.
+Usage inside a job: python -m matworkforge.job_handling.pipeline <stage> <relaxation dir> <base dir> [--k K] [--parent-job JID]
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Stages submitted with --kill-on-invalid-dep=yes. Hook checks .wf-pack state of relaxations run in packed jobs.
+"""
+#import modules
+import os
+import sys
+import shlex
+import argparse
+from .array_jobs import job_header
+from .packer import read_pack_state
+from ..pdos.createPDOS import create_pdos
+from ..pdos.pdos_INCARmod import modify_incar
+from ..gen_wf.bands_input import create_bands, get_incar_params
+
+#stage: directory created in relaxation directory
+STAGES = {'pdos':'PDOS','bands':'Band_struc'}
+
+#define functions
+def parse_stages(chain):
+    '''Parses comma-separated list of stages. Raises ValueError for unknown stages.'''
+    stages = [s.strip().lower() for s in chain.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError(f'Unknown pipeline stage(s): {", ".join(unknown)}. Options: {", ".join(STAGES)}')
+    return stages
+
+def setup_stage(stage,parent_dir,base_dir,k=20,parent_jid=None):
+    '''
+    Sets up inputs of stage from finished relaxation in parent_dir. If the relaxation ran in packed job parent_jid,
+    raises ValueError unless it completed. Returns stage directory.
+    '''
+    stage_dir = os.path.join(parent_dir,STAGES[stage])
+    pack = read_pack_state(parent_dir)
+    if parent_jid != None and pack != None and pack['JobID'] == str(parent_jid) and pack['State'] != 'COMPLETED':
+        raise ValueError(f'relaxation {pack["State"].lower()} in packed job {parent_jid} (exit code {pack["ExitCode"]})')
+    if not os.path.exists(os.path.join(parent_dir,'CONTCAR')):
+        raise FileNotFoundError(f'CONTCAR not found in {parent_dir}')
+    if stage == 'pdos':
+        #create_pdos checks CONTCAR
+        create_pdos(parent_dir,base_dir)
+        modify_incar(os.path.join(stage_dir,'INCAR'),os.path.join(stage_dir,'PDOS_INCAR.txt'))
+    elif stage == 'bands':
+        create_bands(parent_dir,base_dir,get_incar_params(),k)
+    return stage_dir
+
+def stage_script(stage,parent_dir,base_dir,k=20,vasp_sh='vasp.sh',parent_jid=None):
+    '''
+    Writes job script of stage into stage directory from parent's vasp.sh: the hook sets up the stage's inputs, then
+    the commands of vasp.sh run in the stage directory. parent_jid is the job the relaxation runs in. Returns path of script.
+    '''
+    stage_dir = os.path.join(parent_dir,STAGES[stage])
+    os.makedirs(stage_dir,exist_ok=True)
+    keep, commands = job_header(os.path.join(parent_dir,vasp_sh),'slurm-%j.out')
+    hook = [sys.executable,'-m',__name__,stage,os.path.abspath(parent_dir),os.path.abspath(base_dir),'--k',str(k)]
+    if parent_jid != None:
+        hook += ['--parent-job',str(parent_jid)]
+    script = os.path.join(stage_dir,f'wf-{stage}.sh')
+    with open(script,'w') as f:
+        f.write(''.join(keep + ['\n#set up inputs from relaxation\n',f'{shlex.join(hook)} || exit 1\n','\n'] + commands))
+    return script
+
+def submit_chain(base_dir,parents,stages,submitter,k=20):
+    '''
+    Submits stages for each relaxation, parents is dict of relaxation dir: job ID. Each stage job waits for its
+    relaxation to finish successfully (afterok) & is removed from the queue if it can't. Returns number of jobs submitted.
+    '''
+    n = 0
+    for parent_dir, jid in parents.items():
+        for stage in stages:
+            script = stage_script(stage,parent_dir,base_dir,k,parent_jid=jid)
+            stage_dir = os.path.dirname(script)
+            args = [f'--dependency=afterok:{jid}','--kill-on-invalid-dep=yes']
+            stage_jid = submitter.submit(stage_dir,os.path.basename(script),args=args,parsable=True)
+            print(f'Submitted {stage} job {stage_jid} in {stage_dir}, after job {jid}.')
+            n += 1
+    return n
+
+def main(argv=None):
+    '''Runs post-job hook.'''
+    parser = argparse.ArgumentParser(prog='pipeline')
+    parser.add_argument('stage',choices=list(STAGES))
+    parser.add_argument('parent_dir')
+    parser.add_argument('base_dir')
+    parser.add_argument('--k',type=int,default=20)
+    parser.add_argument('--parent-job',default=None)
+    opts = parser.parse_args(argv)
+    try:
+        setup_stage(opts.stage,opts.parent_dir,opts.base_dir,opts.k,opts.parent_job)
+    except (OSError,ValueError) as e:
+        print(f'Error setting up {opts.stage} in {opts.parent_dir}: {e}',file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,7 @@ Author: Dorothea Fennell
 Changelog:
     6-23-26: File created, comments added
     6-24-26: Command finished, added Rich for printing.
+    10-18-26: Updated get_dirs to use calculation index.
 """
 #import modules
 import os
@@ -14,14 +15,12 @@ import pandas as pd
 from rich import print as rprint
 from pymatgen.io.vasp.inputs import Poscar, Incar, Kpoints, Potcar
 from tabulate import TableFormat,Line,DataRow
+from ..utils.calc_index import get_index
 #def functions
 def get_dirs(base_dir):
     '''Gets list of calculation directories.'''
-    calc_dirs = []
-    for root, dirs, files in os.walk(base_dir):
-        dir_names = ('VASP_inputs','_Added','_Removed','PDOS')
-        if root.endswith((dir_names)):
-            calc_dirs.append(root)
+    dir_names = ('VASP_inputs','_Added','_Removed','PDOS')
+    calc_dirs = get_index(base_dir).find(suffix=dir_names)
     return calc_dirs
 
 def check_inputs(base_dir,calc_dir):
@@ -70,13 +69,6 @@ def print_preflight():
     base_dir = os.getcwd()
     #get dirs
     calc_dirs = get_dirs(base_dir)
-    def sort_dirs(data):
-        path_list = data.split('/')
-        for p in path_list:
-            if p.startswith('Modification_'):
-                num = p.split('_')[1]
-                return int(num)
-    calc_dirs.sort(key=sort_dirs)
     #get errors
     err_list = []
     for calc in calc_dirs:
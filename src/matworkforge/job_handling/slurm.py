@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched SLURM state lookup shared by StatusCheck and ErrorHandler.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Pending array tasks are mapped back to their directories with the array job manifests.
+    10-18-26: Directories run in packed jobs get their own state from the packing worker.
+"""
+#import modules
+import os
+import shlex
+import subprocess as sp
+from .array_jobs import get_arrays, task_dirs
+from .packer import read_pack_state
+
+#define functions
+def get_jid(slurm_file):
+    '''Gets job ID from slurm output file name (slurm-<jid>.out).'''
+    filename = os.path.basename(slurm_file)
+    jid = filename.split('-')[1].split('.')[0]
+    return jid
+
+def latest_slurm_file(calc_dir,files):
+    '''Gets latest slurm output file from list of file names in directory. Returns None if there isn't one.'''
+    slurm_files = sorted(f for f in files if f.startswith('slurm-'))
+    if not slurm_files:
+        return None
+    return os.path.join(calc_dir,slurm_files[-1])
+
+def pack_state(job_state,pack):
+    '''
+    Combines state of packed job with state of one of its directories. Finished directories keep their own state,
+    directories still waiting or running take the job's state once the job has stopped (e.g. Timeout).
+    '''
+    state = pack['State'].title()
+    if state in ('Completed','Failed') or job_state == 'Running':
+        return state
+    if state == 'Pending':
+        return 'Not run'
+    return job_state
+
+def norm_state(state):
+    '''Converts sacct state to title case, dropping "by <uid>" and truncation markers.'''
+    state = state.strip()
+    if not state:
+        return 'Unknown'
+    return state.split()[0].rstrip('+').title()
+
+#define class
+class SlurmLookup:
+    '''
+    Looks up job states for a whole directory tree with one bulk sacct call for all job IDs and
+    one call for pending jobs, instead of one sacct call per calculation directory.
+    The sacct command can be replaced by setting WF_SACCT, e.g. to the fake sacct in fake_slurm.py.
+    '''
+    def __init__(self):
+        '''Initialize lookup.'''
+        self.sacct = shlex.split(os.getenv('WF_SACCT','sacct'))
+        self.chunk_size = 500
+        self.states = {}
+        self.pending = None
+        self.arrays = {}
+
+    def load_arrays(self,base_dir):
+        '''Loads manifests of array jobs submitted from base_dir, so pending array tasks map to their directories.'''
+        self.arrays = get_arrays(base_dir)
+
+    def __run(self,args):
+        '''Runs sacct and returns list of parsed lines.'''
+        try:
+            out = sp.check_output(self.sacct + args,stderr=sp.DEVNULL,text=True)
+        except (OSError,sp.CalledProcessError):
+            return []
+        return [l.split('|') for l in out.splitlines() if l.strip()]
+
+    def query(self,job_ids):
+        '''Gets states of all job IDs with as few sacct calls as possible.'''
+        job_ids = sorted({j for j in job_ids if j not in self.states})
+        for i in range(0,len(job_ids),self.chunk_size):
+            chunk = job_ids[i:i+self.chunk_size]
+            for line in self.__run(['-n','-P','-X','-o','JobID,State','-j',','.join(chunk)]):
+                if len(line) >= 2:
+                    self.states[line[0].strip()] = norm_state(line[1])
+            #jobs sacct doesn't know about
+            for jid in chunk:
+                self.states.setdefault(jid,'Unknown')
+
+    def query_pending(self):
+        '''Gets working directories of all pending jobs.'''
+        self.pending = set()
+        for line in self.__run(['-n','-P','-X','-s','pending','-o','JobID,State,WorkDir']):
+            if len(line) >= 3:
+                self.pending.add(os.path.normpath(line[2].strip()))
+                #array tasks run in base directory until they start, so use manifest
+                for d in task_dirs(self.arrays,line[0].strip()):
+                    self.pending.add(os.path.normpath(d))
+
+    def load(self,slurm_files):
+        '''Loads states for list of latest slurm files (None if directory has none).'''
+        self.query([get_jid(f) for f in slurm_files if f != None])
+        if None in slurm_files and self.pending == None:
+            self.query_pending()
+
+    def state(self,calc_dir,latest_file):
+        '''Gets state of calculation from latest slurm file, or from pending jobs if there is no slurm file.'''
+        if latest_file != None:
+            jid = get_jid(latest_file)
+            if jid not in self.states:
+                self.query([jid])
+            state = self.states[jid]
+            pack = read_pack_state(calc_dir)
+            if pack != None and pack['JobID'] == jid:
+                state = pack_state(state,pack)
+        else:
+            if self.pending == None:
+                self.query_pending()
+            if os.path.normpath(calc_dir) in self.pending:
+                state = 'Pending'
+            else:
+                state = 'Not run'
+        return state
@@ -6,55 +6,36 @@ Author: Dorothea Fennell
 Changelog: 
     6-18-26: Created, comments added.
     6-22-26: Finished StatusCheck class, added command to wf. 
+    10-18-26: Updated to get directories & files from calculation index. SLURM states are looked up in bulk with SlurmLookup.
+              vasp_msgs moved to vasp_msgs.py, OUTCAR checked for all messages in one streaming pass.
+              Convergence checked from INCAR & end of OUTCAR instead of parsing vasprun.xml.
+    10-18-26: Pending tasks of array jobs are mapped to their directories.
 """
 #import
 import os
-import warnings
 import pandas as pd
-import subprocess as sp
 from typing import ClassVar
-from pymatgen.io.vasp.outputs import Vasprun
 from tabulate import TableFormat,Line,DataRow
+from ..utils.calc_index import get_index
+from .slurm import SlurmLookup
+from .vasp_msgs import VASP_MSGS
+from pymatgen.io.vasp.inputs import Incar
+from ..utils.outcar_reader import scan_errors, convergence
 #define class
 class StatusCheck:
     '''Custom class to check status of calculations. Separate from ErrorHandler.'''
-    vasp_msgs: ClassVar = {
-        "tet": ["Tetrahedron method fails","tetrahedron method fails","Routine TETIRR needs special values","Tetrahedron method fails (number of k-points < 4)",],
-        "ksymm": ["Fatal error detecting k-mesh","Fatal error: unable to match k-point",],
-        "inv_rot_mat": ["rotation matrix was not found (increase SYMPREC)"],
-        "brions": ["BRIONS problems: POTIM should be increased"],
-        "pricel": ["internal error in subroutine PRICEL"],
-        "zbrent": ["ZBRENT: fatal internal in", "ZBRENT: fatal error in bracketing","ZBRENT: fatal error: bracketing interval incorrect"],
-        "pssyevx": ["ERROR in subspace rotation PSSYEVX"],
-        "pdsyevx": ["ERROR in subspace rotation PDSYEVX"],
-        "edddav": ["Error EDDDAV: Call to ZHEGV failed"],
-        "zheev": ["ERROR EDDIAG: Call to routine ZHEEV failed!"],
-        "eddiag": ["ERROR in EDDIAG: call to ZHEEV/ZHEEVX/DSYEV/DSYEVX failed"],
-        "rhosyg": ["RHOSYG"],
-        "posmap": ["POSMAP"],
-        "point_group": ["group operation missing"],
-        "pricelv": ["PRICELV: current lattice and primitive lattice are incommensurate"],
-        "symprec_noise": ["determination of the symmetry of your systems shows a strong"],
-        "bravais": ["Inconsistent Bravais lattice"],
-        "hnform": ["HNFORM: k-point generating"],
-        "set_core_wf": ["internal error in SET_CORE_WF"],
-        "read_error": ["Error reading item", "Error code was IERR= 5"],
-        "ibzkpt": ["not all point group operations"],
-        "fexcf": ["supplied exchange-correlation table"],
-        "spin_polarized_harris": ["Spin polarized Harris functional dynamics is a good joke"],
-        }
+    vasp_msgs: ClassVar = VASP_MSGS
     
     def __init__(self):
         '''Initialize StatusCheck.'''
         self.vasp_errors = dict(StatusCheck.vasp_msgs)
+        self.slurm = SlurmLookup()
     
     def __get_calc_dirs(self,base_dir):
         '''Gets list of calculation directories.'''
-        calc_dirs = []
-        for root,dirs,files in os.walk(base_dir):
-            fileset = set(files)
-            if {"POSCAR","INCAR"}.issubset(fileset):
-                calc_dirs.append(root)
+        self.index = get_index(base_dir)
+        self.slurm.load_arrays(base_dir)
+        calc_dirs = self.index.find(has=('POSCAR','INCAR'))
         
         return calc_dirs
     
@@ -81,7 +62,7 @@ class StatusCheck:
     
     def __get_outcar(self,calc_dir):
         '''Finds OUTCAR'''
-        files = os.listdir(calc_dir)
+        files = self.index.files(calc_dir)
         if 'OUTCAR' in files:
             file = f'{calc_dir}/OUTCAR'
             return file
@@ -90,7 +71,7 @@ class StatusCheck:
     
     def __get_slurm_file(self,calc_dir):
         slurm_files=[]
-        for file in os.listdir(calc_dir):
+        for file in self.index.files(calc_dir):
             if file.startswith('slurm-'):
                 slurm_files.append(os.path.join(calc_dir,file))
 
@@ -102,47 +83,32 @@ class StatusCheck:
         return latest_file
     
     def __get_slurm_status(self,calc_dir,latest_file):
-        if latest_file != None:
-            filename = os.path.basename(latest_file)
-            jid = filename.split('-')[1].split('.')[0]
-            try:
-                codes = sp.check_output(['sacct','-n','-j',f'{jid}','-o','State'],stderr=sp.DEVNULL,text=True)
-            except:
-                pass
-        
-            if codes:
-                job_state = codes.split('\n')[0].strip()
-                state = job_state.title()
-        else:
-            pend_chk = sp.check_output(['sacct','-n','-s','pending','-o','State,WorkDir%500'],stderr=sp.DEVNULL,text=True)
-            if pend_chk:
-                jobs = pend_chk.split('\n')
-                for j in jobs:
-                    j = j.strip()
-                    if calc_dir in j:
-                        state = 'Pending'
-            else:
-                state = 'Not run'
+        state = self.slurm.state(calc_dir,latest_file)
         return state
     
+    def __get_convergence(self,calc_dir,outcar):
+        '''Checks convergence from NELM & NSW in INCAR and last iteration in OUTCAR. Returns (electronic, ionic).'''
+        try:
+            incar = Incar.from_file(f'{calc_dir}/INCAR')
+        except Exception:
+            incar = {}
+        nelm = int(incar.get('NELM',60))
+        nsw = int(incar.get('NSW',0))
+        return convergence(outcar,nelm,nsw)
+
     def get_status(self,base_dir):
         '''Prints status of all calculations in directory tree.'''
         #get dirs
         calc_dirs = self.__get_calc_dirs(base_dir)
-        def sort_dirs(data):
-            path_list = data.split('/')
-            for p in path_list:
-                if p.startswith('Modification_'):
-                    num = p.split('_')[1]
-                    return int(num)
-        calc_dirs.sort(key=sort_dirs)
+        #get slurm files & look up all job states at once
+        slurm_files = [self.__get_slurm_file(calc) for calc in calc_dirs]
+        self.slurm.load(slurm_files)
         #get status
         calc_list = []
-        for calc in calc_dirs:
+        for calc,latest_file in zip(calc_dirs,slurm_files):
             #get mod, dir & type
             mod,calc_type = self.__get_calc_type(calc)
-            #get slurm file & outcar
-            latest_file = self.__get_slurm_file(calc)
+            #get outcar
             outcar = self.__get_outcar(calc)
             #check slurm status
             state = self.__get_slurm_status(calc, latest_file)
@@ -150,25 +116,22 @@ class StatusCheck:
             errors = set()
             if state.lower() == 'failed':
                 if outcar != None:
-                    with open(outcar,'rt') as file:
-                        try:
-                            text = file.read()
-                        except:
-                            errors.add('OUTCAR not read')
-                        else:
-                            #check for vasp errors
-                            for err in self.vasp_errors:
-                                for msg in self.vasp_errors[err]:
-                                    if text.find(msg) != -1:
-                                        errors.add(err)
+                    #check for vasp errors
+                    try:
+                        errors |= scan_errors(outcar,self.vasp_errors)
+                    except OSError:
+                        errors.add('OUTCAR not read')
                 elif outcar == None:
                     errors.add('OUTCAR not found')
             elif state.lower() == 'completed':
-                with warnings.catch_warnings():
-                    warnings.simplefilter('ignore')
-                    vpr = Vasprun(f'{calc}/vasprun.xml')
-                ion_con = vpr.converged_ionic
-                elec_con = vpr.converged_electronic
+                con = None
+                if outcar != None:
+                    con = self.__get_convergence(calc,outcar)
+                if con == None:
+                    errors.add('OUTCAR not found' if outcar == None else 'OUTCAR not read')
+                    elec_con, ion_con = None, None
+                else:
+                    elec_con, ion_con = con
                 if elec_con == False:
                     if ion_con == False:
                         errors.add('Not electronically or ionically converged')
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rate-limited job submitter. All sbatch calls go through one Submitter so the scheduler isn't flooded.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Added extra sbatch arguments & parsable submission for array jobs.
+"""
+#import modules
+import os
+import time
+import shlex
+import subprocess as sp
+
+#define class
+class Submitter:
+    '''
+    Submits jobs one at a time, waiting at least min_interval seconds between sbatch calls.
+    The sbatch command can be replaced by setting WF_SBATCH, and the interval by setting WF_SUBMIT_INTERVAL.
+    '''
+    def __init__(self,min_interval=None):
+        '''Initialize submitter.'''
+        self.sbatch = shlex.split(os.getenv('WF_SBATCH','sbatch'))
+        if min_interval == None:
+            min_interval = float(os.getenv('WF_SUBMIT_INTERVAL',0.5))
+        self.min_interval = min_interval
+        self.last = None
+
+    def submit(self,dirname,script='vasp.sh',args=(),parsable=False):
+        '''Submits script from dirname with extra sbatch args. If parsable is True, returns job ID.'''
+        if self.last != None:
+            wait = self.min_interval - (time.monotonic() - self.last)
+            if wait > 0:
+                time.sleep(wait)
+        try:
+            if parsable == True:
+                out = sp.run(self.sbatch + ['--parsable',*args,script],cwd=dirname,check=True,capture_output=True,text=True).stdout
+                #--parsable prints jid or jid;cluster
+                return out.strip().split(';')[0]
+            sp.run(self.sbatch + [*args,script],cwd=dirname,check=True)
+        finally:
+            self.last = time.monotonic()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VASP error messages checked by ErrorHandler and StatusCheck.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created. Moved duplicate vasp_msgs dicts from ErrorHandler & StatusCheck here.
+"""
+#define error messages
+VASP_MSGS = {
+    "tet": ["Tetrahedron method fails","tetrahedron method fails","Routine TETIRR needs special values","Tetrahedron method fails (number of k-points < 4)",],
+    "ksymm": ["Fatal error detecting k-mesh","Fatal error: unable to match k-point",],
+    "inv_rot_mat": ["rotation matrix was not found (increase SYMPREC)"],
+    "brions": ["BRIONS problems: POTIM should be increased"],
+    "pricel": ["internal error in subroutine PRICEL"],
+    "zbrent": ["ZBRENT: fatal internal in", "ZBRENT: fatal error in bracketing","ZBRENT: fatal error: bracketing interval incorrect"],
+    "pssyevx": ["ERROR in subspace rotation PSSYEVX"],
+    "pdsyevx": ["ERROR in subspace rotation PDSYEVX"],
+    "edddav": ["Error EDDDAV: Call to ZHEGV failed"],
+    "zheev": ["ERROR EDDIAG: Call to routine ZHEEV failed!"],
+    "eddiag": ["ERROR in EDDIAG: call to ZHEEV/ZHEEVX/DSYEV/DSYEVX failed"],
+    "rhosyg": ["RHOSYG"],
+    "posmap": ["POSMAP"],
+    "point_group": ["group operation missing"],
+    "pricelv": ["PRICELV: current lattice and primitive lattice are incommensurate"],
+    "symprec_noise": ["determination of the symmetry of your systems shows a strong"],
+    "bravais": ["Inconsistent Bravais lattice"],
+    "hnform": ["HNFORM: k-point generating"],
+    "set_core_wf": ["internal error in SET_CORE_WF"],
+    "read_error": ["Error reading item", "Error code was IERR= 5"],
+    "ibzkpt": ["not all point group operations"],
+    "fexcf": ["supplied exchange-correlation table"],
+    "spin_polarized_harris": ["Spin polarized Harris functional dynamics is a good joke"],
+    }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch daemon for continuous check, fix & resubmit. SLURM states of the whole tree are polled in bulk on an interval &
+only directories whose job state changed are checked, corrected & resubmitted. Finished PDOS calculations are parsed
+& integrated. Checks run on an asyncio event loop with at most jobs running at once, and the last handled state of
+each directory is saved to .wf-watch.json so a restarted watcher doesn't redo work.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Errors are caught per directory & left unhandled, so they're retried next poll instead of stopping the watcher.
+"""
+#import modules
+import os
+import json
+import time
+import asyncio
+from typing import ClassVar
+from rich import print
+from .err_handler import ErrorHandler
+from .slurm import SlurmLookup, latest_slurm_file
+from .submitter import Submitter
+from ..utils.calc_index import get_index
+from ..pdos.vasp_pdos import parse_dir
+from ..pdos.integrate_pdos import integrate_all_pdos
+from ..pdos.tot_int import get_all_data
+
+#define class
+class Watcher:
+    '''
+    Polls job states of all calculations in base_dir every interval seconds & handles directories whose
+    (latest slurm file, state) changed to a finished state. At most jobs directories are handled at once.
+    '''
+    state_file: ClassVar = '.wf-watch.json'
+    finished: ClassVar = ('completed','failed','timeout','cancelled','out_of_memory','node_fail')
+
+    def __init__(self,base_dir,interval=300,jobs=4,no_submit=False):
+        '''Initialize watcher and load saved state.'''
+        self.base_dir = os.path.abspath(base_dir)
+        self.interval = interval
+        self.jobs = jobs
+        self.no_submit = no_submit
+        self.submitter = Submitter()
+        self.slurm = None
+        self.seen = self.load()
+
+    def load(self):
+        '''Loads handled states from state file. Returns dict of dir: [slurm file, state].'''
+        try:
+            with open(os.path.join(self.base_dir,self.state_file),'r') as f:
+                return json.load(f)
+        except (OSError,ValueError):
+            return {}
+
+    def save(self):
+        '''Saves handled states to state file.'''
+        fullpath = os.path.join(self.base_dir,self.state_file)
+        tmp = f'{fullpath}.{os.getpid()}.tmp'
+        with open(tmp,'w') as f:
+            json.dump(self.seen,f,indent=1)
+        os.replace(tmp,fullpath)
+
+    def poll(self):
+        '''Looks up states of all calculations with slurm files in bulk. Returns dict of dir: [slurm file, state].'''
+        self.index = get_index(self.base_dir)
+        calc_dirs = self.index.find(has=('POSCAR','INCAR'))
+        slurm_files = [latest_slurm_file(d,self.index.files(d)) for d in calc_dirs]
+        #new lookup every poll, states are cached in SlurmLookup
+        self.slurm = SlurmLookup()
+        self.slurm.load([f for f in slurm_files if f != None])
+        states = {}
+        for d, f in zip(calc_dirs,slurm_files):
+            if f != None:
+                states[os.path.relpath(d,self.base_dir)] = [os.path.basename(f),self.slurm.state(d,f)]
+        return states
+
+    def check(self,calc_dir):
+        '''Checks & corrects one calculation. Runs in a worker thread. Returns handler, or None if there is no OUTCAR.'''
+        if not self.index.has_file(calc_dir,'OUTCAR'):
+            print(f'No OUTCAR in {calc_dir}, skipping check.')
+            return None
+        handler = ErrorHandler(self.slurm,self.submitter)
+        if handler.check(calc_dir) == True:
+            handler.correct(calc_dir)
+        else:
+            handler.errors = set()
+        return handler
+
+    async def handle(self,rel,key,sem,submit_lock):
+        '''
+        Handles directory whose state changed. Returns True if a PDOS calculation was parsed. If handling fails, the
+        error is printed & the directory isn't marked as handled, so it's retried next poll.
+        '''
+        calc_dir = os.path.join(self.base_dir,rel)
+        parsed = False
+        async with sem:
+            print(f'{rel}: {key[1]}')
+            try:
+                handler = await asyncio.to_thread(self.check,calc_dir)
+                if handler != None and handler.errors and self.no_submit == False:
+                    #one submission at a time, Submitter spaces out sbatch calls
+                    async with submit_lock:
+                        await asyncio.to_thread(handler.submit,calc_dir)
+                elif handler != None and not handler.errors and key[1].lower() == 'completed':
+                    if calc_dir.endswith('PDOS') and self.index.has_file(calc_dir,'DOSCAR'):
+                        parsed = await asyncio.to_thread(parse_dir,calc_dir)
+            except Exception as e:
+                print(f'[red1]Error handling {rel}:[/] {type(e).__name__}: {e} (retrying next poll)')
+                return False
+        #only saved once handled, so an interrupted watcher handles it again
+        self.seen[rel] = key
+        self.save()
+        return parsed
+
+    async def run_once(self):
+        '''Polls states once & handles changed directories. Returns number of directories handled.'''
+        states = await asyncio.to_thread(self.poll)
+        changed = {rel:key for rel, key in states.items() if key != self.seen.get(rel) and key[1].lower() in self.finished}
+        counts = {}
+        for _, state in states.values():
+            counts[state] = counts.get(state,0) + 1
+        summary = ', '.join(f'{n} {s.lower()}' for s, n in sorted(counts.items()))
+        print(f'[{time.strftime("%H:%M:%S")}] {summary or "no jobs"}. {len(changed)} changed.')
+        if not changed:
+            return 0
+        sem = asyncio.Semaphore(self.jobs)
+        submit_lock = asyncio.Lock()
+        parsed = await asyncio.gather(*(self.handle(rel,key,sem,submit_lock) for rel, key in changed.items()))
+        if any(parsed):
+            #integration & totals only redo changed directories
+            try:
+                await asyncio.to_thread(integrate_all_pdos,self.base_dir)
+                await asyncio.to_thread(get_all_data,self.base_dir)
+            except Exception as e:
+                print(f'[red1]Error integrating PDOS:[/] {type(e).__name__}: {e} (retrying when the next PDOS is parsed)')
+        return len(changed)
+
+    async def run(self,once=False):
+        '''Polls every interval seconds until interrupted, or once.'''
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                #e.g. sacct unavailable for a moment, poll again next interval
+                if once == True:
+                    raise
+                print(f'[red1]Error polling jobs:[/] {type(e).__name__}: {e}')
+            if once == True:
+                return
+            await asyncio.sleep(self.interval)
+
+#define function
+def watch(base_dir,interval=300,jobs=4,no_submit=False,once=False):
+    '''Watches calculations in base_dir, checking, fixing & resubmitting them as their jobs finish.'''
+    watcher = Watcher(base_dir,interval,jobs,no_submit)
+    if once == False:
+        print(f'Watching {watcher.base_dir} every {interval} s. Press Ctrl+C to stop.')
+    try:
+        asyncio.run(watcher.run(once))
+    except KeyboardInterrupt:
+        print('Stopped watching.')
@@ -5,46 +5,7 @@ import os
 from dotenv import load_dotenv
 
 from . import version
-
-from .structures.bulk_to_sc import create_structure
-from .structures.modifystructure import modify_structure
-from .structures.gen_random_mods import generate_mods_file
-from .structures.modify_heo import modify_without_sym
-from .structures.remove_pairs import process_vasp_inputs
-from .structures.remove_atoms import process_vasp_inputs_nosym
-from .structures.add_pairs import process_vasp_dirs
-from .structures.add_atoms import process_vasp_dirs_nosym
-
-from .inputs.MagMom_recursive import process_poscar_files
-from .inputs.POTCAR_cat import process_directories
-from .inputs.VASP_input import generate_vasp_inputs_in_dir
-from .inputs.modINCAR import update_incar_files_with_magmom
-from .inputs.removed_pairs_INCARmod import process_pairs_mod_dirs
-
-from .energies.get_e_pristine import get_all_e
-from .energies.Calc_Evac import process_e_vac
-from .energies.calc_Eads import process_e_ads
-
-from .pdos.createPDOS import process_vasp_inputs as pdos_vasp_inputs
-from .pdos.pdos_INCARmod import process_pdos_dirs
-from .pdos.vasp_pdos import process_pdos_dirs as parse_pdos_dirs
-from .pdos.integrate_pdos import integrate_all_pdos
-from .pdos.tot_int import get_all_data
-from .pdos.PDOS_plotter import plot_pdos
-
-from .job_handling.err_check import err_fix
-from .job_handling.status_check import print_status
-from .job_handling.preflight import print_preflight
-from .job_handling.new_submit import submit_calcs
-
-from .descriptors.get_descriptors import extract_desc
-
-from .charges.chg_diff import get_chgdiff
-
-from .utils.settings import read_settings
-from .utils.prepare import prepare_dir
-from .utils.wf_update import check_vrsn
-from .utils.initialize import init_settings
+#command modules are imported inside each command, so startup (--version, --help) only imports typer
 
 #load variables
 load_dotenv()
@@ -73,11 +34,17 @@ def generate(
     \nIf command line options are provided, workflow will bypass input sections for the provided information. 
     \n[bold]Note:[/] If using Materials Project, an API key [bold]MUST[/] be provided. 
     '''
+    from .structures.bulk_to_sc import create_structure
     create_structure(bulk,sc_size,miller,vacuum)
 
 @app.command(short_help='[cyan]Modify[/] structure.',rich_help_panel='Structure Gen & Modification')
 def modify():
     '''[cyan]Modify[/] structure based on user input. Needs Mods.txt '''
+    from .structures.modifystructure import modify_structure
+    from .inputs.MagMom_recursive import process_poscar_files
+    from .inputs.POTCAR_cat import process_directories
+    from .inputs.VASP_input import generate_vasp_inputs_in_dir
+    from .inputs.modINCAR import update_incar_files_with_magmom
     modify_structure(os.getcwd())
     process_poscar_files(mod=None,ignore_sym=False)
     process_directories(os.getenv('POT_PATH'), vac = False, add=False)
@@ -87,6 +54,12 @@ def modify():
 @app.command(short_help='Generate [cyan]HEO[/] structures.',rich_help_panel='Structure Gen & Modification')
 def heo():
     '''Generate random modifications for [cyan]HEO[/] structures based on user input, ignoring symmetry.'''
+    from .structures.gen_random_mods import generate_mods_file
+    from .structures.modify_heo import modify_without_sym
+    from .inputs.MagMom_recursive import process_poscar_files
+    from .inputs.POTCAR_cat import process_directories
+    from .inputs.VASP_input import generate_vasp_inputs_in_dir
+    from .inputs.modINCAR import update_incar_files_with_magmom
     generate_mods_file()
     modify_without_sym(os.getcwd())
     process_poscar_files(mod=None, ignore_sym=True)
@@ -96,26 +69,36 @@ def heo():
 
 @app.command(rich_help_panel='Structure Gen & Modification')
 def vacancy(
-        ignore_sym: Annotated[bool,typer.Option('--ignore-sym','-i',help='Create vacancies, ignoring symmetry.')] = False
+        ignore_sym: Annotated[bool,typer.Option('--ignore-sym','-i',help='Create vacancies, ignoring symmetry.')] = False,
+        write_incar: Annotated[bool,typer.Option('--write-incar','-w',help='Write MAGMOM lines straight into INCARs instead of _MAGMOM.txt files.',show_default=False)] = False
         ):
     '''Create [red1]vacancies[/].'''
+    from .structures.remove_pairs import process_vasp_inputs
+    from .structures.remove_atoms import process_vasp_inputs_nosym
+    from .inputs.POTCAR_cat import process_directories
+    from .inputs.removed_pairs_INCARmod import process_pairs_mod_dirs
     if ignore_sym == True:
         element_name = process_vasp_inputs_nosym(os.getcwd())
     elif ignore_sym == False:
         element_name = process_vasp_inputs(os.getcwd())
-    process_pairs_mod_dirs(os.getcwd(), element_name, 'Removed',ignore_sym=ignore_sym)
+    process_pairs_mod_dirs(os.getcwd(), element_name, 'Removed',ignore_sym=ignore_sym,write_incar=write_incar)
     process_directories(os.getenv('POT_PATH'), vac = True, add=False)
         
 @app.command(rich_help_panel='Structure Gen & Modification')
 def adsorbate(
-        ignore_sym: Annotated[bool,typer.Option('--ignore-sym','-i',help='Add adsorbate, ignoring symmetry.')] = False
+        ignore_sym: Annotated[bool,typer.Option('--ignore-sym','-i',help='Add adsorbate, ignoring symmetry.')] = False,
+        write_incar: Annotated[bool,typer.Option('--write-incar','-w',help='Write MAGMOM lines straight into INCARs instead of _MAGMOM.txt files.',show_default=False)] = False
         ):
     '''[green]Add[/] adsorbates to structures.'''
+    from .structures.add_pairs import process_vasp_dirs
+    from .structures.add_atoms import process_vasp_dirs_nosym
+    from .inputs.POTCAR_cat import process_directories
+    from .inputs.removed_pairs_INCARmod import process_pairs_mod_dirs
     if ignore_sym == True:
         element_name = process_vasp_dirs_nosym(os.getcwd())
     elif ignore_sym == False:
         element_name = process_vasp_dirs(os.getcwd())
-    process_pairs_mod_dirs(os.getcwd(), element_name, 'Added',ignore_sym=ignore_sym)
+    process_pairs_mod_dirs(os.getcwd(), element_name, 'Added',ignore_sym=ignore_sym,write_incar=write_incar)
     process_directories(os.getenv('POT_PATH'), vac=False, add=True)
 
 ##------Job Handling------##
@@ -123,6 +106,7 @@ def adsorbate(
 @app.command(short_help='[purple]Verify[/] input files.',rich_help_panel='Job Handling & Submission')
 def preflight():
     '''Runs pre-calculation checks to [purple]verify[/] VASP input files.'''
+    from .job_handling.preflight import print_preflight
     print_preflight()
     
 @app.command(rich_help_panel='Job Handling & Submission')
@@ -131,9 +115,17 @@ def submit(
         vac:Annotated[bool,typer.Option("--vac","-v",help='Run only vacancy calculations. Does not work with calc = pdos')] = False,
         add: Annotated[bool,typer.Option("--add","-a",help='Run only adsorption calculations. Does not work with calc = pdos')] = False,
         force: Annotated[bool, typer.Option("--force","-f",help="Submits ALL calculations, including those that have been run before.")] = False,
-        skip_preflight: Annotated[bool,typer.Option('--skip-preflight','-s',help='Skip input file verification.')] = False
+        skip_preflight: Annotated[bool,typer.Option('--skip-preflight','-s',help='Skip input file verification.')] = False,
+        array: Annotated[bool,typer.Option('--array',help='Submit all calculations as one SLURM job array instead of one job per directory.')] = False,
+        max_running: Annotated[int,typer.Option('--max-running','-m',help='Maximum number of array tasks running at once. Only used with --array.')] = 20,
+        max_array_size: Annotated[int,typer.Option('--max-array-size',help="Maximum number of tasks in each array job, must not exceed the cluster's MaxArraySize. Only used with --array.")] = 1000,
+        pack: Annotated[int,typer.Option('--pack','-p',help='Run this many calculations in each job, packed onto the allocated cores.',show_default=False)] = 0,
+        cores: Annotated[int | None,typer.Option('--cores','-c',help='Cores for each packed calculation. Default splits the allocation evenly. Only used with --pack.',show_default=False)] = None,
+        chain: Annotated[str | None,typer.Option('--chain',help='Comma-separated stages (pdos, bands) set up & run automatically after each relaxation finishes successfully.',show_default=False)] = None,
+        k: Annotated[int,typer.Option('--k','-k',help='Line density of band structure k-path. Only used with --chain bands.')] = 20,
         ):
     '''[purple]Submit[/] VASP calculations.'''
+    from .job_handling.new_submit import submit_calcs
     if calc.lower() == 'struc':
         if vac:
             calc_type = "_Removed"
@@ -143,18 +135,35 @@ def submit(
             calc_type = "all"
     elif calc.lower() == 'pdos':
         calc_type = "PDOS"
-    submit_calcs(calc_type,force=force,skip_preflight=skip_preflight)
+    submit_calcs(calc_type,force=force,skip_preflight=skip_preflight,array=array,max_running=max_running,pack=pack,cores=cores,chain=chain,k=k,max_array_size=max_array_size)
        
 @app.command(short_help='[purple]Check[/] calculations for errors.',rich_help_panel='Job Handling & Submission')
 def check(
-        no_submit:Annotated[bool,typer.Option("--no-submit","-n",help='Use -n or --no-submit to run check without autosubmitting calculations',show_default=False)] = False
+        no_submit:Annotated[bool,typer.Option("--no-submit","-n",help='Use -n or --no-submit to run check without autosubmitting calculations',show_default=False)] = False,
+        jobs:Annotated[int,typer.Option("--jobs","-j",help='Number of worker processes used to check calculations.')] = 1,
         ):
     '''[purple]Checks[/] calculations for errors and fixes and resubmits calculations if possible.'''
-    err_fix(os.getcwd(),no_submit)
+    from .job_handling.err_check import err_fix
+    err_fix(os.getcwd(),no_submit,jobs)
+
+@app.command(short_help='[purple]Watch[/] calculations and fix & resubmit them as they finish.',rich_help_panel='Job Handling & Submission')
+def watch(
+        interval:Annotated[int,typer.Option("--interval","-i",help='Seconds between SLURM state polls.')] = 300,
+        jobs:Annotated[int,typer.Option("--jobs","-j",help='Maximum number of calculations checked at once.')] = 4,
+        no_submit:Annotated[bool,typer.Option("--no-submit","-n",help='Fix errors without resubmitting calculations.',show_default=False)] = False,
+        once:Annotated[bool,typer.Option("--once",help='Poll once and exit, e.g. when run from cron.',show_default=False)] = False,
+        ):
+    '''
+    [purple]Watches[/] calculations, polling SLURM states in bulk. Calculations whose state changed are checked, fixed and resubmitted, and finished PDOS calculations are parsed.
+    Handled states are saved to .wf-watch.json, so the watcher can be restarted without redoing work.
+    '''
+    from .job_handling.watch import watch as watch_calcs
+    watch_calcs(os.getcwd(),interval,jobs,no_submit,once)
 
 @app.command(short_help='Print [purple]status[/] of all calculations.',rich_help_panel='Job Handling & Submission')
 def status():
     '''Print [purple]status[/] of all calculations in directory tree, including error codes.'''
+    from .job_handling.status_check import print_status
     print_status()
 
 ##-------Energies-------##
@@ -162,6 +171,9 @@ def status():
 @app.command(short_help='Get [yellow3]energies[/].',rich_help_panel='Energies & Charges')
 def gete():
     '''Get [yellow3]energies[/] and generate E_pristine, E_vac, and E_ads CSV files.'''
+    from .energies.get_e_pristine import get_all_e
+    from .energies.Calc_Evac import process_e_vac
+    from .energies.calc_Eads import process_e_ads
     get_all_e(os.getcwd())
     process_e_vac(os.getcwd())
     process_e_ads(os.getcwd())
@@ -174,6 +186,7 @@ def chgdiff(
     Generates CHGDIFF.cube file from pristine and vacancy CHGCAR files and visualize the [yellow3]charge difference[/]. 
     [bold]Note:[/] CHGCAR files [bold]MUST[/] have the same size real space grids.
     '''
+    from .charges.chg_diff import get_chgdiff
     get_chgdiff(no_show)
 
 ##-------PDOS--------##
@@ -181,23 +194,37 @@ def chgdiff(
 @app.command(rich_help_panel='PDOS')
 def pdos():
     '''Set up [deep_pink3]PDOS[/] calculations.'''
+    from .pdos.createPDOS import process_vasp_inputs as pdos_vasp_inputs
+    from .pdos.pdos_INCARmod import process_pdos_dirs
     pdos_vasp_inputs(os.getcwd())
     process_pdos_dirs(os.getcwd())
     
 @app.command(rich_help_panel='PDOS')
-def parse():
-    '''[deep_pink3]Parse[/] PDOS data into individual files and integrates.'''
-    parse_pdos_dirs(os.getcwd())
-    integrate_all_pdos(os.getcwd())
+def parse(
+        dat:Annotated[bool,typer.Option('--dat','-d',help='Also write text .dat files for each atom.',show_default=False)] = False,
+        force:Annotated[bool,typer.Option('--force','-f',help='Parse and integrate all directories, including those that are unchanged.',show_default=False)] = False,
+        jobs:Annotated[int,typer.Option('--jobs','-j',help='Number of worker processes used to parse and integrate directories.')] = 1,
+        ):
+    '''[deep_pink3]Parse[/] PDOS data into pdos.npz and integrates. Only new or changed calculations are processed.'''
+    from .pdos.vasp_pdos import process_pdos_dirs as parse_pdos_dirs
+    from .pdos.integrate_pdos import integrate_all_pdos
+    from .pdos.tot_int import get_all_data
+    parse_pdos_dirs(os.getcwd(),dat,force,jobs)
+    integrate_all_pdos(os.getcwd(),force,jobs)
     get_all_data(os.getcwd())
     
 @app.command(short_help='[deep_pink3]Integrate[/] already parsed PDOS files.',rich_help_panel='PDOS')
-def integrate():
+def integrate(
+        force:Annotated[bool,typer.Option('--force','-f',help='Integrate all directories, including those that are unchanged.',show_default=False)] = False,
+        jobs:Annotated[int,typer.Option('--jobs','-j',help='Number of worker processes used to integrate directories.')] = 1,
+        ):
     '''
     [deep_pink3]Integrate[/] the PDOS files. 
     [bold]Note:[/] Files [bold]MUST[/] be parsed before integration. The parse command parses AND integrates, so this command should only be used if integration needs to be performed on already parsed files.
     '''
-    integrate_all_pdos(os.getcwd())
+    from .pdos.integrate_pdos import integrate_all_pdos
+    from .pdos.tot_int import get_all_data
+    integrate_all_pdos(os.getcwd(),force,jobs)
     get_all_data(os.getcwd())
     
 @app.command(rich_help_panel='PDOS')
@@ -205,20 +232,27 @@ def plot(
         no_show:Annotated[bool,typer.Option('--no-show-image','-n',help='Do not display plot in X11 window after running command.',show_default=False)] = False,
         ):
     '''[deep_pink3]Plot[/] PDOS.'''
+    from .pdos.PDOS_plotter import plot_pdos
     plot_pdos(os.getcwd(),no_show)
 
 ##------Descriptors------##
 
 @app.command(short_help='[dark_orange]Extract[/] descriptors.',rich_help_panel='Descriptors')
-def extract():
+def extract(
+        jobs:Annotated[int,typer.Option('--jobs','-j',help='Number of worker processes used to extract descriptors.')] = 1,
+        force:Annotated[bool,typer.Option('--force','-f',help='Extract descriptors for all modifications, including those that are unchanged.',show_default=False)] = False,
+        csv:Annotated[bool,typer.Option('--csv/--no-csv',help='Write descriptors to csv file as well as the campaign store.')] = True,
+        ):
     '''[dark_orange]Extract[/] ML descriptors from PDOS and optimization calculations.'''
-    extract_desc(os.getcwd())
+    from .descriptors.get_descriptors import extract_desc
+    extract_desc(os.getcwd(),jobs=jobs,force=force,csv=csv)
     
 ##-------Utils--------##
     
 @app.command(rich_help_panel='Utils')
 def init():
     '''[dodger_blue1]Initialize[/] workflow settings.'''
+    from .utils.initialize import init_settings
     init_settings()
 
 @app.command(rich_help_panel='Utils')
@@ -226,6 +260,7 @@ def prep():
     '''
     [dodger_blue1]Prepare[/] directory for set of calculations. [bold red1] IN PROGRESS [/]
     '''
+    from .utils.prepare import prepare_dir
     prepare_dir()
 
 @app.command(rich_help_panel='Utils')
@@ -233,6 +268,7 @@ def update(
         editable:Annotated[bool,typer.Option("--editable",'-e',help='Install the workflow as an editable package.')] = False,
 ):
     '''[dodger_blue1]Update[/] the workflow.'''
+    from .utils.wf_update import check_vrsn
     if editable == True:
         suffix = '.tar.gz'
     elif editable == False:
@@ -9,6 +9,8 @@ Changelog:
     4-30-25: Added section so script functions recursively.
     8-6-25: Added gaussian smearing to the plotting. Fixed a couple other minor issues.
     9-10-25: Removed gaussian smearing now that gaussian method is used to compute PDOS.
+    10-18-26: fermi_energy reads from end of OUTCAR instead of loading whole file.
+    10-18-26: .dat files are written from pdos.npz if the directory was parsed without them.
 """
 #import modules
 import numpy as np
@@ -17,6 +19,8 @@ from pathlib import Path
 import sys
 import os
 from PIL import Image, ImageShow
+from ..utils.outcar_reader import fermi_energy as read_fermi
+from .vasp_pdos import export_dat
 #define functions
 def make_plots(option=None, plot_choice=None, indices=None, titles=None):
     '''Makes subplots based on user input'''
@@ -56,14 +60,7 @@ def fermi_energy(base_dir):
     Determining fermi energy from given OUTCAR file. 
     Note: TotalDos and Atom files with individual orbitals are not fermi shifted but atom_total files are
     '''
-    line=""
-    for l in open(f'{base_dir}/OUTCAR',"r").readlines():
-        if "Fermi energy:" in l:
-            line=l
-    if line.startswith(' BZINTS'):
-        fermi = float(line.split()[3].strip(';'))
-    else:
-        fermi=float(line.split()[2])
+    fermi = read_fermi(f'{base_dir}/OUTCAR')
     return fermi
 
 def get_filelist(pdos_dir,indices, suffix):
@@ -229,6 +226,9 @@ def plot_pdos(base_dir, no_show_img):
             plot_choice = '1'
             
     for pdos_dir in pdos_dirs:
+        #write .dat files if directory was parsed without them
+        if not os.path.exists(f'{pdos_dir}/TotalDos.dat') and os.path.exists(f'{pdos_dir}/pdos.npz'):
+            export_dat(pdos_dir)
         #get fermi energy
         fermi = fermi_energy(pdos_dir)
         #generating data & plotting
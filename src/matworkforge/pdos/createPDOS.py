@@ -8,27 +8,23 @@ Changelog:
     6-2025: Modified to generalize script.
     6-25-25: Modified to pull PDOS_INCAR.txt from user directory
     3-2-26: Added check_contcar and ability to set up PDOS for adsorption struc.
+    10-18-26: VASP input files staged with utils.staging, POTCAR is linked instead of copied. Fixed check_contcar import.
 """
 #import modules
 import os
 import shutil
-from lco_workflow.job_handling.check_contcar import check_contcar
+from ..job_handling.check_contcar import check_contcar
+from ..utils.staging import Stager
 #define functions
-def copy_vasp_files(source_dir, dest_dir):
+def copy_vasp_files(source_dir, dest_dir, stager=None):
     """Copies essential VASP input files from source to destination."""
-    os.makedirs(dest_dir, exist_ok=True)  # Ensure the target directory exists
-    # List of files to copy
-    FILES_TO_COPY = ["INCAR", "KPOINTS", "POTCAR", "CONTCAR"]
-    for file in FILES_TO_COPY:
-        src_file = os.path.join(source_dir, file)
-        dest_file = os.path.join(dest_dir, file)
-        if os.path.exists(src_file):
-            shutil.copy2(src_file, dest_file)
-            print(f"Copied {file} to {dest_dir}")
-        else:
-            print(f"Warning: {file} not found in {source_dir}, skipping.")
+    if stager == None:
+        stager = Stager()
+    # Files to copy, POTCAR is linked as it's only replaced, never edited
+    FILES_TO_COPY = {"INCAR":'copy', "KPOINTS":'copy', "POTCAR":'link', "CONTCAR":'copy'}
+    stager.stage_files(source_dir, dest_dir, FILES_TO_COPY)
         
-def create_pdos(input_dir,base_directory):
+def create_pdos(input_dir,base_directory,stager=None):
     '''Creates PDOS directory and copies files to new directory. '''         
     print(f"\nProcessing: {input_dir}")
     
@@ -37,7 +33,7 @@ def create_pdos(input_dir,base_directory):
     os.makedirs(output_dir, exist_ok=True)
     
     # Copy required VASP files
-    copy_vasp_files(input_dir, output_dir)
+    copy_vasp_files(input_dir, output_dir, stager)
     
     #Rename CONTCAR to POSCAR
     if os.path.exists(f'{input_dir}/PDOS/CONTCAR'):
@@ -82,6 +78,8 @@ def process_vasp_inputs(base_directory):
         return
 
     # Apply the same modifications to all VASP_inputs directories
+    stager = Stager()
     for input_dir in input_dirs:
-        create_pdos(input_dir, base_directory)
+        create_pdos(input_dir, base_directory, stager)
+    stager.report()
 
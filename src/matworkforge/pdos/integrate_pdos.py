@@ -4,94 +4,96 @@ Author: Dorothea Fennell - dfennell1@bnl.gov
 Changelog: 
     9-10-25: New version of integrate_pdos, using scipy.integrate.simpson instead of Blake's method.
     9-11-25: Updated integration bounds for d-block metals to -6 to 0, added section to integrate both s & p orbitals for p-block elements.
+    10-18-26: Updated get_dirs to use calculation index.
+    10-18-26: Atom data is read from pdos.npz, falling back to _total.dat files for directories parsed before.
+    10-18-26: Integration windows found with np.searchsorted & all atoms of a block integrated at once along the atom axis.
+    10-18-26: Integration results kept in manifest, unchanged directories are only combined into selected-int-pdos.csv.
+    10-18-26: Added jobs option to integrate directories on a process pool.
+    10-18-26: Integrated & selected PDOS upserted to the campaign store.
+    10-18-26: f-block atoms are skipped with a warning, summed PDOS has no f columns.
 """
 #import modules
 import os
 import numpy as np
+import pandas as pd
 from pymatgen.core.periodic_table import Element
 from scipy.integrate import simpson 
+from ..utils.calc_index import get_index
+from .vasp_pdos import load_npz
+from ..utils.manifest import Manifest
+from ..utils.parallel import pool_map
+from ..utils.campaign_store import CampaignStore, rows_to_frame
+from functools import partial
 #define functions so program can operate recursively
 def get_dirs(base_dir):
     '''Runs through all directories in base directory and returns list of pdos directories.'''
+    index = get_index(base_dir)
     pdos_dirs=[]
-    for root, dirs, files in os.walk(base_dir):
-        if root.endswith("/PDOS") and "TotalDos.dat" in files:
+    for root in index.find(suffix="/PDOS"):
+        if index.has_file(root,"pdos.npz") or index.has_file(root,"TotalDos.dat"):
             pdos_dirs.append(root)
-        elif root.endswith("/PDOS") and "TotalDos.dat" not in files:
+        else:
             print("PDOS data hasn't been parsed yet.")
     return pdos_dirs
 
+def get_atoms(pdos_dir):
+    '''
+    Gets summed PDOS of all atoms from pdos.npz, or from the _total.dat files if the directory was parsed before pdos.npz.
+    Returns list of (atom label, data) with data columns energy, s(up), s(down), p(up), p(down), d(up), d(down).
+    '''
+    atoms = []
+    if os.path.exists(os.path.join(pdos_dir,'pdos.npz')):
+        data = load_npz(pdos_dir)
+        for label, summed in zip(data['labels'],data['summed']):
+            atoms.append((str(label),np.column_stack((data['energy'],summed))))
+    else:
+        for file in os.listdir(pdos_dir):
+            if file.endswith('_total.dat'):
+                #the atom_total.dat files have to be unpacked because they're made with np.savetext
+                data = np.genfromtxt(os.path.join(pdos_dir,file),skip_header=1,unpack=True)
+                atoms.append((file.split('_')[0],data))
+    return atoms
+
 def get_files(pdos_dir):
-    '''Gets files of all atoms from pdos directory'''
+    '''Gets summed PDOS of all atoms from pdos directory, split into metal, oxygen and lithium lists.'''
     m_filelist = []
     o_filelist = []
     li_filelist = []
-    for file in os.listdir(pdos_dir):
-        if file.endswith('_total.dat'):
-            filepath = os.path.join(pdos_dir,file)
-            if file.startswith('O'):
-                o_filelist.append(filepath)
-            elif file.startswith('Al'):
-                m_filelist.append(filepath)
-            elif file.startswith('Li'):
-                li_filelist.append(filepath)
-            else:
-                m_filelist.append(filepath)
-    m_filelist.sort()
-    o_filelist.sort()
-    li_filelist.sort()
+    for atom in get_atoms(pdos_dir):
+        label = atom[0]
+        if label.startswith('O'):
+            o_filelist.append(atom)
+        elif label.startswith('Al'):
+            m_filelist.append(atom)
+        elif label.startswith('Li'):
+            li_filelist.append(atom)
+        else:
+            m_filelist.append(atom)
+    m_filelist.sort(key=lambda a: a[0])
+    o_filelist.sort(key=lambda a: a[0])
+    li_filelist.sort(key=lambda a: a[0])
 
     return m_filelist, o_filelist,li_filelist
 
-def int_pdos(data,up_idx,down_idx,lower,upper,block,diff=True):
-    """Integrates PDOS in specified windows."""
-    #slice arrays
-    energy = data[:,0]
-    up = data[:,up_idx]
-    down = data[:,down_idx]
-    #get bottom of integration window
-    for x in range(len(energy)):
-        if energy[x] >= lower:
-            a = x
-            break
-    #get top of integration window
-    for x in range(len(energy)):
-        if energy[x] > upper:
-            b = x
-            break
-    
-    #split arrays
-    els = np.split(energy,[a,b])
-    uls = np.split(up,[a,b])
-    dls = np.split(down,[a,b])
-    e_win = els[1]
-    u_win = uls[1]
-    d_win = dls[1]
-    #integrate
-    up_e = simpson(u_win,x=e_win)
-    down_e = simpson(d_win, x=e_win)
-    tot_e = up_e + np.abs(down_e)
-    #if p-block element, integrate s orbitals as well
-    if block == 'p':
-        s_up = data[:,1]
-        s_down = data[:,2]
-        s_uls = np.split(s_up,[b])
-        s_dls = np.split(s_down,[b])
-        se_win = np.concat((els[0],els[1]),axis=None)
-        su_win = s_uls[0]
-        sd_win = s_dls[0]
-        sup_e = simpson(su_win,x=se_win)
-        up_e += sup_e
-        sdown_e = simpson(sd_win,x=se_win)
-        down_e += sdown_e
-        tot_e = up_e + np.abs(down_e)
-    #get spin
-    if diff == True:
-        diff = np.abs(up_e+down_e)
-        return tot_e, diff
-    else:
-        tota = tot_e
-        return tota
+def get_bounds(energy,lower,upper):
+    """Gets indices of integration window. Window includes energies from lower to upper."""
+    a = np.searchsorted(energy,lower,side='left')
+    b = np.searchsorted(energy,upper,side='right')
+    return a, b
+
+def int_pdos(energy,up,down,lower,upper,s_up=None,s_down=None):
+    """
+    Integrates PDOS in specified window for all atoms at once. up & down are (n_atoms, nedos) arrays.
+    If s_up & s_down are given (p-block elements), s orbitals are integrated from the bottom of the energy range as well.
+    Returns arrays of up & down integrals.
+    """
+    a, b = get_bounds(energy,lower,upper)
+    up_e = simpson(up[:,a:b],x=energy[a:b],axis=-1)
+    down_e = simpson(down[:,a:b],x=energy[a:b],axis=-1)
+    if s_up is not None:
+        up_e += simpson(s_up[:,:b],x=energy[:b],axis=-1)
+        down_e += simpson(s_down[:,:b],x=energy[:b],axis=-1)
+    return up_e, down_e
 
 def get_os(ele,e_tot):
     """Gets oxidation state of metal."""
@@ -103,57 +105,61 @@ def get_os(ele,e_tot):
 
 def int_d_states(filelist):
     """Integrates the d states of the metal atoms for the total number of electrons and d/p hybridization. """
-    #create data lists
-    m_data = []
-    for file in filelist:
+    #columns & lower bound of integration window for each block, summed PDOS has no f orbitals
+    windows = {'s':(1,2,-8),'p':(3,4,-8),'d':(5,6,-6)}
+    #group atoms by block so each block is integrated in one go
+    atoms = []
+    groups = {}
+    for atom, data in filelist:
         #determine atom
-        filename = os.path.basename(file)
-        atom = filename.split('_')[0]
-        index = ''
-        for char in atom:
-            if char.isdigit():
-                index +=f'{char}'
+        index = ''.join(char for char in atom if char.isdigit())
         ele = atom.strip('0123456789')
         try:
             ele = Element(ele)
         except:
-            pass
+            continue
+        if ele.block not in windows:
+            print(f'Warning: {atom} skipped, {ele.block} orbitals are not in the summed PDOS.')
+            continue
+        atoms.append((ele,index))
+        groups.setdefault(ele.block,[]).append((len(atoms)-1,data))
+    results = {}
+    for block, members in groups.items():
+        up_idx, down_idx, e_lower = windows[block]
+        stack = np.stack([data for i, data in members])
+        energy = stack[0,:,0]
+        up = stack[:,:,up_idx]
+        down = stack[:,:,down_idx]
+        if block == 'p':
+            #if p-block element, integrate s orbitals as well
+            s_up, s_down = stack[:,:,1], stack[:,:,2]
+        else:
+            s_up, s_down = None, None
+        #integrate from lower bound to 0 to get total # of electrons and net spin
+        up_e, down_e = int_pdos(energy,up,down,e_lower,0,s_up,s_down)
+        e_tot = up_e + np.abs(down_e)
+        spin = np.abs(up_e+down_e)
+        #integrate from -8 to -6 to get d/p hybridization - for d-block metals only
+        if block == 'd':
+            up_w, down_w = int_pdos(energy,up,down,-8,0)
+            hdp = up_w + np.abs(down_w) - e_tot
+        else:
+            hdp = np.zeros(len(members))
+        for n, (i, data) in enumerate(members):
+            results[i] = (e_tot[n],spin[n],hdp[n])
+    #create data list in same order as filelist
+    m_data = []
+    for i, (ele, index) in enumerate(atoms):
+        e_tot, spin, hdp = (float(x) for x in results[i])
+        if ele.block != 'd':
+            hdp = 0
+        #get os
+        ox = get_os(ele,e_tot)
+        #append data to list
+        if ele.block == 'p':
+            m_data.append(f'\n{ele},{index},{e_tot},{ox},{spin},{hdp},s+p')
         else:
-            if ele.block =='s':
-                up_idx = 1
-                down_idx = 2
-            elif ele.block == 'p':
-                up_idx = 3
-                down_idx = 4
-                e_lower = -8
-                block = 'p'
-            elif ele.block == 'd':
-                up_idx = 5
-                down_idx = 6
-                e_lower = -6
-                block = 'd'
-            elif ele.block == 'f':
-                up_idx = 7
-                down_idx = 8
-            #the atom_total.dat files have to be unpacked because they're made with np.savetext
-            data = np.genfromtxt(file,skip_header=1,unpack=True)
-            
-            #integrate from lower bound to 0 to get total # of electrons and net spin
-            e_tot, spin = int_pdos(data,up_idx,down_idx,e_lower,0,block)
-            
-            #integrate from -8 to -6 to get d/p hybridization - for d-block metals only
-            if ele.block == 'd':
-                tot_win = int_pdos(data,up_idx,down_idx,-8,0,block,diff=False)
-                hdp = tot_win - e_tot
-            else:
-                hdp = 0
-            #get os
-            ox = get_os(ele,e_tot)
-            #append data to list
-            if ele.block == 'p':
-                m_data.append(f'\n{ele},{index},{e_tot},{ox},{spin},{hdp},s+p')
-            else:
-                m_data.append(f'\n{ele},{index},{e_tot},{ox},{spin},{hdp},{ele.block}')
+            m_data.append(f'\n{ele},{index},{e_tot},{ox},{spin},{hdp},{ele.block}')
     return m_data
 
 def print_data(pdos_dir,data,fname,header):
@@ -164,8 +170,65 @@ def print_data(pdos_dir,data,fname,header):
         f.close
     print(f'{pdos_dir} csv created.')
 
-def integrate_all_pdos(base_dir):
-    '''Integrates pdos recursively through directories.'''
+def integrate_dir(pdos_dir,force=False):
+    """
+    Integrates pdos of one directory and writes integrated-pdos.csv. Returns metal data, number of Li atoms & data of all atoms.
+    Results are kept in the manifest, so directories whose pdos.npz hasn't changed aren't integrated again unless force is True.
+    """
+    inputs = ('pdos.npz',)
+    manifest = Manifest(pdos_dir)
+    #directories parsed before pdos.npz are always integrated
+    cached = os.path.exists(os.path.join(pdos_dir,'pdos.npz'))
+    data = manifest.get('integrate')
+    #manifests from before all_data was kept are integrated again
+    if cached and force != True and manifest.is_current('integrate',inputs,('integrated-pdos.csv',)) and 'all_data' in data:
+        print(f'Skipping {pdos_dir}, already integrated.')
+        return data['m_data'], data['n_li'], data['all_data']
+    #get filelists
+    m_filelist, o_filelist, li_filelist = get_files(pdos_dir)
+    #integrate d states
+    m_data = int_d_states(m_filelist)
+    o_data = int_d_states(o_filelist)
+    #print data to csv
+    mod_header = 'Element,Atom index,e_tot,OS,spin,H d/p,Orbital'
+    all_data = m_data + o_data
+    all_data.sort(key=sort_by_index)
+    print_data(pdos_dir,all_data,'integrated-pdos',mod_header)
+    if cached:
+        manifest.update('integrate',inputs,{'m_data':m_data,'n_li':len(li_filelist),'all_data':all_data})
+    return m_data, len(li_filelist), all_data
+
+def select_atoms(pdos_dir,m_data,n_li):
+    """Gets data of metals m1, m2 & m3 for selected-int-pdos.csv."""
+    selected_data = []
+    #determine index numbers for m1, m2 & m3
+    li_rem = 18 - n_li
+    m1 = str(21 - li_rem)
+    m2 = str(23 - li_rem)
+    m3 = str(25 - li_rem)
+    for x in m_data:
+        x = x.strip('\n')
+        atom_index = x.split(',')[1]
+        if atom_index in [m1,m2,m3]:
+            pdir = pdos_dir.split('/')
+            for p in pdir:
+                if p.startswith('Modification_'):
+                    mod_name = p
+            dirname = os.path.dirname(pdos_dir)
+            if dirname.endswith('VASP_inputs'):
+                mod_type = 'pris'
+            elif dirname.endswith('_Removed'):
+                mod_type = 'vac'
+            elif dirname.endswith('_Added'):
+                mod_type = 'ads'
+            selected_data.append(f'\n{mod_name},{mod_type},{x}')
+    return selected_data
+
+def integrate_all_pdos(base_dir,force=False,jobs=1):
+    '''
+    Integrates pdos recursively through directories. Only new or re-parsed directories are integrated unless force is True.
+    Directories are integrated on jobs worker processes & combined in Modification order.
+    '''
     #get pdos directories
     pdos_dirs = get_dirs(base_dir)
 
@@ -174,41 +237,20 @@ def integrate_all_pdos(base_dir):
         return
     
     selected_data = []
-    for pdos_dir in pdos_dirs:
-        #get filelists
-        m_filelist, o_filelist, li_filelist = get_files(pdos_dir)
-        #integrate d states
-        m_data = int_d_states(m_filelist)
-        o_data = int_d_states(o_filelist)
-        #determine index numbers for m1, m2 & m3
-        li_rem = 18 - len(li_filelist)
-        m1 = str(21 - li_rem)
-        m2 = str(23 - li_rem)
-        m3 = str(25 - li_rem)
-        for x in m_data:
-            x = x.strip('\n')
-            atom_index = x.split(',')[1]
-            if atom_index in [m1,m2,m3]:
-                pdir = pdos_dir.split('/')
-                for p in pdir:
-                    if p.startswith('Modification_'):
-                        mod_name = p
-                dirname = os.path.dirname(pdos_dir)
-                if dirname.endswith('VASP_inputs'):
-                    mod_type = 'pris'
-                elif dirname.endswith('_Removed'):
-                    mod_type = 'vac'
-                elif dirname.endswith('_Added'):
-                    mod_type = 'ads'
-                selected_data.append(f'\n{mod_name},{mod_type},{x}')
-        #print data to csv
-        mod_header = 'Element,Atom index,e_tot,OS,spin,H d/p,Orbital'
-        all_data = m_data + o_data
-        all_data.sort(key=sort_by_index)
-        print_data(pdos_dir,all_data,'integrated-pdos',mod_header)
+    int_tables = []
+    results = pool_map(partial(integrate_dir,force=force),pdos_dirs,jobs,'Integrating PDOS')
+    for pdos_dir, (m_data, n_li, all_data) in zip(pdos_dirs,results):
+        selected_data.extend(select_atoms(pdos_dir,m_data,n_li))
+        int_df = rows_to_frame('Element,Atom index,e_tot,OS,spin,H d/p,Orbital',all_data)
+        int_df.insert(0,'PDOS dir',os.path.relpath(pdos_dir,base_dir))
+        int_tables.append(int_df)
     selected_header = 'Modification dir,Modification type,Element,Atom index,e_tot,OS,spin,H d/p,Valence shell(s)'
     selected_data.sort(key=sort_by_index)
     print_data(base_dir,selected_data,'selected-int-pdos',selected_header)
+    #add to campaign store
+    store = CampaignStore(base_dir)
+    store.upsert('integrated-pdos',pd.concat(int_tables,ignore_index=True),['PDOS dir','Atom index'])
+    store.upsert('selected-int-pdos',rows_to_frame(selected_header,selected_data),['Modification dir','Modification type','Atom index'])
 
 def sort_by_index(data):
     '''For sorting the lists of data by the atom index rather than by element'''
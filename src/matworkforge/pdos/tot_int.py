@@ -4,17 +4,22 @@
 Created on Fri Jul 25 16:41:42 2025
 
 @author: dfennell
+Changelog:
+    10-18-26: Updated get_dirs to use calculation index.
+    10-18-26: PDOS directories parsed to pdos.npz are included.
 """
 
 import os
 import pandas as pd
+from ..utils.calc_index import get_index
 def get_dirs(base_dir):
     '''Runs through all directories in base directory and returns list of pdos directories.'''
+    index = get_index(base_dir)
     pdos_dirs=[]
-    for root, dirs, files in os.walk(base_dir):
-        if root.endswith("PDOS") and "TotalDos.dat" in files:
+    for root in index.find(suffix="PDOS"):
+        if index.has_file(root,"pdos.npz") or index.has_file(root,"TotalDos.dat"):
             pdos_dirs.append(root)
-        elif root.endswith("PDOS") and "TotalDos.dat" not in files:
+        else:
             print("PDOS data hasn't been parsed yet.")
     return pdos_dirs
 
@@ -1,14 +1,23 @@
 '''
-Create pdos .dat files for each atom recursively
+Parse DOSCAR into pdos.npz (and optionally .dat files) for each atom recursively
 Author: Dorothea Fennell
 Modified from Blake's vasp_pdos.py script
 Changelog: 
     4-30-25: Created, comments added. Broke original script up into functions so it can be applied recursively. 
     8-6-25: Modified fermi_energy to split accordingly
+    10-18-26: Updated process_pdos_dirs to use calculation index. fermi_energy reads from end of OUTCAR.
+    10-18-26: DOSCAR is parsed once into arrays & saved to pdos.npz. Orbitals are summed for all atoms at once. .dat files are optional (export_dat).
+    10-18-26: Parse is recorded in manifest so unchanged directories are skipped unless forced.
+    10-18-26: Added jobs option to parse directories on a process pool.
 '''
 #import modules
 import numpy as np
 import os
+from ..utils.calc_index import get_index
+from ..utils.outcar_reader import fermi_energy as read_fermi
+from ..utils.manifest import Manifest
+from ..utils.parallel import pool_map
+from functools import partial
 
 #define functions
 def fermi_energy(pdos_dir):
@@ -16,113 +25,124 @@ def fermi_energy(pdos_dir):
     Determining fermi energy from given OUTCAR file. 
     Note: TotalDos and Atom files with individual orbitals are not fermi shifted but atom_total files are
     '''
-    line=""
-    for l in open(f'{pdos_dir}/OUTCAR',"r").readlines():
-        if "Fermi energy:" in l:
-            line=l
-    if line.startswith(' BZINTS'):
-        fermi = float(line.split()[3].strip(';'))
-    else:
-        fermi=float(line.split()[2])
+    fermi = read_fermi(f'{pdos_dir}/OUTCAR')
     return fermi
 
-def read_files(pdos_dir):
-    ''' Reads POSCAR and DOSCAR and returns linesP and linesD'''
-    D = open(f"{pdos_dir}/DOSCAR", "r")
-    P = open(f"{pdos_dir}/POSCAR", "r")
-    linesP = P.readlines()
-    linesD = D.readlines()
-    P.close()
-    D.close()
-    return linesP, linesD
+def read_poscar(pdos_dir):
+    '''Reads element symbols and counts from POSCAR and returns list of atom labels (e.g. Co6).'''
+    with open(f"{pdos_dir}/POSCAR", "r") as P:
+        linesP = P.readlines()
+    atom_types = linesP[5].split()
+    atom_numbers = [int(i) for i in linesP[6].split()]
+    labels = []
+    for ele, num in zip(atom_types,atom_numbers):
+        for i in range(num):
+            labels.append(f'{ele}{len(labels)}')
+    return labels
 
-def tdos(pdos_dir,linesD):
+def read_doscar(pdos_dir):
     '''
-    Constructs the Total Density of States and saves it to TotalDos.dat. File has 5 columns: Energy(eV), DOS(up), DOS(down), Integrated DOS(up), and Integrated DOS(down).
+    Reads DOSCAR with a single parse. Returns total DOS as (nedos, 5) array and PDOS as (n_atoms, nedos, n_cols) array.
+    Columns of the PDOS are the same as the DOSCAR: energy, then up & down for each orbital.
     '''
-    TDos = open(f"{pdos_dir}/TotalDos.dat", "a")
-    x = linesD[5]          
-    x = x.split()                              
-    loop = int(x[2])                   
-    s = ""         
-    s = s.join(linesD[6:6+loop])
-    TDos.write('#Energy(eV)  DOS(up)       DOS(down)      Int_DOS(up)    Int_DOS(down)')
-    TDos.write('\n')
-    TDos.write(s)
-    TDos.close()
+    with open(f"{pdos_dir}/DOSCAR", "r") as D:
+        linesD = D.readlines()
+    nedos = int(linesD[5].split()[2])
+    tdos = np.fromstring(''.join(linesD[6:6+nedos]),sep=' ').reshape(nedos,-1)
+    #each atom block is a header line followed by nedos lines
+    block = nedos + 1
+    atom_lines = linesD[6+nedos:]
+    n_atoms = len(atom_lines)//block
+    body = ''.join(l for i,l in enumerate(atom_lines[:n_atoms*block]) if i%block != 0)
+    pdos = np.fromstring(body,sep=' ').reshape(n_atoms,nedos,-1)
+    return tdos, pdos
 
-def pdos(pdos_dir,linesP,linesD,fermi):
-   '''Creates .dat and _total.dat files for each atom. _total.dat files have the orbitals summed (all p orbitals together, etc.), and the energy is fermi shifted.'''
-   #List of Atom types and the most of each atom type
-   atom_types = linesP[5]
-   atom_types = atom_types.split()
-   atom_numbers = linesP[6]
-   atom_numbers = atom_numbers.split()
-   atom_numbers = [int(i) for i in atom_numbers]
-   tot_atoms = [int(i) for i in atom_numbers]
-   tot_atoms = sum(tot_atoms)
-   l = linesD[5]
-   l = l.split()
-   loop = int(l[2])
+def sum_orbitals(pdos):
+    '''
+    Sums the orbitals of every atom at once. Returns (n_atoms, nedos, 6) array with columns
+    s(up), s(down), p(up), p(down), d(up), d(down). Down spin is negative.
+    '''
+    cols = [[1],[2],[3,5,7],[4,6,8],[9,11,13,15,17],[10,12,14,16,18]]
+    signs = [1,-1,1,-1,1,-1]
+    summed = np.stack([sign*pdos[:,:,c].sum(axis=2) for c, sign in zip(cols,signs)],axis=2)
+    return summed
 
-   #Loop through and create the different PDOS for each atom
-   a=1
-   b=2
-   count=0
- 
-   for x in atom_numbers:
-       for i in range(x):
-           index1 = 6 + a + a*loop
-           index2 = 6 + a + b*loop
-           Pdos = open(f'{pdos_dir}/{atom_types[count]}{a-1}.dat', "a")
-           collect = ""
-           collect = collect.join(linesD[index1:index2])
-           Pdos.write('#Energy(eV)  s(up) s(down)   p{y}(up)  p{y}(down)   p{z}(up) p{z}(down)   p{x}(up) p{x}(down)   d{xy}(up)   d{xy}(down)     d{yz}(up)   d{yz}(down)    d{z2}(up)  d{z2}(down)    d{xz}(up)  d{xz}(down)     d{x2-y2}(up)    d{x2-y2}(down)')
-           Pdos.write('\n')
-           Pdos.write(collect)
-           Pdos.close()
-           
-           #load file to create summed pdos file
-           data = np.loadtxt(f'{pdos_dir}/{atom_types[count]}{a-1}.dat',unpack=True)
-           dfermi = data[0]-fermi
-           dup = data[9] + data[11] + data[13] + data[15] + data[17] 
-           ddown = (data[10] + data[12] + data[14] + data[16] + data[18])*-1 
-           pup = data[3] + data[5] + data[7]  
-           pdown = (data[4] + data[6] + data[8])*-1 
-           sup = data[1] 
-           sdown = data[2]*-1 
-           added = [dfermi, sup, sdown, pup, pdown, dup,  ddown] 
-           np.savetxt(f'{pdos_dir}/{atom_types[count]}{a-1}_total.dat', added, header="Energy(eV)              s(up)                    s(down)                  p(up)                    p(down)                  d(up)                    d(down)")
-           a+=1
-           b+=1
-       count+=1
-        
+def write_npz(pdos_dir,labels,tdos,pdos,fermi):
+    '''
+    Saves parsed DOS to pdos.npz. Energy is fermi shifted, tdos & pdos are the unshifted DOSCAR data and
+    summed has the orbitals summed by type for each atom (see sum_orbitals).
+    '''
+    summed = sum_orbitals(pdos)
+    np.savez(f'{pdos_dir}/pdos.npz',energy=tdos[:,0]-fermi,fermi=fermi,labels=np.array(labels),tdos=tdos,pdos=pdos,summed=summed)
+
+def load_npz(pdos_dir):
+    '''Loads pdos.npz and returns dict of arrays.'''
+    with np.load(f'{pdos_dir}/pdos.npz') as data:
+        return {k: data[k] for k in data.files}
 
-def process_pdos_dirs(base_dir):
-    """Finds all PDOS directories and processes POSCAR & DOSCAR into a file for each individual atom."""
+def export_dat(pdos_dir,labels=None):
+    '''
+    Writes the text files from pdos.npz: TotalDos.dat, a .dat file for each atom with individual orbitals and a
+    _total.dat file for each atom with the orbitals summed & the energy fermi shifted. Only atoms in labels are
+    written if labels is given.
+    '''
+    data = load_npz(pdos_dir)
+    tdos_header = '#Energy(eV)  DOS(up)       DOS(down)      Int_DOS(up)    Int_DOS(down)'
+    pdos_header = '#Energy(eV)  s(up) s(down)   p{y}(up)  p{y}(down)   p{z}(up) p{z}(down)   p{x}(up) p{x}(down)   d{xy}(up)   d{xy}(down)     d{yz}(up)   d{yz}(down)    d{z2}(up)  d{z2}(down)    d{xz}(up)  d{xz}(down)     d{x2-y2}(up)    d{x2-y2}(down)'
+    total_header = "Energy(eV)              s(up)                    s(down)                  p(up)                    p(down)                  d(up)                    d(down)"
+    np.savetxt(f'{pdos_dir}/TotalDos.dat',data['tdos'],fmt='%.4E',header=tdos_header,comments='')
+    for i, label in enumerate(data['labels']):
+        label = str(label)
+        if labels != None and label not in labels:
+            continue
+        np.savetxt(f'{pdos_dir}/{label}.dat',data['pdos'][i],fmt='%.4E',header=pdos_header,comments='')
+        #_total.dat files have one row per column, same as before
+        added = np.column_stack((data['energy'],data['summed'][i])).T
+        np.savetxt(f'{pdos_dir}/{label}_total.dat',added,header=total_header)
+
+def parse_dir(pdos_dir,dat=False,force=False):
+    """
+    Processes POSCAR & DOSCAR of one PDOS directory into pdos.npz. Skipped if DOSCAR, OUTCAR & POSCAR haven't
+    changed since the last parse, unless force is True. Returns True if directory was parsed.
+    """
+    inputs = ('DOSCAR','OUTCAR','POSCAR')
+    outputs = ('pdos.npz','TotalDos.dat') if dat == True else ('pdos.npz',)
+    manifest = Manifest(pdos_dir)
+    if force != True and manifest.is_current('parse',inputs,outputs):
+        print(f'Skipping {pdos_dir}, already parsed.')
+        return False
+    print(f'Processing {pdos_dir}')
+    #read DOSCAR & POSCAR
+    labels = read_poscar(pdos_dir)
+    tdos, pdos = read_doscar(pdos_dir)
+
+    #get fermi energy
+    fermi = fermi_energy(pdos_dir)
+
+    #save pdos for all atoms
+    write_npz(pdos_dir,labels,tdos,pdos,fermi)
+    if dat == True:
+        export_dat(pdos_dir)
+    manifest.update('parse',inputs)
+    print(f'PDOS files created for {pdos_dir}')
+    return True
+
+def process_pdos_dirs(base_dir,dat=False,force=False,jobs=1):
+    """
+    Finds all PDOS directories and processes POSCAR & DOSCAR into pdos.npz. Text .dat files are also written if dat is True.
+    Only new or changed calculations are parsed unless force is True. Directories are parsed on jobs worker processes.
+    """
+    index = get_index(base_dir)
     pdos_dirs=[]
-    for root, dirs, files in os.walk(base_dir):
-        if root.endswith("/PDOS") and "DOSCAR" in files:
+    for root in index.find(suffix="/PDOS"):
+        if index.has_file(root,"DOSCAR"):
             pdos_dirs.append(root)
-        elif root.endswith("/PDOS") and "DOSCAR" not in files:
+        else:
             print("PDOS calculations haven't been run yet.")
             
     if not pdos_dirs:
         print('No PDOS directories found. Exiting...')
         return
     
-    for pdos_dir in pdos_dirs:
-        print(f'Processing {pdos_dir}')
-        #open DOSCAR & POSCAR
-        linesP, linesD = read_files(pdos_dir)
-
-        #construct tdos
-        tdos(pdos_dir,linesD)
-
-        #get fermi energy
-        fermi = fermi_energy(pdos_dir)
-
-        #construct pdos for each atom
-        pdos(pdos_dir, linesP, linesD, fermi)
-        print(f'PDOS files created for {pdos_dir}')
+    pool_map(partial(parse_dir,dat=dat,force=force),pdos_dirs,jobs,'Parsing PDOS')
         
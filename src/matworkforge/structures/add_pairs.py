@@ -5,9 +5,11 @@ Add atoms to supercells.
 Author: Dorothea Fennell
 Changelog:
     1-30-26: Created, comments added. 
+    10-18-26: VASP input files staged with utils.staging, POTCAR is linked instead of copied.
 """
 #import modules
 from ase.io import read, write
+from ..utils.staging import Stager
 from ase.build import add_adsorbate, add_vacuum
 import os
 import shutil
@@ -15,19 +17,13 @@ import copy
 import numpy as np
 
 #define functions
-def copy_vasp_files(source_dir, dest_dir):
+def copy_vasp_files(source_dir, dest_dir, stager=None):
     """Copies essential VASP input files from source to destination."""
-    os.makedirs(dest_dir, exist_ok=True)  # Ensure the target directory exists
-    #list of files to copy
-    FILES_TO_COPY = ["INCAR", "KPOINTS", "POTCAR"]
-    for file in FILES_TO_COPY:
-        src_file = os.path.join(source_dir, file)
-        dest_file = os.path.join(dest_dir, file)
-        if os.path.exists(src_file):
-            shutil.copy2(src_file, dest_file)
-            print(f"Copied {file} to {dest_dir}")
-        else:
-            print(f"Warning: {file} not found in {source_dir}, skipping.")
+    if stager == None:
+        stager = Stager()
+    #files to copy, POTCAR is linked as it's only replaced, never edited
+    FILES_TO_COPY = {"INCAR":'copy', "KPOINTS":'copy', "POTCAR":'link'}
+    stager.stage_files(source_dir, dest_dir, FILES_TO_COPY)
 
 def get_pairs(atoms, element):
     """Identifies inversion pairs for a given element."""
@@ -75,7 +71,7 @@ def add_pairs(atoms, pairs, species, offset, selected_indices):
             add_adsorbate(mod_atoms,species,a2_h,(a2.x,a2.y),offset=offtup)
     return mod_atoms
 
-def process_addition(vasp_dir, pairs, species, offset, selected_indices):
+def process_addition(vasp_dir, pairs, species, offset, selected_indices, stager=None):
     """Creates POSCAR files with added pairs, saves it, and copies it to new directory along with required files."""
     print(f"\nProcessing: {vasp_dir}")
     
@@ -98,7 +94,7 @@ def process_addition(vasp_dir, pairs, species, offset, selected_indices):
     print(f"Copied {output_file} to {final_poscar_path} for VASP.")
 
     # Copy required VASP files
-    copy_vasp_files(vasp_dir, output_dir)
+    copy_vasp_files(vasp_dir, output_dir, stager)
 
 def process_vasp_dirs(base_dir):
     """Processes all VASP_inputs directories recursively, applying the same modifications to each."""
@@ -164,7 +160,9 @@ def process_vasp_dirs(base_dir):
     offset = input('Enter the offset (comma separated): ')
     
     
+    stager = Stager()
     for vasp_dir in vasp_dirs:
-        process_addition(vasp_dir, pairs, species, offset, selected_indices)
+        process_addition(vasp_dir, pairs, species, offset, selected_indices, stager)
+    stager.report()
    
     return element_name
\ No newline at end of file
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch engine for generating many modifications of one template structure. Each modification is a row of integer
+species codes over the template's atoms, duplicates are found with a hash set of rows, and POSCARs are written from
+a template of the ASE output, so only the species & counts lines are built for each structure.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Added symmetry permutation tables & canonical forms of configurations for symmetry-aware deduplication.
+"""
+#import modules
+import io
+import os
+import numpy as np
+from itertools import groupby
+from ase.io import write
+from pymatgen.io.ase import AseAtomsAdaptor
+from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
+
+#define functions
+def symmetry_permutations(atoms,sites,symprec=0.01):
+    '''
+    Gets permutation table of sites under the space group operations of atoms, from SpacegroupAnalyzer.
+    Returns (n_ops, n_sites) array, row k gives position in sites that each site is moved to by operation k.
+    Operations that don't map sites onto sites of the same species are skipped.
+    '''
+    struc = AseAtomsAdaptor.get_structure(atoms)
+    ops = SpacegroupAnalyzer(struc,symprec=symprec).get_symmetry_operations()
+    frac = struc.frac_coords
+    numbers = np.array(atoms.get_atomic_numbers())
+    sites = np.asarray(sites,dtype=int)
+    pos = np.full(len(atoms),-1)
+    pos[sites] = np.arange(len(sites))
+    perms = []
+    for op in ops:
+        new = op.operate_multi(frac[sites])
+        diff = new[:,None,:] - frac[None,:,:]
+        diff -= np.round(diff)
+        dist = np.linalg.norm(diff @ struc.lattice.matrix,axis=-1)
+        target = dist.argmin(axis=1)
+        if dist[np.arange(len(sites)),target].max() > 10*symprec or np.any(pos[target] < 0):
+            continue
+        if np.any(numbers[target] != numbers[sites]):
+            continue
+        perms.append(pos[target])
+    return np.unique(np.array(perms,dtype=int),axis=0)
+
+def canonicalize(rows,perms,chunk_size=10000):
+    '''
+    Maps each row of species codes to its canonical form, the lexicographically smallest row among all symmetry
+    operations in perms. Rows are done in chunks so the (rows, ops, sites) array fits in memory.
+    '''
+    rows = np.asarray(rows)
+    canonical = np.empty_like(rows)
+    for start in range(0,len(rows),chunk_size):
+        block = rows[start:start+chunk_size]
+        #config after each operation, site perms[k][i] gets species of site i
+        images = np.empty((len(block),len(perms),rows.shape[1]),dtype=rows.dtype)
+        images[:,np.arange(len(perms))[:,None],perms] = block[:,None,:]
+        #lexicographic minimum over operations, one site at a time
+        cand = np.ones(images.shape[:2],dtype=bool)
+        big = np.iinfo(rows.dtype).max
+        for j in range(rows.shape[1]):
+            col = np.where(cand,images[:,:,j],big)
+            cand &= col == col.min(axis=1)[:,None]
+        canonical[start:start+chunk_size] = images[np.arange(len(block)),cand.argmax(axis=1)]
+    return canonical
+
+#define class
+class BatchStructures:
+    '''
+    Modifications of template ASE atoms, stored as (n_structures, n_atoms) array of species codes.
+    POSCARs are identical to writing each modified atoms object with ase.io.write(format='vasp').
+    '''
+    def __init__(self,atoms):
+        '''Initialize from template atoms.'''
+        self.species = []
+        self.base = self.codes(atoms.get_chemical_symbols())
+        self.rows = []
+        self.seen = set()
+        #everything except label & species/counts lines is the same for all modifications
+        with io.StringIO() as f:
+            write(f,atoms,format='vasp')
+            lines = f.getvalue().splitlines(keepends=True)
+        self.cell_lines = ''.join(lines[1:5])
+        self.coord_lines = ''.join(lines[7:])
+
+    def codes(self,symbols):
+        '''Converts symbols to species codes, adding new species.'''
+        codes = []
+        for s in symbols:
+            if s not in self.species:
+                self.species.append(s)
+            codes.append(self.species.index(s))
+        return np.array(codes,dtype=np.int16)
+
+    def __len__(self):
+        '''Number of structures in batch.'''
+        return len(self.rows)
+
+    def add(self,indices,symbols,unique=False):
+        '''
+        Adds template with atoms at indices replaced by symbols. If unique is True, structures already in the batch
+        are skipped. Returns True if structure was added.
+        '''
+        row = self.base.copy()
+        row[np.asarray(indices,dtype=int)] = self.codes(symbols)
+        return self.add_rows(row[None,:],unique)[0]
+
+    def add_rows(self,rows,unique=False):
+        '''Adds (n, n_atoms) array of species codes. Returns boolean mask of rows that were added.'''
+        added = np.ones(len(rows),dtype=bool)
+        for i, row in enumerate(rows):
+            key = row.tobytes()
+            if unique == True and key in self.seen:
+                added[i] = False
+                continue
+            self.seen.add(key)
+            self.rows.append(row)
+        return added
+
+    def symbols(self,n):
+        '''Gets list of symbols of structure n.'''
+        return [self.species[c] for c in self.rows[n]]
+
+    def poscar(self,n):
+        '''Gets POSCAR text of structure n.'''
+        #runs of the same species, same as ase symbol counts
+        runs = [(self.species[code],len(list(group))) for code, group in groupby(self.rows[n].tolist())]
+        label = ' '.join(f'{s:2s}' for s, _ in runs)
+        sc_str = ' ' + ' '.join(f'{s:3s}' for s, _ in runs) + '\n ' + ' '.join(f'{c:3d}' for _, c in runs) + '\n'
+        return f'{label}\n{self.cell_lines}{sc_str}{self.coord_lines}'
+
+    def write_poscar(self,n,path):
+        '''Writes POSCAR of structure n to path.'''
+        with open(path,'w') as f:
+            f.write(self.poscar(n))
+
+    def write_mod_dirs(self,base_dir,start=1):
+        '''Writes Modification_#/POSCAR_modified_#.vasp for all structures, numbered from start.'''
+        for n in range(len(self.rows)):
+            mod = n + start
+            directory_name = f'Modification_{mod}'
+            os.makedirs(os.path.join(base_dir,directory_name),exist_ok=True)
+            output_filename = os.path.join(directory_name,f'POSCAR_modified_{mod}.vasp')
+            self.write_poscar(n,os.path.join(base_dir,output_filename))
+            print(f"Modified POSCAR saved in directory {directory_name} as {output_filename}.")
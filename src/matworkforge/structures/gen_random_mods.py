@@ -5,11 +5,15 @@ Generate random Mods file for HEO compositions
 Author: Dorothea Fennell
 Changelog:
     2-25-26: Created, comments added
+    10-18-26: Mods generated as one array of permutations of species codes, duplicates removed with a hash set.
+    10-18-26: Symmetry-equivalent mods removed using canonical forms under the space group of POSCAR-HEO.
+    10-18-26: Atom list padded with Co to atom_num instead of 30. Prints why if symmetry deduplication is skipped.
 """
 #import modules
 import numpy as np
 from ase.io import read
 import os
+from .batch_structures import symmetry_permutations, canonicalize
 
 #define functions
 def get_atoms():
@@ -19,8 +23,11 @@ def get_atoms():
     atoms = read(poscar)
     return atoms
 
-def get_mods(user_dict,mod_num,atom_num):
-    '''Generates random mods file.'''    
+def get_mods(user_dict,mod_num,atom_num,atoms=None):
+    '''
+    Generates random mods file. If atoms is given, mods that are equivalent under the space group operations of atoms
+    are only kept once.
+    '''    
     #create empty lists
     mods_list = []
     atom_list = []
@@ -30,27 +37,46 @@ def get_mods(user_dict,mod_num,atom_num):
         for i in range(user_dict[f'{el}']):        
             atom_list.append(f'{el}')
     
-    if len(atom_list) <30:
-        while len(atom_list) <30:
+    if len(atom_list) < atom_num:
+        while len(atom_list) < atom_num:
             atom_list.append('Co')
     
+    #convert atoms to species codes
+    species = list(dict.fromkeys(atom_list))
+    codes = np.array([species.index(a) for a in atom_list],dtype=np.int16)
+    
     #set up numpy rng
     rng = np.random.default_rng()
-    #generate list of mods
-    for x in range(int(mod_num)):
-        mod = rng.permutation(atom_list)
-        mod_str = ','.join(mod)
-        if mod_str not in mods_list:
-            mods_list.append(mod_str)
+    #generate all mods at once, each row a permutation of atom_list
+    mods = rng.permuted(np.tile(codes,(int(mod_num),1)),axis=1)
+    #map mods to canonical form under symmetry operations of modified sites (atom indices 0 to atom_num-1)
+    symmetry = atoms != None and len(codes) == atom_num
+    if atoms != None and symmetry == False:
+        print(f'{len(codes)} replacement atoms given for {atom_num} Co sites, symmetry-equivalent mods are not removed.')
+    if symmetry == True:
+        perms = symmetry_permutations(atoms,np.arange(len(codes)))
+        keys = canonicalize(mods,perms)
+    else:
+        keys = mods
+    #keep first occurrence of each mod
+    seen = set()
+    exact = set()
+    names = np.array(species)
+    for mod, key in zip(mods,keys):
+        exact.add(mod.tobytes())
+        key = key.tobytes()
+        if key not in seen:
+            seen.add(key)
+            mods_list.append(','.join(names[mod]))
+    if symmetry == True:
+        print(f'{len(mods)} mods generated, {len(exact)} unique. {len(exact)-len(mods_list)} symmetry-equivalent mods removed, {len(mods_list)} left.')
     
     #generate str of atom idx
     num = np.arange(atom_num)
     num_str = ','.join(map(str,num))
     
     #generate mods file
-    full_list = []
-    for m in mods_list:
-        full_list.append(f'{num_str},{m}\n')
+    full_list = [f'{num_str},{m}\n' for m in mods_list]
     
     #write mods file
     with open(os.path.join(os.getcwd(),'ModsIdx.txt'),'w') as f:
@@ -84,5 +110,5 @@ def generate_mods_file():
     mod_num = int(input('Enter number of mods:'))
     
     #create mods file
-    get_mods(user_dict, mod_num, atom_num)
+    get_mods(user_dict, mod_num, atom_num, atoms)
     print('ModsIdx.txt file created.')
\ No newline at end of file
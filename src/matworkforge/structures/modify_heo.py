@@ -5,12 +5,13 @@ Modify structure while ignoring symmetry.
 Author: Dorothea Fennell
 Changelog:
     2-25-26: Created, comments added
+    10-18-26: Structures built & written with BatchStructures instead of deepcopy & ase write for each mod.
 """
 #import modules
-from ase.io import read, write
+from ase.io import read
 import os
-import copy
 import shutil
+from .batch_structures import BatchStructures
 
 #define functions
 def read_modifications(filename):
@@ -26,18 +27,12 @@ def read_modifications(filename):
 def mod_structure(atoms):
     '''Modifies atoms in structure based on ModsIdx.txt file.'''
     mods = read_modifications('ModsIdx.txt')
-    for mod, (indices, new_elements) in enumerate(mods):
-        modified_atoms = copy.deepcopy(atoms)
-        for i, idx in enumerate(indices):
-            modified_atoms[idx].symbol = new_elements[i]
-                
-        # Make new directory for each new structure
-        directory_name = f"Modification_{mod + 1}"
-        os.makedirs(directory_name, exist_ok=True)
-        
-        output_filename = os.path.join(directory_name, f"POSCAR_modified_{mod + 1}.vasp")
-        write(output_filename, modified_atoms, format="vasp")
-        print(f"Modified POSCAR saved in directory {directory_name} as {output_filename}.")
+    batch = BatchStructures(atoms)
+    for indices, new_elements in mods:
+        batch.add(indices, new_elements[:len(indices)])
+    
+    # Make new directory for each new structure
+    batch.write_mod_dirs(os.getcwd())
 
 def modify_without_sym(base_dir):
     '''Creates modification directories based on ModsIdx.txt while ignoring symmetry.'''
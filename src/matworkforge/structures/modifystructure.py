@@ -1,7 +1,7 @@
-from ase.io import read, write
+from ase.io import read
 import os
-import copy
 import shutil
+from .batch_structures import BatchStructures
 
 # Save pairs to text files
 def save_pairs_to_file(pairs, filename):
@@ -23,21 +23,19 @@ def modify_pairs(atoms,atom_pairs):
 
     modifications = read_modifications("Mods.txt")
 
-    for mod_index, (pair_indices, new_elements) in enumerate(modifications):
-        modified_atoms = copy.deepcopy(atoms)
+    # Build all structures as species arrays over the template
+    batch = BatchStructures(atoms)
+    for pair_indices, new_elements in modifications:
+        indices = []
+        symbols = []
         for i, pair_index in enumerate(pair_indices):
             if pair_index < len(atom_pairs):
-                index1, index2 = atom_pairs[pair_index]
-                modified_atoms[index1].symbol = new_elements[i]
-                modified_atoms[index2].symbol = new_elements[i]
-        
-        # Make new directory for each new structure
-        directory_name = f"Modification_{mod_index + 1}"
-        os.makedirs(directory_name, exist_ok=True)
-        
-        output_filename = os.path.join(directory_name, f"POSCAR_modified_{mod_index + 1}.vasp")
-        write(output_filename, modified_atoms, format="vasp")
-        print(f"Modified POSCAR saved in directory {directory_name} as {output_filename}.")
+                indices.extend(atom_pairs[pair_index])
+                symbols.extend([new_elements[i]] * 2)
+        batch.add(indices, symbols)
+    
+    # Make new directory for each new structure
+    batch.write_mod_dirs(os.getcwd())
 
 def modify_structure(base_dir):
     '''Modifies structures based of user input. '''
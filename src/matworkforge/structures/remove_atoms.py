@@ -6,27 +6,23 @@ Author: Dorothea Fennell
 Changelog: 
     2-26-26: Created, comments added
     3-2-26: Modified for delafossite wf
+    10-18-26: VASP input files staged with utils.staging, POTCAR is linked instead of copied.
 """
 #import modules
 import os
 import shutil
 import copy
 from ase.io import read, write
+from ..utils.staging import Stager
 
 #define functions
-def copy_vasp_files(source_dir, dest_dir):
+def copy_vasp_files(source_dir, dest_dir, stager=None):
     """Copies essential VASP input files from source to destination."""
-    os.makedirs(dest_dir, exist_ok=True)  # Ensure the target directory exists
-    #list of files to copy
-    FILES_TO_COPY = ["INCAR", "KPOINTS", "POTCAR"]
-    for file in FILES_TO_COPY:
-        src_file = os.path.join(source_dir, file)
-        dest_file = os.path.join(dest_dir, file)
-        if os.path.exists(src_file):
-            shutil.copy2(src_file, dest_file)
-            print(f"Copied {file} to {dest_dir}")
-        else:
-            print(f"Warning: {file} not found in {source_dir}, skipping.")
+    if stager == None:
+        stager = Stager()
+    #files to copy, POTCAR is linked as it's only replaced, never edited
+    FILES_TO_COPY = {"INCAR":'copy', "KPOINTS":'copy', "POTCAR":'link'}
+    stager.stage_files(source_dir, dest_dir, FILES_TO_COPY)
 
 def get_indices(atoms, element):
     """Identifies atoms for a given element."""
@@ -51,7 +47,7 @@ def remove_selected_atoms(atoms, indices,selected_indices):
     # Remove atoms marked for deletion
     return modified_atoms[[atom.symbol != "X" for atom in modified_atoms]]
 
-def process_removal(vasp_dir,indices,selected_indices, element_name):
+def process_removal(vasp_dir,indices,selected_indices, element_name, stager=None):
     """Creates POSCAR files with removed pairs, saves it, and copies it to new directory along with required files."""
     print(f"\nProcessing: {vasp_dir}")
 
@@ -73,7 +69,7 @@ def process_removal(vasp_dir,indices,selected_indices, element_name):
     print(f"Copied {output_file} to {final_poscar_path} for VASP.")
 
     # Copy required VASP files
-    copy_vasp_files(vasp_dir, output_dir)
+    copy_vasp_files(vasp_dir, output_dir, stager)
 
 def process_vasp_inputs_nosym(base_directory):
     """Processes all VASP_inputs directories recursively, applying the same modifications to each."""
@@ -126,8 +122,10 @@ def process_vasp_inputs_nosym(base_directory):
             selected_indices = get_user_selection(indices, element_name)
             
     # Apply the same modifications to all VASP_inputs directories
+    stager = Stager()
     for vasp_dir in vasp_dirs:
-        process_removal(vasp_dir,indices,selected_indices,element_name)
+        process_removal(vasp_dir,indices,selected_indices,element_name,stager)
+    stager.report()
     
     return choice
 
@@ -2,20 +2,15 @@ import os
 import shutil
 import copy
 from ase.io import read, write
+from ..utils.staging import Stager
 
-def copy_vasp_files(source_dir, dest_dir):
+def copy_vasp_files(source_dir, dest_dir, stager=None):
     """Copies essential VASP input files from source to destination."""
-    os.makedirs(dest_dir, exist_ok=True)  # Ensure the target directory exists
-    #list of files to copy
-    FILES_TO_COPY = ["INCAR", "KPOINTS", "POTCAR"]
-    for file in FILES_TO_COPY:
-        src_file = os.path.join(source_dir, file)
-        dest_file = os.path.join(dest_dir, file)
-        if os.path.exists(src_file):
-            shutil.copy2(src_file, dest_file)
-            print(f"Copied {file} to {dest_dir}")
-        else:
-            print(f"Warning: {file} not found in {source_dir}, skipping.")
+    if stager == None:
+        stager = Stager()
+    #files to copy, POTCAR is linked as it's only replaced, never edited
+    FILES_TO_COPY = {"INCAR":'copy', "KPOINTS":'copy', "POTCAR":'link'}
+    stager.stage_files(source_dir, dest_dir, FILES_TO_COPY)
 
 def get_pairs(atoms, element):
     """Identifies inversion pairs for a given element."""
@@ -49,7 +44,7 @@ def remove_selected_pairs(atoms, pairs,removal_choice,selected_indices=None,pair
     # Remove atoms marked for deletion
     return modified_atoms[[atom.symbol != "X" for atom in modified_atoms]]
 
-def process_removal(vasp_dir,pairs,selected_indices,removal_choice, element_name, i=None,index=None):
+def process_removal(vasp_dir,pairs,selected_indices,removal_choice, element_name, i=None,index=None,stager=None):
     """Creates POSCAR files with removed pairs, saves it, and copies it to new directory along with required files."""
     print(f"\nProcessing: {vasp_dir}")
 
@@ -76,7 +71,7 @@ def process_removal(vasp_dir,pairs,selected_indices,removal_choice, element_name
     print(f"Copied {output_file} to {final_poscar_path} for VASP.")
 
     # Copy required VASP files
-    copy_vasp_files(vasp_dir, output_dir)
+    copy_vasp_files(vasp_dir, output_dir, stager)
 
 def process_vasp_inputs(base_directory):
     """Processes all VASP_inputs directories recursively, applying the same modifications to each."""
@@ -139,11 +134,13 @@ def process_vasp_inputs(base_directory):
     removal_choice = input("Enter the number of your choice: ")
 
     # Apply the same modifications to all VASP_inputs directories
+    stager = Stager()
     for vasp_dir in vasp_dirs:
         if removal_choice == '1':
-            process_removal(vasp_dir,pairs,selected_indices,removal_choice,element_name)
+            process_removal(vasp_dir,pairs,selected_indices,removal_choice,element_name,stager=stager)
         elif removal_choice == '2':
             for i,index in enumerate(selected_indices):
-                process_removal(vasp_dir,pairs,selected_indices,removal_choice, element_name,i,index)
+                process_removal(vasp_dir,pairs,selected_indices,removal_choice, element_name,i,index,stager)
+    stager.report()
       
     return element_name
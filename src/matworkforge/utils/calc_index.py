@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-pass index of the calculation directory tree, shared by all wf commands.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import os
+import json
+import time
+from typing import ClassVar
+
+#define functions
+def calc_type(path):
+    '''Classifies a directory by name. Returns None if it isn't a calculation directory.'''
+    if path.endswith('PDOS'):
+        return 'pdos'
+    elif path.endswith('Band_struc'):
+        return 'bands'
+    elif path.endswith('_Removed'):
+        return 'removed'
+    elif path.endswith('_Added'):
+        return 'added'
+    elif path.endswith('VASP_inputs'):
+        return 'pristine'
+    return None
+
+def mod_number(path):
+    '''Gets modification number from path for sorting. Paths outside Modification_# dirs sort first.'''
+    num = 0
+    for p in path.split('/'):
+        if p.startswith('Modification_'):
+            try:
+                num = int(p.split('_')[1])
+            except ValueError:
+                pass
+    return num
+
+def sort_dirs(dirs):
+    '''Sorts list of directories by modification number, then path.'''
+    return sorted(dirs, key=lambda d: (mod_number(d), d))
+
+#define class
+class CalcIndex:
+    '''
+    Index of every directory under base_dir with its calculation type and the mtime & size of each file.
+    The index is saved to .wf-index.json in base_dir and refreshed by checking directory mtimes, so the
+    full tree only has to be walked once.
+    '''
+    index_file: ClassVar = '.wf-index.json'
+    #output files that change size without changing the mtime of their directory
+    output_files: ClassVar = ('OUTCAR','vasprun.xml','CONTCAR','OSZICAR','DOSCAR','CHGCAR','WAVECAR','vasp.out')
+
+    def __init__(self,base_dir):
+        '''Initialize index.'''
+        self.base_dir = os.path.abspath(base_dir)
+        self.dirs = {}
+        self.scanned_at = 0.0
+
+    def __path(self,rel):
+        '''Converts relative index path to full path.'''
+        if rel == '.':
+            return self.base_dir
+        return os.path.join(self.base_dir,rel)
+
+    def __scan_dir(self,rel):
+        '''Scans one directory. Returns list of subdirectories.'''
+        path = self.__path(rel)
+        files = {}
+        subdirs = []
+        try:
+            dir_mtime = os.stat(path).st_mtime
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name if rel == '.' else f'{rel}/{entry.name}')
+                    elif entry.name != self.index_file:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        files[entry.name] = [st.st_mtime,st.st_size]
+        except OSError:
+            self.dirs.pop(rel,None)
+            return []
+        self.dirs[rel] = {'type':calc_type(path),'mtime':dir_mtime,'files':files}
+        return subdirs
+
+    def __drop(self,rel):
+        '''Removes directory and its children from index.'''
+        for d in [d for d in self.dirs if d == rel or d.startswith(f'{rel}/')]:
+            del self.dirs[d]
+
+    def __scan_tree(self,rel):
+        '''Scans directory and all subdirectories.'''
+        stack = [rel]
+        while stack:
+            stack.extend(self.__scan_dir(stack.pop()))
+
+    def scan(self):
+        '''Walks the full tree.'''
+        self.dirs = {}
+        start = time.time()
+        self.__scan_tree('.')
+        self.scanned_at = start
+
+    def refresh(self):
+        '''
+        Updates index. Directories whose mtime changed are rescanned & new subdirectories are walked.
+        Output files in calculation directories are re-stat'd since they grow in place.
+        '''
+        start = time.time()
+        for rel in list(self.dirs.keys()):
+            if rel not in self.dirs:
+                continue
+            entry = self.dirs[rel]
+            path = self.__path(rel)
+            try:
+                dir_mtime = os.stat(path).st_mtime
+            except OSError:
+                #directory removed
+                self.__drop(rel)
+                continue
+            #rescan if changed, or if modified too close to last scan to trust mtime
+            if dir_mtime != entry['mtime'] or dir_mtime >= self.scanned_at - 1:
+                subdirs = self.__scan_dir(rel)
+                for sub in subdirs:
+                    if sub not in self.dirs:
+                        self.__scan_tree(sub)
+                #drop removed subdirectories
+                prefix = '' if rel == '.' else f'{rel}/'
+                for d in [d for d in self.dirs if d != rel and d.startswith(prefix) and '/' not in d[len(prefix):]]:
+                    if d not in subdirs:
+                        self.__drop(d)
+            elif entry['type'] != None:
+                for name in self.output_files:
+                    if name in entry['files']:
+                        try:
+                            st = os.stat(os.path.join(path,name))
+                        except OSError:
+                            del entry['files'][name]
+                        else:
+                            entry['files'][name] = [st.st_mtime,st.st_size]
+        self.scanned_at = start
+
+    def load(self):
+        '''Loads index from file. Returns False if no usable index exists.'''
+        fullpath = os.path.join(self.base_dir,self.index_file)
+        try:
+            with open(fullpath,'r') as f:
+                data = json.load(f)
+        except (OSError,ValueError):
+            return False
+        if data.get('base_dir') != self.base_dir:
+            return False
+        self.dirs = data.get('dirs',{})
+        self.scanned_at = data.get('scanned_at',0.0)
+        return True
+
+    def save(self):
+        '''Saves index to file.'''
+        fullpath = os.path.join(self.base_dir,self.index_file)
+        tmp = f'{fullpath}.{os.getpid()}.tmp'
+        try:
+            with open(tmp,'w') as f:
+                json.dump({'base_dir':self.base_dir,'scanned_at':self.scanned_at,'dirs':self.dirs},f)
+            os.replace(tmp,fullpath)
+        except OSError:
+            #read-only directory, index stays in memory
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def find(self,suffix=None,calc=None,has=None,within=None):
+        '''
+        Returns sorted list of full paths of indexed directories.
+        suffix: path ends with suffix (same as root.endswith() in os.walk loops)
+        calc: calculation type, or tuple of types ('pristine','removed','added','pdos','bands'). 'all' matches any calculation dir.
+        has: file name or tuple of file names that must be present
+        within: only directories inside this directory
+        '''
+        if isinstance(has,str):
+            has = (has,)
+        if isinstance(calc,str) and calc != 'all':
+            calc = (calc,)
+        if within != None:
+            within = os.path.abspath(within)
+        found = []
+        for rel,entry in self.dirs.items():
+            path = self.__path(rel)
+            if suffix != None and not path.endswith(suffix):
+                continue
+            if calc == 'all' and entry['type'] == None:
+                continue
+            elif calc not in (None,'all') and entry['type'] not in calc:
+                continue
+            if has and not all(h in entry['files'] for h in has):
+                continue
+            if within != None and not (path == within or path.startswith(f'{within}/')):
+                continue
+            found.append(path)
+        return sort_dirs(found)
+
+    def files(self,path):
+        '''Returns dict of files in directory: {name: [mtime, size]}'''
+        rel = os.path.relpath(os.path.abspath(path),self.base_dir)
+        entry = self.dirs.get(rel)
+        if entry == None:
+            return {}
+        return entry['files']
+
+    def has_file(self,path,name):
+        '''Checks if directory contains file.'''
+        return name in self.files(path)
+
+#define function
+def get_index(base_dir=None,refresh=True):
+    '''Loads calculation index for base_dir, building it if necessary, and returns CalcIndex.'''
+    if base_dir == None:
+        base_dir = os.getcwd()
+    index = CalcIndex(base_dir)
+    if index.load():
+        if refresh == True:
+            index.refresh()
+            index.save()
+    else:
+        index.scan()
+        index.save()
+    return index
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar campaign store. Each table (descriptors, energies, integrated PDOS) is saved as an uncompressed Feather
+(Arrow IPC) file in campaign-store/ in the base directory, so it can be memory-mapped for ML without parsing CSVs.
+Rows are upserted by key columns, so re-running a command on some modifications only replaces their rows.
+The CSV files are still written as before, the store is kept alongside them.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: pyarrow is a required dependency, removed store_available fallback.
+"""
+#import modules
+import os
+import pandas as pd
+from typing import ClassVar
+import pyarrow.feather as feather
+
+#define functions
+def typed(df):
+    '''Converts object columns to numbers where possible so the store has typed columns.'''
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError,TypeError):
+                df[col] = df[col].astype('string')
+    return df
+
+def rows_to_frame(header,rows):
+    '''Converts list of CSV rows (as written to the workflow's CSV files) to typed DataFrame with header columns.'''
+    columns = header.split(',')
+    data = []
+    for row in rows:
+        values = row.strip('\n').split(',')
+        values = values[:len(columns)] + [None]*(len(columns)-len(values))
+        data.append([None if v in ('','None') else v for v in values])
+    return typed(pd.DataFrame(data,columns=columns))
+
+def sort_key(col):
+    '''Sorts Modification_# columns by number rather than as strings.'''
+    if col.dtype == 'string' or col.dtype == object:
+        nums = col.astype(str).str.extract(r'Modification_(\d+)',expand=False)
+        if nums.notna().all():
+            return nums.astype(int)
+    return col
+
+#define class
+class CampaignStore:
+    '''Store of campaign tables in base_dir/campaign-store, one Feather file per table.'''
+    store_dir: ClassVar = 'campaign-store'
+
+    def __init__(self,base_dir):
+        '''Initialize store.'''
+        self.path = os.path.join(base_dir,self.store_dir)
+
+    def table_path(self,table):
+        '''Gets path of table file.'''
+        return os.path.join(self.path,f'{table}.feather')
+
+    def read_arrow(self,table,columns=None):
+        '''Reads table as memory-mapped pyarrow Table (zero-copy). Returns None if table doesn't exist.'''
+        if not os.path.exists(self.table_path(table)):
+            return None
+        return feather.read_table(self.table_path(table),columns=columns,memory_map=True)
+
+    def read(self,table,columns=None):
+        '''Reads table as pandas DataFrame. Returns empty DataFrame if table doesn't exist.'''
+        arrow_table = self.read_arrow(table,columns)
+        if arrow_table is None:
+            return pd.DataFrame()
+        return arrow_table.to_pandas()
+
+    def write(self,table,df):
+        '''Writes whole table, replacing the file atomically.'''
+        os.makedirs(self.path,exist_ok=True)
+        path = self.table_path(table)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        #uncompressed so the file can be memory-mapped
+        feather.write_feather(df.reset_index(drop=True),tmp,compression='uncompressed')
+        os.replace(tmp,path)
+
+    def upsert(self,table,df,keys):
+        '''Adds rows of df to table, replacing existing rows with the same values in key columns.'''
+        df = typed(df)
+        old = self.read(table)
+        if not old.empty:
+            new_keys = pd.MultiIndex.from_frame(df[keys].astype(str))
+            old_keys = pd.MultiIndex.from_frame(old[keys].astype(str))
+            old = old[~old_keys.isin(new_keys)]
+            df = pd.concat([old,df],ignore_index=True)
+        df = df.sort_values(keys,kind='stable',key=sort_key)
+        self.write(table,df)
+        return df
+
+    def export_csv(self,table,csv_path,index=False):
+        '''Exports table to CSV.'''
+        self.read(table).to_csv(csv_path,index=index)
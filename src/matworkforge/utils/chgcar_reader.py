@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming reader for CHGCAR files & streaming cube writer. The structure & grid header are parsed like pymatgen's
+VolumetricData, but the total density block is read in chunks, so large grids can be combined in a memory-mapped
+array without loading the whole CHGCAR (with its spin & augmentation blocks) into memory.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import numpy as np
+from pymatgen.io.vasp import Poscar
+from pymatgen.core import Element
+from pymatgen.core.units import ang_to_bohr
+
+#define functions
+def read_header(path):
+    '''Reads structure & grid dimensions of CHGCAR. Returns structure, dims (nx, ny, nz) & byte offset of the total density block.'''
+    with open(path,'rb') as f:
+        poscar_lines = []
+        #poscar ends at first blank line after the comment line, same as pymatgen
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"Couldn't parse Poscar from {path}.")
+            line = line.strip()
+            if line or len(poscar_lines) == 0:
+                poscar_lines.append(line)
+            else:
+                break
+        structure = Poscar.from_str(b'\n'.join(poscar_lines).decode('utf-8')).structure
+        #grid dimensions
+        line = f.readline()
+        while line and not line.strip():
+            line = f.readline()
+        dims = tuple(int(i) for i in line.split())
+        if len(dims) != 3:
+            raise ValueError(f'Expected 3 grid dimensions in {path}, got {len(dims)}')
+        offset = f.tell()
+    return structure, dims, offset
+
+def stream_grid(path,offset,n_values,chunk_size=1<<22):
+    '''Yields arrays of values of the density block starting at offset, in file order, until n_values have been read.'''
+    read = 0
+    rest = b''
+    with open(path,'rb') as f:
+        f.seek(offset)
+        while read < n_values:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            text = rest + chunk
+            #don't split a number between chunks
+            cut = max(text.rfind(b' '),text.rfind(b'\n'))
+            rest = text[cut+1:]
+            values = np.array(text[:cut+1].split()[:n_values-read],dtype=float)
+            read += len(values)
+            yield values
+        if read < n_values and rest.strip():
+            values = np.array(rest.split()[:n_values-read],dtype=float)
+            read += len(values)
+            yield values
+    if read != n_values:
+        raise ValueError(f'Expected {n_values} values in {path}, got {read}')
+
+def read_total_into(path,out,offset,subtract=False):
+    '''Reads total density block into flat array out (e.g. memmap), or subtracts it from out if subtract is True.'''
+    pos = 0
+    for values in stream_grid(path,offset,len(out)):
+        if subtract == True:
+            out[pos:pos+len(values)] -= values
+        else:
+            out[pos:pos+len(values)] = values
+        pos += len(values)
+
+def write_cube(filename,structure,values,dims,block_size=1<<17):
+    '''
+    Writes density to cube file, same format as pymatgen's VolumetricData.to_cube. values is flat array (e.g. memmap)
+    in CHGCAR order (x fastest) & dims is (nx, ny, nz). Values are formatted & written in blocks of x planes, so only
+    one block is in memory at a time.
+    '''
+    nx, ny, nz = dims
+    #(nz, ny, nx) view of CHGCAR order, cube files are written with z fastest
+    data = values.reshape((nz,ny,nx))
+    with open(filename,'w',encoding='utf-8') as f:
+        f.write(f'# Cube file for {structure.formula} generated by Pymatgen\n')
+        f.write('# \n')
+        f.write(f'\t {len(structure)} 0.000000 0.000000 0.000000\n')
+        for idx, n in enumerate((nx,ny,nz)):
+            lattice_matrix = structure.lattice.matrix[idx] / n * ang_to_bohr
+            f.write(f'\t {n} {lattice_matrix[0]:.6f} {lattice_matrix[1]:.6f} {lattice_matrix[2]:.6f}\n')
+        for site in structure:
+            f.write(f'\t {Element(site.species_string).Z} 0.000000 '
+                    f'{ang_to_bohr * site.coords[0]} '
+                    f'{ang_to_bohr * site.coords[1]} '
+                    f'{ang_to_bohr * site.coords[2]} \n')
+        step = max(1,block_size//(ny*nz))
+        count = 0
+        for x0 in range(0,nx,step):
+            block = np.ascontiguousarray(data[:,:,x0:x0+step].transpose(2,1,0)).ravel().tolist()
+            tokens = [f"{' ' if dat > 0 else ''}{dat:.6e} " for dat in block]
+            #new line after every 6th value of the whole grid
+            for i in range(5-count%6,len(tokens),6):
+                tokens[i] += '\n'
+            count += len(tokens)
+            f.write(''.join(tokens))
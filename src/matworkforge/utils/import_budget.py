@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time check for wf startup. Runs `wf --version` under python -X importtime in a fresh interpreter & fails if
+the total import time goes over the budget or if a heavy module (pymatgen, pyvista, etc.) is imported at startup.
+Run with: python -m matworkforge.utils.import_budget [budget in seconds]
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import sys
+import subprocess as sp
+
+#startup budget in seconds & modules that should only be imported when their command runs
+BUDGET = 0.5
+HEAVY_MODULES = ('pymatgen','pyvista','pandas','ase','scipy','plotly','matplotlib')
+
+#define functions
+def parse_importtime(stderr):
+    '''Parses -X importtime output. Returns list of (module, cumulative seconds) for top-level imports & set of all modules.'''
+    top = []
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        #top-level imports have no extra indent, their cumulative times add up to the total
+        if name[1:2] != ' ':
+            top.append((name.strip(),int(cumulative)/1e6))
+    return top, modules
+
+def check_startup(budget=BUDGET,args=('--version',)):
+    '''Runs wf with args in a fresh interpreter & checks import time. Returns True if within budget.'''
+    code = f'import sys; sys.argv = ["wf",*{list(args)!r}]; from matworkforge.main import app; app()'
+    cp = sp.run([sys.executable,'-X','importtime','-c',code],capture_output=True,text=True)
+    if cp.returncode != 0:
+        print(f'wf {" ".join(args)} failed:\n{cp.stderr}')
+        return False
+    top, modules = parse_importtime(cp.stderr)
+    total = sum(t for _, t in top)
+    print(f'wf {" ".join(args)} import time: {total:.3f} s (budget {budget:.3f} s)')
+    for name, t in sorted(top,key=lambda x: x[1],reverse=True)[:5]:
+        print(f'    {t:.3f} s  {name}')
+    heavy = sorted(m for m in modules if m.split('.')[0] in HEAVY_MODULES and '.' not in m)
+    if heavy:
+        print(f'Heavy modules imported at startup: {", ".join(heavy)}')
+        return False
+    return total <= budget
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET
+    sys.exit(0 if check_startup(budget) else 1)
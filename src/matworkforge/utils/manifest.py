@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-directory manifest of processed input files, so commands only redo work for new or changed calculations.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import os
+import json
+from typing import ClassVar
+
+#define functions
+def stamp(directory,files):
+    '''Gets [mtime_ns, size] of each file in directory. Missing files are None.'''
+    stamps = {}
+    for name in files:
+        try:
+            st = os.stat(os.path.join(directory,name))
+        except OSError:
+            stamps[name] = None
+        else:
+            stamps[name] = [st.st_mtime_ns,st.st_size]
+    return stamps
+
+#define class
+class Manifest:
+    '''
+    Manifest saved to .wf-manifest.json in a calculation directory. Each step (e.g. parse, integrate) has its own
+    section with the stamps of the input files it used and any results worth keeping.
+    '''
+    manifest_file: ClassVar = '.wf-manifest.json'
+
+    def __init__(self,directory):
+        '''Initialize manifest and load it if it exists.'''
+        self.directory = directory
+        self.path = os.path.join(directory,self.manifest_file)
+        try:
+            with open(self.path,'r') as f:
+                self.sections = json.load(f)
+        except (OSError,ValueError):
+            self.sections = {}
+
+    def is_current(self,section,files,outputs=()):
+        '''Checks if section was run with the current input files and all of its output files exist.'''
+        entry = self.sections.get(section)
+        if entry == None:
+            return False
+        if entry.get('inputs') != stamp(self.directory,files):
+            return False
+        return all(os.path.exists(os.path.join(self.directory,o)) for o in outputs)
+
+    def get(self,section):
+        '''Gets saved results of section. Returns None if there are none.'''
+        entry = self.sections.get(section)
+        if entry == None:
+            return None
+        return entry.get('data')
+
+    def update(self,section,files,data=None):
+        '''Records input file stamps & results of section and saves manifest.'''
+        self.sections[section] = {'inputs':stamp(self.directory,files),'data':data}
+        self.save()
+
+    def save(self):
+        '''Saves manifest. Skipped if the directory can't be written to.'''
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp,'w') as f:
+                json.dump(self.sections,f)
+            os.replace(tmp,self.path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tail-first OUTCAR reader. Searches the memory-mapped file backwards so only the end of large OUTCARs is read.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Added scan_errors to find all error messages with one combined regex in a streaming pass.
+    10-18-26: Added convergence to check electronic & ionic convergence from last Iteration line.
+"""
+#import modules
+import os
+import re
+import mmap
+from functools import lru_cache
+
+#markers
+TOTEN = b'TOTEN'
+FERMI = b'Fermi energy:'
+FINISHED = b'General timing and accounting informations for this job'
+ACCURACY = b'reached required accuracy'
+ITERATION = re.compile(rb'Iteration\s*(\d+)\s*\(\s*(\d+)\)')
+
+#define functions
+def last_line(mm,marker):
+    '''Returns last line containing marker, searching backwards from end of file. Returns None if not found.'''
+    idx = mm.rfind(marker)
+    if idx == -1:
+        return None
+    start = mm.rfind(b'\n',0,idx) + 1
+    end = mm.find(b'\n',idx)
+    if end == -1:
+        end = len(mm)
+    return mm[start:end].decode('utf-8',errors='replace')
+
+def parse_toten(line):
+    '''Gets energy from TOTEN line.'''
+    return float(line.split()[4])
+
+def parse_fermi(line):
+    '''Gets fermi energy from Fermi energy line.'''
+    if line.startswith(' BZINTS'):
+        fermi = float(line.split()[3].strip(';'))
+    else:
+        fermi = float(line.split()[2])
+    return fermi
+
+@lru_cache
+def compile_msgs(msg_items):
+    '''
+    Compiles error messages into one regex. msg_items is tuple of (error, (messages,)) so it can be cached.
+    Returns compiled pattern, dict of message -> error and length of longest message.
+    '''
+    lookup = {}
+    for err,err_msgs in msg_items:
+        for msg in err_msgs:
+            lookup.setdefault(msg.encode(),err)
+    #longest first so a message isn't cut short by one of its prefixes
+    msgs = sorted(lookup,key=len,reverse=True)
+    pattern = re.compile(b'|'.join(re.escape(m) for m in msgs))
+    return pattern, lookup, len(msgs[0])
+
+def scan_errors(outcar,msgs,chunk_size=1<<20):
+    '''
+    Finds all errors in msgs ({error: [messages]}) in one streaming pass over the file.
+    File is read in chunks, keeping enough of the previous chunk to catch messages split between chunks.
+    '''
+    pattern, lookup, max_len = compile_msgs(tuple((err,tuple(m)) for err,m in msgs.items()))
+    all_errs = set(lookup.values())
+    errors = set()
+    with open(outcar,'rb') as f:
+        tail = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf = tail + chunk
+            for m in pattern.finditer(buf):
+                errors.add(lookup[m.group()])
+            #stop early if everything has been found
+            if errors == all_errs:
+                break
+            tail = buf[-(max_len-1):] if max_len > 1 else b''
+    return errors
+
+def open_outcar(outcar):
+    '''Memory maps OUTCAR. Returns None if file is missing or empty.'''
+    try:
+        with open(outcar,'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+
+def read_outcar(outcar,msgs=None):
+    '''
+    Reads OUTCAR in one pass and returns dict with final energy, fermi energy, completion markers and,
+    if msgs ({error: [messages]}) is given, set of errors found.
+    '''
+    data = {'energy':None,'fermi':None,'completed':False,'reached_accuracy':False,'errors':set()}
+    mm = open_outcar(outcar)
+    if mm == None:
+        return data
+    with mm:
+        line = last_line(mm,TOTEN)
+        if line != None:
+            data['energy'] = parse_toten(line)
+        line = last_line(mm,FERMI)
+        if line != None:
+            data['fermi'] = parse_fermi(line)
+        data['completed'] = mm.rfind(FINISHED) != -1
+        data['reached_accuracy'] = mm.rfind(ACCURACY) != -1
+    if msgs != None:
+        data['errors'] = scan_errors(outcar,msgs)
+    return data
+
+def final_energy(outcar):
+    '''Gets final energy (last TOTEN) from OUTCAR. Returns None if not found.'''
+    mm = open_outcar(outcar)
+    if mm == None:
+        return None
+    with mm:
+        line = last_line(mm,TOTEN)
+    if line == None:
+        return None
+    return parse_toten(line)
+
+def last_iteration(mm):
+    '''Gets (ionic step, electronic step) from last Iteration line. Returns None if not found.'''
+    idx = mm.rfind(b'Iteration')
+    if idx == -1:
+        return None
+    m = ITERATION.match(mm[idx:idx+64])
+    if m == None:
+        return None
+    return int(m.group(1)), int(m.group(2))
+
+def convergence(outcar,nelm=60,nsw=0):
+    '''
+    Checks convergence from end of OUTCAR, same as Vasprun.converged_electronic & converged_ionic:
+    electronic is converged if last ionic step took fewer than NELM electronic steps, ionic is converged if there
+    were fewer than NSW ionic steps (or NSW <= 1) or relaxation reached required accuracy.
+    Returns (electronic, ionic), or None if OUTCAR has no iterations.
+    '''
+    mm = open_outcar(outcar)
+    if mm == None:
+        return None
+    with mm:
+        steps = last_iteration(mm)
+        accuracy = mm.rfind(ACCURACY) != -1
+    if steps == None:
+        return None
+    ionic_steps, elec_steps = steps
+    elec_con = elec_steps < nelm
+    ion_con = nsw <= 1 or ionic_steps < nsw or accuracy
+    return elec_con, ion_con
+
+def fermi_energy(outcar):
+    '''Gets fermi energy (last Fermi energy line) from OUTCAR. Returns None if not found.'''
+    mm = open_outcar(outcar)
+    if mm == None:
+        return None
+    with mm:
+        line = last_line(mm,FERMI)
+    if line == None:
+        return None
+    return parse_fermi(line)
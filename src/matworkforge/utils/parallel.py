@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process pool helper for running per-directory work in parallel.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Added progress bar. Output of workers is captured and printed in order.
+"""
+#import modules
+import io
+import sys
+from contextlib import redirect_stdout, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from rich.progress import Progress
+
+#define functions
+def run_captured(func,item):
+    '''Runs func on item in worker process and returns result with everything it printed.'''
+    out = io.StringIO()
+    with redirect_stdout(out):
+        result = func(item)
+    return result, out.getvalue()
+
+def pool_map(func,items,jobs=1,description=None):
+    '''
+    Runs func on each item and returns list of results in the same order as items.
+    Runs in this process if jobs <= 1, otherwise fans out over a pool of jobs worker processes. Output printed by
+    the workers is printed in the same order as items. A progress bar is shown if description is given.
+    func must be a module-level function (or partial of one) so it can be sent to the workers.
+    '''
+    items = list(items)
+    results = []
+    progress = Progress() if description != None else nullcontext()
+    with progress:
+        if description != None:
+            task = progress.add_task(description,total=len(items))
+        if jobs == None or jobs <= 1 or len(items) <= 1:
+            for i in items:
+                results.append(func(i))
+                if description != None:
+                    progress.advance(task)
+            return results
+        with ProcessPoolExecutor(max_workers=min(jobs,len(items))) as pool:
+            futures = [pool.submit(run_captured,func,i) for i in items]
+            for f in futures:
+                result, output = f.result()
+                sys.stdout.write(output)
+                results.append(result)
+                if description != None:
+                    progress.advance(task)
+    return results
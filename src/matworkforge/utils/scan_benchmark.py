@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark for OUTCAR error scanning. Writes a synthetic OUTCAR of the given size (iteration blocks with a few
+error messages near the end) & times the old per-message str.find loop over the fully read file against scan_errors.
+Run with: python -m matworkforge.utils.scan_benchmark [size in MB, default 500] [OUTCAR path]
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import os
+import sys
+import time
+import tempfile
+from .outcar_reader import scan_errors
+from ..job_handling.vasp_msgs import VASP_MSGS
+
+#one ionic step of filler, similar in shape to a real OUTCAR
+BLOCK = ''.join(
+    f'--------------------------------------- Iteration {i:6d}(   1)  ---------------------------------------\n'
+    '    POTLOK:  cpu time    0.1234: real time    0.1240\n'
+    '    SETDIJ:  cpu time    0.0211: real time    0.0213\n'
+    '    EDDAV:   cpu time    1.3300: real time    1.3420\n'
+    '  free energy    TOTEN  =      -312.45678901 eV\n'
+    '  energy without entropy =     -312.40000000  energy(sigma->0) =     -312.43000000\n'
+    ' POSITION                                       TOTAL-FORCE (eV/Angst)\n'
+    + '      1.23456      2.34567      3.45678         0.012345     -0.023456      0.034567\n' * 40
+    for i in range(1,11))
+ERRORS = ' ZBRENT: fatal error in bracketing\n BRIONS problems: POTIM should be increased\n'
+
+#define functions
+def write_outcar(path,size_mb):
+    '''Writes synthetic OUTCAR of about size_mb MB with error messages near the end.'''
+    block = BLOCK.encode()
+    n = max(1,int(size_mb*1e6)//len(block))
+    with open(path,'wb') as f:
+        for i in range(n):
+            f.write(block)
+            if i == n - 2:
+                f.write(ERRORS.encode())
+
+def find_loop(outcar,msgs):
+    '''Old check: reads whole OUTCAR & runs str.find once for each message.'''
+    errors = set()
+    with open(outcar,'rt') as file:
+        text = file.read()
+    for err in msgs:
+        for msg in msgs[err]:
+            if text.find(msg) != -1:
+                errors.add(err)
+    return errors
+
+def timed(func,*args):
+    '''Runs func & returns (result, seconds).'''
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run_benchmark(size_mb=500,path=None):
+    '''Times both scans on synthetic OUTCAR. Returns True if they found the same errors.'''
+    with tempfile.TemporaryDirectory() as tmp:
+        outcar = path if path != None else os.path.join(tmp,'OUTCAR')
+        if not os.path.exists(outcar):
+            print(f'Writing {size_mb} MB synthetic OUTCAR...')
+            write_outcar(outcar,size_mb)
+        size = os.path.getsize(outcar)/1e6
+        old, t_old = timed(find_loop,outcar,VASP_MSGS)
+        new, t_new = timed(scan_errors,outcar,VASP_MSGS)
+    print(f'OUTCAR: {size:.0f} MB')
+    print(f'    str.find loop: {t_old:.2f} s  {sorted(old)}')
+    print(f'    scan_errors:   {t_new:.2f} s  {sorted(new)}')
+    print(f'    speedup:       {t_old/t_new:.1f}x')
+    if old != new:
+        print('Scans found different errors!')
+        return False
+    return True
+
+if __name__ == '__main__':
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 500
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    sys.exit(0 if run_benchmark(size_mb,path) else 1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Staging of input files into derived calculation directories (vacancy, adsorption, PDOS & band structure).
+Files that are only read (POTCAR, WAVECAR used as a starting point) are linked instead of copied. Files that are
+edited afterwards (INCAR, KPOINTS, CONTCAR/POSCAR) are still copied, so editing them never changes the source.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+"""
+#import modules
+import os
+import shutil
+from typing import ClassVar
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#FICLONE ioctl from linux/fs.h
+FICLONE = 0x40049409
+
+#define functions
+def reflink(src,dst):
+    '''Makes copy-on-write clone of src at dst. Raises OSError if the filesystem doesn't support it.'''
+    if fcntl == None:
+        raise OSError('reflinks not supported on this platform')
+    with open(src,'rb') as s, open(dst,'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(),FICLONE,s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src,dst)
+
+def hardlink(src,dst):
+    '''Hardlinks src to dst.'''
+    os.link(src,dst)
+
+def symlink(src,dst):
+    '''Symlinks dst to src, relative to dst's directory.'''
+    os.symlink(os.path.relpath(src,os.path.dirname(dst)),dst)
+
+def copy(src,dst):
+    '''Copies src to dst with metadata.'''
+    shutil.copy2(src,dst)
+
+#define class
+class Stager:
+    '''
+    Stages files into derived directories & keeps count of bytes saved by not copying. Modes:
+        copy: file will be edited, always copied.
+        cow: file may be overwritten by the calculation, reflinked if the filesystem supports it, otherwise copied.
+        link: file is only read, reflinked, hardlinked or symlinked, whichever works first.
+    '''
+    modes: ClassVar = {'copy':(copy,),
+                       'cow':(reflink,copy),
+                       'link':(reflink,hardlink,symlink,copy),
+                       }
+
+    def __init__(self):
+        '''Initialize counts.'''
+        self.counts = {f.__name__: 0 for f in (reflink,hardlink,symlink,copy)}
+        self.saved = 0
+        self.copied = 0
+
+    def stage(self,src,dst,mode='copy'):
+        '''Stages src at dst using first method of mode that works. Returns name of method used.'''
+        if os.path.lexists(dst):
+            #linked files are left alone if they are already linked
+            if mode == 'link' and os.path.exists(dst) and os.path.samefile(src,dst):
+                return None
+            os.remove(dst)
+        size = os.path.getsize(src)
+        for method in self.modes[mode]:
+            try:
+                method(src,dst)
+            except OSError:
+                if method == copy:
+                    raise
+                continue
+            break
+        self.counts[method.__name__] += 1
+        if method == copy:
+            self.copied += size
+        else:
+            self.saved += size
+        return method.__name__
+
+    def stage_files(self,source_dir,dest_dir,files):
+        '''Stages files (dict of name: mode) from source_dir to dest_dir. Missing files are skipped with a warning.'''
+        os.makedirs(dest_dir,exist_ok=True)
+        for file, mode in files.items():
+            src_file = os.path.join(source_dir,file)
+            dest_file = os.path.join(dest_dir,file)
+            if os.path.exists(src_file):
+                method = self.stage(src_file,dest_file,mode)
+                if method == None:
+                    print(f'{file} already linked in {dest_dir}')
+                elif method == 'copy':
+                    print(f'Copied {file} to {dest_dir}')
+                else:
+                    print(f'Linked {file} to {dest_dir} ({method})')
+            else:
+                print(f'Warning: {file} not found in {source_dir}, skipping.')
+
+    def report(self):
+        '''Prints number of files staged by each method & bytes saved.'''
+        staged = ', '.join(f'{n} {m}' for m, n in self.counts.items() if n)
+        if not staged:
+            return
+        print(f'Staged files: {staged}. Copied {self.copied/1e6:.1f} MB, saved {self.saved/1e6:.1f} MB by linking.')
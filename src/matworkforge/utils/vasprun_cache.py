@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache for parsed vasprun.xml files. The first parse saves the pieces the workflow uses to a sidecar
+vasprun.npz in the same directory, keyed by path, size and mtime of vasprun.xml, so later commands can
+load them without re-parsing the XML.
+Author: Dorothea Fennell
+Changelog:
+    10-18-26: File created, comments added.
+    10-18-26: Reason the band gap couldn't be read is saved with it as band_gap_error.
+"""
+#import modules
+import os
+import json
+import hashlib
+import warnings
+import numpy as np
+from typing import ClassVar
+from pymatgen.core import Structure
+from pymatgen.io.vasp import Vasprun
+from pymatgen.electronic_structure.core import Orbital, OrbitalType, Spin
+from pymatgen.electronic_structure.dos import CompleteDos, Dos
+
+#define functions
+def cache_key(path):
+    '''Gets cache key for file from its full path, size and mtime.'''
+    st = os.stat(path)
+    key = f'{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def orb_name(orb):
+    '''Converts Orbital/OrbitalType to string so it can be saved.'''
+    return f'{type(orb).__name__}:{orb.name}'
+
+def orb_from_name(name):
+    '''Converts saved string back to Orbital/OrbitalType.'''
+    cls, orb = name.split(':')
+    if cls == 'OrbitalType':
+        return OrbitalType[orb]
+    return Orbital[orb]
+
+#define class
+class VasprunData:
+    '''
+    Parts of Vasprun used by the workflow: final structure & energy, efermi, convergence, eigenvalue band properties,
+    band gap from the band structure and the complete DOS. complete_dos is only built when it's used.
+    band_gap is None if the band structure couldn't be read, band_gap_error then says why.
+    '''
+    cache_file: ClassVar = 'vasprun.npz'
+    version: ClassVar = 2
+
+    def __init__(self,meta,arrays):
+        '''Initialize from metadata dict and dict of DOS arrays, or path of sidecar file to load them from when needed.'''
+        self.meta = meta
+        self.arrays = arrays
+        self.final_structure = Structure.from_dict(meta['final_structure'])
+        self.final_energy = meta['final_energy']
+        self.efermi = meta['efermi']
+        self.converged_ionic = meta['converged_ionic']
+        self.converged_electronic = meta['converged_electronic']
+        self.eigenvalue_band_properties = meta['eigenvalue_band_properties']
+        self.band_gap = meta['band_gap']
+        self.band_gap_error = meta.get('band_gap_error')
+        self.__complete_dos = None
+
+    @classmethod
+    def from_vasprun(cls,vpr):
+        '''Gets data from parsed Vasprun.'''
+        #band gap from band structure, same as vasprun.get_band_structure()
+        band_gap_error = None
+        try:
+            band_struc = vpr.get_band_structure()
+            band_gap = {'energy':band_struc.get_band_gap()['energy'],'efermi':band_struc.efermi,
+                        'cbm':band_struc.get_cbm()['energy'],'vbm':band_struc.get_vbm()['energy']}
+        except Exception as e:
+            band_gap = None
+            band_gap_error = f'{type(e).__name__}: {e}'
+        try:
+            gap, cbm, vbm, direct = vpr.eigenvalue_band_properties
+            eig_props = [float(gap),float(cbm),float(vbm),bool(direct)]
+        except Exception:
+            eig_props = None
+        meta = {'version':cls.version,
+                'final_structure':vpr.final_structure.as_dict(),
+                'final_energy':float(vpr.final_energy),
+                'efermi':vpr.efermi,
+                'converged_ionic':bool(vpr.converged_ionic),
+                'converged_electronic':bool(vpr.converged_electronic),
+                'eigenvalue_band_properties':eig_props,
+                'band_gap':band_gap,
+                'band_gap_error':band_gap_error,
+                'spins':[],
+                'orbitals':[],
+                }
+        arrays = {}
+        tdos = getattr(vpr,'tdos',None)
+        if tdos is not None:
+            spins = list(tdos.densities.keys())
+            meta['spins'] = [int(s) for s in spins]
+            meta['tdos_efermi'] = tdos.efermi
+            arrays['energies'] = tdos.energies
+            arrays['tdos'] = np.stack([tdos.densities[s] for s in spins])
+            if vpr.pdos:
+                #(n_sites, n_orbitals, n_spins, nedos)
+                orbs = list(vpr.pdos[0].keys())
+                meta['orbitals'] = [orb_name(o) for o in orbs]
+                arrays['pdos'] = np.array([[[pdos[o][s] for s in spins] for o in orbs] for pdos in vpr.pdos])
+        return cls(meta,arrays)
+
+    @property
+    def complete_dos(self):
+        '''Builds CompleteDos from saved arrays, same as vasprun.complete_dos.'''
+        if self.__complete_dos is None:
+            if not self.meta['spins']:
+                return None
+            if isinstance(self.arrays,str):
+                with np.load(self.arrays) as data:
+                    self.arrays = {k: data[k] for k in data.files if k != 'meta'}
+            spins = [Spin(s) for s in self.meta['spins']]
+            energies = np.array(self.arrays['energies'])
+            tdos_arr = np.array(self.arrays['tdos'])
+            tdos = Dos(self.meta['tdos_efermi'],energies,{s: tdos_arr[i] for i, s in enumerate(spins)})
+            pdoss = {}
+            if self.meta['orbitals']:
+                orbs = [orb_from_name(o) for o in self.meta['orbitals']]
+                pdos_arr = np.array(self.arrays['pdos'])
+                for n, site in enumerate(self.final_structure):
+                    pdoss[site] = {o: {s: pdos_arr[n,j,i] for i, s in enumerate(spins)} for j, o in enumerate(orbs)}
+            self.__complete_dos = CompleteDos(self.final_structure,tdos,pdoss)
+        return self.__complete_dos
+
+    def save(self,path,key):
+        '''Saves data to sidecar file. Skipped if the directory can't be written to.'''
+        tmp = f'{path}.{os.getpid()}.tmp'
+        meta = dict(self.meta,key=key)
+        try:
+            with open(tmp,'wb') as f:
+                np.savez(f,meta=np.array(json.dumps(meta)),**self.arrays)
+            os.replace(tmp,path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls,path,key):
+        '''Loads data from sidecar file. Returns None if there is no cache for this key.'''
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('key') != key or meta.get('version') != cls.version:
+                    return None
+        except (OSError,ValueError,KeyError):
+            return None
+        #DOS arrays are loaded when complete_dos is used
+        return cls(meta,path)
+
+#define function
+def load_vasprun(path):
+    '''
+    Returns VasprunData for vasprun.xml at path, from the sidecar cache if vasprun.xml hasn't changed since it was
+    saved. Otherwise vasprun.xml is parsed and the cache is written.
+    '''
+    key = cache_key(path)
+    cache_path = os.path.join(os.path.dirname(path),VasprunData.cache_file)
+    data = VasprunData.load(cache_path,key)
+    if data == None:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            vpr = Vasprun(path)
+            data = VasprunData.from_vasprun(vpr)
+        data.save(cache_path,key)
+    return data
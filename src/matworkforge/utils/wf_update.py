@@ -4,9 +4,10 @@ Author: Dorothea Fennell
 Changelog: 
     8-6-25: Created, comments added.
     12-9-25: Rewrote to pull from Github. 
+    10-18-26: Import version from package with relative import.
 """
 #import modules
-from lco_workflow import version
+from .. import version
 import os
 import sys
 import subprocess as sp